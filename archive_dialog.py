@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+报价单存档界面模块
+按日期、总价和产品种类、型号查询存档的报价单，分页显示，选中的报价单可以加载到报价计算界面
+"""
+
+from PyQt5.QtWidgets import (QApplication, QDialog, QVBoxLayout, QHBoxLayout, QFormLayout,
+                            QLabel, QLineEdit, QPushButton, QTableWidget, QTableWidgetItem,
+                            QHeaderView, QAbstractItemView, QMessageBox, QFileDialog,
+                            QProgressDialog)
+from PyQt5.QtCore import Qt
+
+from quotation_archive import PAGE_SIZE
+
+
+class QuotationArchiveDialog(QDialog):
+    """报价单存档查询对话框"""
+    
+    def __init__(self, archive, parent=None):
+        """
+        初始化报价单存档查询对话框
+        
+        Args:
+            archive (QuotationArchive): 报价单存档
+            parent (QWidget): 父窗口
+        """
+        super().__init__(parent)
+        self.archive = archive
+        self.criteria = {}  # 当前查询条件
+        self.page_cursors = [None]  # 已显示的每一页的翻页位置，最后一项为当前页
+        self.results = []  # 当前页的报价单
+        self.total = 0  # 符合条件的报价单数
+        self.has_next_page = False
+        self.selected_items = None  # 选中并加载的报价项目
+        self.init_ui()
+        self.search()
+    
+    def init_ui(self):
+        """初始化UI界面"""
+        self.setWindowTitle("报价单存档")
+        self.resize(900, 600)
+        layout = QVBoxLayout(self)
+        
+        # 查询条件，留空的条件不参与筛选
+        self.criteria_inputs = {}
+        criteria_layout = QHBoxLayout()
+        for fields in ((("date_from", "起始日期:", "YYYY-MM-DD"), ("date_to", "结束日期:", "YYYY-MM-DD")),
+                       (("min_total", "最低总价:", "元"), ("max_total", "最高总价:", "元")),
+                       (("sphere_type", "球体种类:", ""), ("sphere_model", "球体型号:", "")),
+                       (("flange_type", "法兰种类:", ""), ("flange_model", "法兰型号:", ""))):
+            form_layout = QFormLayout()
+            for name, label, placeholder in fields:
+                line_edit = QLineEdit()
+                line_edit.setPlaceholderText(placeholder)
+                line_edit.returnPressed.connect(self.search)
+                self.criteria_inputs[name] = line_edit
+                form_layout.addRow(label, line_edit)
+            criteria_layout.addLayout(form_layout)
+        layout.addLayout(criteria_layout)
+        
+        button_layout = QHBoxLayout()
+        search_btn = QPushButton("查询")
+        search_btn.clicked.connect(self.search)
+        add_btn = QPushButton("收录报价单文件")
+        add_btn.clicked.connect(self.add_files)
+        button_layout.addWidget(search_btn)
+        button_layout.addWidget(add_btn)
+        button_layout.addStretch()
+        layout.addLayout(button_layout)
+        
+        # 查询结果
+        self.result_table = QTableWidget(0, 4)
+        self.result_table.setHorizontalHeaderLabels(["保存时间", "总价(元)", "项目数", "文件"])
+        self.result_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
+        self.result_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.result_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.result_table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.result_table.doubleClicked.connect(self.load_selected)
+        layout.addWidget(self.result_table)
+        
+        # 翻页
+        page_layout = QHBoxLayout()
+        self.prev_btn = QPushButton("上一页")
+        self.prev_btn.clicked.connect(self.previous_page)
+        self.page_label = QLabel()
+        self.next_btn = QPushButton("下一页")
+        self.next_btn.clicked.connect(self.next_page)
+        page_layout.addWidget(self.prev_btn)
+        page_layout.addWidget(self.page_label)
+        page_layout.addWidget(self.next_btn)
+        page_layout.addStretch()
+        
+        load_btn = QPushButton("加载到报价单")
+        load_btn.clicked.connect(self.load_selected)
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(self.reject)
+        page_layout.addWidget(load_btn)
+        page_layout.addWidget(close_btn)
+        layout.addLayout(page_layout)
+    
+    def read_criteria(self):
+        """
+        读取查询条件
+        
+        Returns:
+            dict: 查询条件，总价不是数字时抛出 ValueError
+        """
+        criteria = {}
+        for name, line_edit in self.criteria_inputs.items():
+            text = line_edit.text().strip()
+            if not text:
+                continue
+            if name in ("min_total", "max_total"):
+                try:
+                    criteria[name] = float(text)
+                except ValueError:
+                    raise ValueError(f"总价必须是数字: {text}") from None
+            else:
+                criteria[name] = text
+        return criteria
+    
+    def search(self):
+        """按当前查询条件从第一页开始查询"""
+        try:
+            criteria = self.read_criteria()
+            total = self.archive.count(**criteria)
+        except ValueError as e:
+            QMessageBox.warning(self, "警告", str(e))
+            return
+        
+        self.criteria = criteria
+        self.total = total
+        self.page_cursors = [None]
+        self.load_page()
+    
+    def load_page(self):
+        """查询并显示当前页"""
+        # 多查询一份报价单，判断是否还有下一页
+        results = self.archive.search(PAGE_SIZE + 1, self.page_cursors[-1], **self.criteria)
+        self.has_next_page = len(results) > PAGE_SIZE
+        self.results = results[:PAGE_SIZE]
+        
+        self.result_table.setRowCount(len(self.results))
+        for row, result in enumerate(self.results):
+            values = (result["saved_at"][:19].replace("T", " "), f"{result['total_price']:.2f}",
+                      str(result["item_count"]), result["path"])
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if column in (1, 2):
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.result_table.setItem(row, column, item)
+        self.result_table.resizeColumnsToContents()
+        
+        self.page_label.setText(f"第 {len(self.page_cursors)} 页，共 {self.total} 份报价单")
+        self.prev_btn.setEnabled(len(self.page_cursors) > 1)
+        self.next_btn.setEnabled(self.has_next_page)
+    
+    def next_page(self):
+        """显示下一页"""
+        if self.has_next_page:
+            self.page_cursors.append(self.results[-1]["id"])
+            self.load_page()
+    
+    def previous_page(self):
+        """显示上一页"""
+        if len(self.page_cursors) > 1:
+            self.page_cursors.pop()
+            self.load_page()
+    
+    def add_files(self):
+        """选择报价单文件并收录到存档"""
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "收录报价单文件", "", "JSON文件 (*.json)")
+        
+        if not file_paths:
+            return
+        
+        progress = QProgressDialog("正在收录报价单...", "取消", 0, len(file_paths), self)
+        progress.setWindowTitle("收录报价单文件")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+        
+        counts = {"added": 0, "updated": 0, "unchanged": 0}
+        errors = []
+        results = self.archive.add_files(file_paths)
+        for done, result in enumerate(results, 1):
+            if result["error"]:
+                errors.append(f"{result['source']}: {result['error']}")
+            else:
+                counts[result["status"]] += 1
+            progress.setValue(done)
+            QApplication.processEvents()
+            if progress.wasCanceled():
+                break
+        results.close()
+        progress.close()
+        
+        message = (f"新增: {counts['added']}\n"
+                   f"更新: {counts['updated']}\n"
+                   f"未修改: {counts['unchanged']}\n"
+                   f"失败: {len(errors)}")
+        if errors:
+            message += "\n\n" + "\n".join(errors[:10])
+        QMessageBox.information(self, "收录完成", message)
+        self.search()
+    
+    def load_selected(self):
+        """读取选中报价单的报价项目并关闭对话框"""
+        row = self.result_table.currentRow()
+        if row < 0 or row >= len(self.results):
+            QMessageBox.warning(self, "警告", "请先选择报价单")
+            return
+        
+        items = self.archive.get_items(self.results[row]["id"])
+        if not items:
+            QMessageBox.warning(self, "警告", "存档中的报价单没有报价项目")
+            return
+        
+        self.selected_items = items
+        self.accept()
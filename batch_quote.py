@@ -0,0 +1,269 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+批量报价命令行工具
+不需要图形界面，为目录或CSV文件中的报价请求批量计算报价，
+并输出JSON和PDF格式的报价单。报价请求在多个进程中并行处理。
+
+用法:
+    python batch_quote.py requests/ -o quotations/
+    python batch_quote.py requests.csv -o quotations/ --jobs 8 --no-pdf
+"""
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from models import REQUEST_ITEM_KEYS, ProductDataModel, QuotationModel
+from sqlite_storage import SQLiteProductDataModel
+from quotation_pdf import create_quotation_pdf
+
+
+# CSV报价请求支持的列名，同一报价单编号的行组成一份报价单
+REQUEST_CSV_COLUMNS = {
+    "quotation": ("quotation", "报价单"),
+    "sphereType": ("sphereType", "球体种类"),
+    "sphereModel": ("sphereModel", "球体型号"),
+    "flangeType": ("flangeType", "法兰种类"),
+    "flangeModel": ("flangeModel", "法兰型号"),
+    "flangeQuantity": ("flangeQuantity", "法兰数量"),
+    "jointQuantity": ("jointQuantity", "接头数量"),
+}
+
+# 输出文件名中不允许出现的字符
+UNSAFE_FILENAME_CHARS = re.compile(r'[\\/:*?"<>|\x00-\x1f]')
+
+# 工作进程中的数据模型，每个进程只加载一次产品目录
+_product_model = None
+_quotation_model = None
+
+
+def read_csv_requests(file_path):
+    """
+    读取CSV格式的报价请求
+    
+    Args:
+        file_path (str): CSV文件路径
+        
+    Returns:
+        list: (报价单名称, 项目列表) 元组列表，按首次出现的顺序排列
+    """
+    requests = {}
+    with open(file_path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader, [])]
+        columns = {}
+        for key, names in REQUEST_CSV_COLUMNS.items():
+            for name in names:
+                if name in header:
+                    columns[key] = header.index(name)
+                    break
+            else:
+                raise ValueError(f"CSV文件缺少列: {names[0]}")
+        
+        for line_number, row in enumerate(reader, start=2):
+            if not any(cell.strip() for cell in row):
+                continue
+            try:
+                values = {key: row[index].strip() for key, index in columns.items()}
+            except IndexError:
+                raise ValueError(f"第 {line_number} 行列数不足")
+            item = {key: values[key] for key in REQUEST_ITEM_KEYS}
+            requests.setdefault(values["quotation"], []).append(item)
+    return list(requests.items())
+
+
+def find_requests(path):
+    """
+    查找报价请求
+    
+    目录中的每个JSON文件是一份报价请求，内容为 {"items": [项目, ...]}，
+    也可以直接使用报价计算界面保存的报价单文件。
+    
+    Args:
+        path (str): 报价请求目录或CSV文件路径
+        
+    Returns:
+        list: (报价单名称, 请求文件路径或项目列表) 元组列表
+    """
+    if os.path.isdir(path):
+        return [
+            (os.path.splitext(name)[0], os.path.join(path, name))
+            for name in sorted(os.listdir(path))
+            if name.lower().endswith(".json")
+        ]
+    return read_csv_requests(path)
+
+
+def load_request_items(file_path):
+    """
+    读取JSON格式的报价请求文件
+    
+    Args:
+        file_path (str): 请求文件路径
+        
+    Returns:
+        list: 报价项目列表
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    items = data.get("items", data.get("quotationItems")) if isinstance(data, dict) else None
+    if not isinstance(items, list):
+        raise ValueError("请求文件缺少 items 列表")
+    return items
+
+
+def output_names(names):
+    """
+    为报价单生成互不相同的输出文件名
+    
+    名称中不允许出现的字符替换为 "_"，替换后重名(忽略大小写)的报价单依次加上 "_2"、"_3" 等后缀，
+    避免后处理的报价单覆盖先处理的报价单。
+    
+    Args:
+        names (list): 报价单名称列表
+        
+    Returns:
+        list: 与名称一一对应的输出文件名(不含扩展名)
+    """
+    used = set()
+    file_names = []
+    for name in names:
+        base = UNSAFE_FILENAME_CHARS.sub("_", name) or "_"
+        file_name = base
+        suffix = 1
+        while file_name.casefold() in used:
+            suffix += 1
+            file_name = f"{base}_{suffix}"
+        used.add(file_name.casefold())
+        file_names.append(file_name)
+    return file_names
+
+
+def _init_worker(storage):
+    """
+    工作进程初始化：加载产品目录
+    
+    Args:
+        storage (str): 产品数据存储方式，"json" 或 "sqlite"
+    """
+    global _product_model, _quotation_model
+    if storage == "sqlite":
+        _product_model = SQLiteProductDataModel()
+    else:
+        _product_model = ProductDataModel()
+    _quotation_model = QuotationModel(_product_model)
+
+
+def quote_request(request, output_dir, write_pdf=True):
+    """
+    在工作进程中计算一份报价单并写入输出文件
+    
+    Args:
+        request (tuple): (报价单名称, 请求文件路径或项目列表, 输出文件名)
+        output_dir (str): 输出目录
+        write_pdf (bool): 是否生成PDF报价单
+        
+    Returns:
+        dict: 处理结果，包含名称、输出文件名、项目数、总价、耗时和错误信息
+    """
+    name, source, file_name = request
+    start = time.perf_counter()
+    result = {"name": name, "output": file_name, "items": 0, "totalPrice": 0.0, "error": None}
+    try:
+        items = load_request_items(source) if isinstance(source, str) else source
+        _quotation_model.clear_items()
+        _quotation_model.add_request_items(items)
+        
+        base_path = os.path.join(output_dir, file_name)
+        if not _quotation_model.save_quotation(base_path + ".json"):
+            raise OSError("保存报价单失败")
+        if write_pdf:
+            create_quotation_pdf(base_path + ".pdf", _quotation_model.quotation_items,
+                                 _quotation_model.total_price)
+        
+        result["items"] = len(items)
+        result["totalPrice"] = _quotation_model.total_price
+    except Exception as e:
+        result["error"] = str(e)
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def run_batch(requests, output_dir, storage="json", jobs=None, write_pdf=True):
+    """
+    在进程池中批量处理报价请求
+    
+    Args:
+        requests (list): find_requests 返回的报价请求列表
+        output_dir (str): 输出目录
+        storage (str): 产品数据存储方式，"json" 或 "sqlite"
+        jobs (int): 工作进程数，默认为CPU核心数
+        write_pdf (bool): 是否生成PDF报价单
+        
+    Yields:
+        dict: 每份报价单的处理结果，按请求顺序产生
+    """
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    
+    # 首次使用SQLite时先在主进程中创建数据库，避免多个工作进程同时迁移数据
+    if storage == "sqlite":
+        SQLiteProductDataModel().close()
+    
+    jobs = jobs or os.cpu_count() or 1
+    # 每次向工作进程发送多份请求，减少进程间通信次数
+    chunksize = max(1, len(requests) // (jobs * 4))
+    worker = partial(quote_request, output_dir=output_dir, write_pdf=write_pdf)
+    file_names = output_names([name for name, _ in requests])
+    tasks = [(name, source, file_name) for (name, source), file_name in zip(requests, file_names)]
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(storage,)) as executor:
+        yield from executor.map(worker, tasks, chunksize=chunksize)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="橡胶接头批量报价工具")
+    parser.add_argument("input", help="报价请求目录(每个JSON文件一份报价单)或CSV文件")
+    parser.add_argument("-o", "--output", default="quotations",
+                        help="输出目录 (默认: quotations)")
+    parser.add_argument("--storage", choices=["json", "sqlite"], default="json",
+                        help="产品数据存储方式 (默认: json)")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="工作进程数 (默认: CPU核心数)")
+    parser.add_argument("--no-pdf", action="store_true", help="只输出JSON报价单，不生成PDF")
+    args = parser.parse_args()
+    
+    try:
+        requests = find_requests(args.input)
+    except Exception as e:
+        print(f"读取报价请求失败: {e}", file=sys.stderr)
+        return 2
+    
+    start = time.perf_counter()
+    succeeded = failed = 0
+    for result in run_batch(requests, args.output, args.storage, args.jobs, not args.no_pdf):
+        if result["error"]:
+            failed += 1
+            print(f"{result['name']}: 失败: {result['error']}", file=sys.stderr)
+        else:
+            succeeded += 1
+            renamed = f" (输出为 {result['output']})" if result["output"] != result["name"] else ""
+            print(f"{result['name']}: {result['items']} 项, "
+                  f"总价 {result['totalPrice']:.2f} 元, {result['seconds']:.2f} 秒{renamed}")
+    
+    print(f"完成: 成功 {succeeded} 份, 失败 {failed} 份, "
+          f"耗时 {time.perf_counter() - start:.2f} 秒")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
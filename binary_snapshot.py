@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+二进制快照模块
+与JSON快照同时写入的紧凑二进制格式，用于快速启动时加载大型产品目录
+
+文件格式(小端字节序):
+    文件头: 魔数 "RJQC"、格式版本、对应JSON文件的大小和修改时间、数据长度、CRC32校验值
+    数据:   球体目录和法兰目录依次排列，每个目录包含
+            种类字符串表、每个种类的型号数量数组、型号字符串表、价格数组
+    字符串表以数量和字节长度为前缀，内容为以 "\0" 分隔的UTF-8文本
+"""
+
+import os
+import struct
+import sys
+import zlib
+from array import array
+
+from catalog import ModelColumns, ProductCatalog
+
+
+MAGIC = b"RJQC"
+FORMAT_VERSION = 1
+
+# 魔数、版本、保留字段、JSON文件大小、JSON修改时间(纳秒)、数据长度、CRC32
+HEADER = struct.Struct("<4sHHQqQI")
+STRING_TABLE_HEADER = struct.Struct("<IQ")
+
+
+def _little_endian(values):
+    """返回小端字节序的数组字节"""
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(typecode, data):
+    """从小端字节序的字节创建数组"""
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _pack_strings(strings):
+    """
+    打包字符串表
+    
+    Args:
+        strings (list): 字符串列表
+        
+    Returns:
+        bytes: 字符串表数据
+    """
+    text = "\0".join(strings)
+    if text.count("\0") != max(len(strings) - 1, 0):
+        raise ValueError("字符串中包含 \\0 字符，无法写入二进制快照")
+    blob = text.encode("utf-8")
+    return STRING_TABLE_HEADER.pack(len(strings), len(blob)) + blob
+
+
+def _unpack_strings(data, offset):
+    """
+    解析字符串表
+    
+    Args:
+        data (memoryview): 快照数据
+        offset (int): 字符串表起始位置
+        
+    Returns:
+        tuple: (字符串列表, 下一个字段的位置)
+    """
+    count, size = STRING_TABLE_HEADER.unpack_from(data, offset)
+    offset += STRING_TABLE_HEADER.size
+    strings = str(data[offset:offset + size], "utf-8").split("\0") if count else []
+    if len(strings) != count:
+        raise ValueError("二进制快照字符串表已损坏")
+    return strings, offset + size
+
+
+def encode_catalogs(spheres, flanges):
+    """
+    把球体和法兰目录编码为二进制快照数据
+    
+    Args:
+        spheres (ProductCatalog): 球体目录
+        flanges (ProductCatalog): 法兰目录
+        
+    Returns:
+        bytes: 快照数据(不含文件头)
+    """
+    parts = []
+    for catalog in (spheres, flanges):
+        counts = array("I")
+        names = []
+        prices = array("d")
+        for product_type in catalog.types:
+            columns = catalog.columns[product_type]
+            columns.compact()
+            counts.append(len(columns.names))
+            names.extend(columns.names)
+            prices.extend(columns.prices)
+        parts.append(_pack_strings(catalog.types))
+        parts.append(_little_endian(counts))
+        parts.append(_pack_strings(names))
+        parts.append(_little_endian(prices))
+    return b"".join(parts)
+
+
+def decode_catalogs(payload):
+    """
+    从二进制快照数据还原球体和法兰目录
+    
+    Args:
+        payload (bytes): 快照数据(不含文件头)
+        
+    Returns:
+        tuple: (球体目录, 法兰目录)
+    """
+    data = memoryview(payload)
+    offset = 0
+    catalogs = []
+    for _ in range(2):
+        types, offset = _unpack_strings(data, offset)
+        counts = _from_little_endian("I", data[offset:offset + 4 * len(types)])
+        offset += 4 * len(types)
+        names, offset = _unpack_strings(data, offset)
+        total = sum(counts)
+        if total != len(names):
+            raise ValueError("二进制快照型号数量不一致")
+        prices = _from_little_endian("d", data[offset:offset + 8 * total])
+        offset += 8 * total
+        if len(prices) != total:
+            raise ValueError("二进制快照价格数据不完整")
+        
+        catalog = ProductCatalog()
+        start = 0
+        for product_type, count in zip(types, counts):
+            catalog.add_type(product_type)
+            catalog.columns[product_type] = ModelColumns.from_columns(
+                list(map(sys.intern, names[start:start + count])), prices[start:start + count]
+            )
+            start += count
+        catalogs.append(catalog)
+    
+    if offset != len(data):
+        raise ValueError("二进制快照存在多余数据")
+    return catalogs[0], catalogs[1]
+
+
+def write_snapshot(file_path, payload, json_path):
+    """
+    原子地写入二进制快照，文件头记录对应JSON快照的大小和修改时间
+    
+    Args:
+        file_path (str): 二进制快照文件路径
+        payload (bytes): 快照数据
+        json_path (str): 已写入的JSON快照文件路径
+    """
+    stat = os.stat(json_path)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, 0, stat.st_size, stat.st_mtime_ns,
+                         len(payload), zlib.crc32(payload))
+    tmp_path = file_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(tmp_path, file_path)
+
+
+def read_snapshot(file_path, json_path):
+    """
+    读取与JSON快照对应的二进制快照
+    
+    Args:
+        file_path (str): 二进制快照文件路径
+        json_path (str): JSON快照文件路径
+        
+    Returns:
+        tuple: (球体目录, 法兰目录)；快照不存在、已过期或已损坏时返回None
+    """
+    if not os.path.exists(file_path):
+        return None
+    
+    try:
+        with open(file_path, "rb") as f:
+            header = f.read(HEADER.size)
+            payload = f.read()
+        
+        magic, version, _, json_size, json_mtime, size, checksum = HEADER.unpack(header)
+        stat = os.stat(json_path)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            return None
+        # JSON快照在二进制快照之后被修改过，二进制快照已过期
+        if json_size != stat.st_size or json_mtime != stat.st_mtime_ns:
+            return None
+        if size != len(payload) or zlib.crc32(payload) != checksum:
+            print("二进制快照校验失败，改为读取JSON快照")
+            return None
+        return decode_catalogs(payload)
+    except Exception as e:
+        print(f"读取二进制快照失败: {e}")
+    return None
@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+报价单批量重新生成工具
+把报价计算界面保存的JSON报价单文件批量重新生成为PDF，例如修改报价单模板之后。
+PDF在多个进程中并行生成，报价单文件和PDF模板都没有变化的输出会被跳过。
+
+用法:
+    python bulk_render.py saved_quotations/ -o pdf/
+    python bulk_render.py a.json b.json -o pdf/ --jobs 8 --force
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import quotation_pdf
+from models import TABLE_HEADERS, find_quotation_files, read_quotation_file
+
+
+# 输出目录中记录已生成PDF的来源文件和模板指纹的清单文件
+MANIFEST_FILE = ".render_manifest.json"
+
+
+def file_digest(file_path):
+    """
+    计算文件内容的SHA-256摘要
+    
+    Args:
+        file_path (str): 文件路径
+        
+    Returns:
+        str: 十六进制摘要
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def renderer_fingerprint():
+    """
+    计算PDF模板的指纹，所有PDF都需要重新生成的情况下指纹随之改变：
+    报价单生成模块或表头修改，或者使用的中文字体更换(字体文件的路径、大小或修改时间变化)
+    
+    Returns:
+        str: 十六进制摘要
+    """
+    digest = hashlib.sha256()
+    digest.update(file_digest(quotation_pdf.__file__).encode("ascii"))
+    digest.update(json.dumps(TABLE_HEADERS, ensure_ascii=False).encode("utf-8"))
+    font_file = quotation_pdf.cjk_font_file()
+    if font_file is None:
+        font = quotation_pdf.CJK_FALLBACK_FONT
+    else:
+        stat = os.stat(font_file)
+        font = f"{os.path.abspath(font_file)}|{stat.st_size}|{stat.st_mtime_ns}"
+    digest.update(font.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def load_manifest(output_dir):
+    """
+    读取输出目录中的清单
+    
+    Args:
+        output_dir (str): 输出目录
+        
+    Returns:
+        dict: PDF文件名 -> {"source": 报价单文件摘要, "renderer": 模板指纹}，清单不存在或损坏时为空
+    """
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        return manifest if isinstance(manifest, dict) else {}
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"读取生成清单失败，将重新生成全部PDF: {e}", file=sys.stderr)
+        return {}
+
+
+def save_manifest(output_dir, manifest):
+    """
+    原子地写入输出目录中的清单
+    
+    Args:
+        output_dir (str): 输出目录
+        manifest (dict): 清单内容
+    """
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, manifest_path)
+
+
+def render_file(task, output_dir):
+    """
+    在工作进程中把一份报价单文件生成为PDF
+    
+    PDF先写入临时文件，成功后再替换原有的PDF，失败时保留原有的PDF。
+    
+    Args:
+        task (tuple): (报价单文件路径, PDF文件名)
+        output_dir (str): 输出目录
+        
+    Returns:
+        dict: 处理结果，包含报价单文件路径、PDF路径、项目数、耗时和错误信息
+    """
+    source, pdf_name = task
+    start = time.perf_counter()
+    pdf_path = os.path.join(output_dir, pdf_name)
+    result = {"source": source, "output": pdf_path, "items": 0, "error": None}
+    tmp_path = pdf_path + ".tmp"
+    try:
+        items, total_cents = read_quotation_file(source)
+        quotation_pdf.create_quotation_pdf(tmp_path, items, total_cents / 100)
+        os.replace(tmp_path, pdf_path)
+        result["items"] = len(items)
+    except Exception as e:
+        result["error"] = str(e)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def run_render(files, output_dir, jobs=None, force=False):
+    """
+    在进程池中批量生成PDF，并更新输出目录中的清单
+    
+    Args:
+        files (list): 报价单文件路径列表
+        output_dir (str): 输出目录
+        jobs (int): 工作进程数，默认为CPU核心数
+        force (bool): 是否忽略清单，重新生成全部PDF
+        
+    Yields:
+        dict: 每个报价单文件的处理结果，跳过和无法读取的文件先产生，"skipped" 为True表示已跳过；
+            其余文件按顺序在生成后产生
+    """
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    
+    manifest = {} if force else load_manifest(output_dir)
+    renderer = renderer_fingerprint()
+    
+    # 在主进程中计算报价单文件摘要，判断哪些PDF需要重新生成
+    tasks = []
+    signatures = {}
+    for source in files:
+        pdf_name = os.path.splitext(os.path.basename(source))[0] + ".pdf"
+        result = {"source": source, "output": os.path.join(output_dir, pdf_name),
+                  "items": 0, "seconds": 0.0, "error": None, "skipped": False}
+        if pdf_name in signatures:
+            result["error"] = "与其他报价单文件的输出文件名相同"
+            yield result
+            continue
+        try:
+            signature = {"source": file_digest(source), "renderer": renderer}
+        except OSError as e:
+            result["error"] = str(e)
+            yield result
+            continue
+        signatures[pdf_name] = signature
+        if manifest.get(pdf_name) == signature and os.path.exists(result["output"]):
+            result["skipped"] = True
+            yield result
+        else:
+            tasks.append((source, pdf_name))
+    
+    if not tasks:
+        return
+    
+    jobs = jobs or os.cpu_count() or 1
+    worker = partial(render_file, output_dir=output_dir)
+    try:
+        # 每份报价单的大小差别可能很大，逐个分配给工作进程
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as executor:
+            for (_, pdf_name), result in zip(tasks, executor.map(worker, tasks)):
+                result["skipped"] = False
+                if result["error"]:
+                    manifest.pop(pdf_name, None)
+                else:
+                    manifest[pdf_name] = signatures[pdf_name]
+                yield result
+    finally:
+        # 中途中断时也保留已完成部分的记录
+        save_manifest(output_dir, manifest)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="橡胶接头报价单批量重新生成工具")
+    parser.add_argument("inputs", nargs="+", help="报价单JSON文件或包含报价单文件的目录")
+    parser.add_argument("-o", "--output", default="quotation_pdfs",
+                        help="PDF输出目录 (默认: quotation_pdfs)")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="工作进程数 (默认: CPU核心数)")
+    parser.add_argument("--force", action="store_true", help="忽略生成清单，重新生成全部PDF")
+    args = parser.parse_args()
+    
+    files = find_quotation_files(args.inputs)
+    start = time.perf_counter()
+    rendered = skipped = failed = 0
+    for result in run_render(files, args.output, args.jobs, args.force):
+        if result["error"]:
+            failed += 1
+            print(f"{result['source']}: 失败: {result['error']}", file=sys.stderr)
+        elif result["skipped"]:
+            skipped += 1
+            print(f"{result['source']}: 未修改，跳过")
+        else:
+            rendered += 1
+            print(f"{result['source']}: {result['items']} 项 -> {result['output']}, "
+                  f"{result['seconds']:.2f} 秒")
+    
+    print(f"完成: 生成 {rendered} 份, 跳过 {skipped} 份, 失败 {failed} 份, "
+          f"耗时 {time.perf_counter() - start:.2f} 秒")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,387 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+产品目录存储模块
+以列式结构保存型号和价格，适用于数十万型号的大型价格表
+"""
+
+import math
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+from itertools import islice
+
+
+# 已删除的行超过该数量且超过总行数一半时，压缩列数据
+COMPACT_MIN_DELETED = 64
+
+
+def parse_price(price):
+    """
+    将价格转换为浮点数，所有添加型号和修改价格的入口共用同一规则
+    
+    Args:
+        price: 价格，可以是数字或数字字符串
+        
+    Returns:
+        float: 价格，不是数字或不是有限的非负数时抛出 ValueError
+    """
+    try:
+        price = float(price)
+    except (TypeError, ValueError):
+        raise ValueError("价格不是有效的数字") from None
+    if not math.isfinite(price) or price < 0:
+        raise ValueError("价格必须是非负数")
+    return price
+
+
+class ModelColumns:
+    """单个种类的列式型号存储：驻留的型号字符串列 + 连续的价格数组"""
+    
+    __slots__ = ("names", "prices", "rows", "deleted", "version")
+    
+    def __init__(self):
+        """初始化空的型号列"""
+        self.names = []  # 型号列，已删除的行为None
+        self.prices = array("d")  # 价格列
+        self.rows = {}  # 型号 -> 行号
+        self.deleted = 0  # 已删除的行数
+        self.version = 0  # 行布局版本，增删型号或压缩后加一
+    
+    @classmethod
+    def from_columns(cls, names, prices):
+        """
+        由已有的型号列和价格列创建型号存储
+        
+        Args:
+            names (list): 型号列表，型号不能重复
+            prices (array): 与型号一一对应的价格数组
+            
+        Returns:
+            ModelColumns: 型号存储
+        """
+        columns = cls()
+        columns.names = names
+        columns.prices = prices
+        columns.rows = dict(zip(names, range(len(names))))
+        if len(columns.rows) != len(names) or len(prices) != len(names):
+            raise ValueError("型号重复或型号与价格数量不一致")
+        return columns
+    
+    def __len__(self):
+        return len(self.rows)
+    
+    def copy(self):
+        """
+        复制型号存储，副本与原存储互不影响
+        
+        Returns:
+            ModelColumns: 型号存储副本
+        """
+        columns = ModelColumns()
+        columns.names = list(self.names)
+        columns.prices = array("d", self.prices)
+        columns.rows = dict(self.rows)
+        columns.deleted = self.deleted
+        return columns
+    
+    def add(self, model, price):
+        """
+        添加型号
+        
+        Args:
+            model (str): 型号
+            price (float): 价格
+            
+        Returns:
+            bool: 是否添加成功，型号已存在时返回False，价格无效时抛出 ValueError
+        """
+        model = sys.intern(str(model))
+        if model in self.rows:
+            return False
+        # 先检查价格，价格无效时抛出异常且不修改型号列
+        price = parse_price(price)
+        self.rows[model] = len(self.names)
+        self.names.append(model)
+        self.prices.append(price)
+        self.version += 1
+        return True
+    
+    def remove(self, model):
+        """
+        删除型号，只标记删除，必要时压缩
+        
+        Args:
+            model (str): 型号
+            
+        Returns:
+            bool: 是否删除成功
+        """
+        row = self.rows.pop(model, None)
+        if row is None:
+            return False
+        self.names[row] = None
+        self.deleted += 1
+        self.version += 1
+        if self.deleted >= COMPACT_MIN_DELETED and self.deleted * 2 >= len(self.names):
+            self.compact()
+        return True
+    
+    def set_price(self, model, price):
+        """
+        修改型号价格
+        
+        Args:
+            model (str): 型号
+            price (float): 新价格
+            
+        Returns:
+            bool: 是否修改成功，型号不存在时返回False，价格无效时抛出 ValueError
+        """
+        row = self.rows.get(model)
+        if row is None:
+            return False
+        self.prices[row] = parse_price(price)
+        return True
+    
+    def price(self, model):
+        """
+        获取型号价格
+        
+        Args:
+            model (str): 型号
+            
+        Returns:
+            float: 价格，型号不存在时返回None
+        """
+        row = self.rows.get(model)
+        if row is None:
+            return None
+        return self.prices[row]
+    
+    def models(self, limit=None):
+        """
+        获取型号列表
+        
+        Args:
+            limit (int): 最多返回的型号数，为None时返回全部型号
+            
+        Returns:
+            list: 按添加顺序排列的型号列表
+        """
+        if self.deleted:
+            return list(islice((name for name in self.names if name is not None), limit))
+        return self.names[:limit]
+    
+    def items(self):
+        """
+        遍历型号和价格
+        
+        Yields:
+            tuple: (型号, 价格)
+        """
+        for name, price in zip(self.names, self.prices):
+            if name is not None:
+                yield name, price
+    
+    def compact(self):
+        """清除已删除的行并重建行号索引"""
+        if not self.deleted:
+            return
+        names = []
+        prices = array("d")
+        for name, price in zip(self.names, self.prices):
+            if name is not None:
+                names.append(name)
+                prices.append(price)
+        self.names = names
+        self.prices = prices
+        self.rows = {name: row for row, name in enumerate(names)}
+        self.deleted = 0
+        self.version += 1
+
+
+class ProductCatalog:
+    """某一类产品(球体或法兰)的目录：种类列表和每个种类的型号列"""
+    
+    def __init__(self):
+        """初始化空目录"""
+        self.types = []  # 种类列表
+        self.columns = {}  # 种类 -> ModelColumns
+    
+    def retain_types(self, types):
+        """
+        按给定的种类列表整理目录
+        
+        种类按列表顺序排列，列表中没有型号的种类创建为空种类，
+        不在列表中的种类及其型号被丢弃。
+        
+        Args:
+            types (list): 种类列表
+        """
+        columns = {}
+        for product_type in types:
+            if product_type and product_type not in columns:
+                existing = self.columns.get(product_type)
+                columns[product_type] = existing if existing is not None else ModelColumns()
+        self.types = list(columns)
+        self.columns = columns
+    
+    def add_type(self, product_type):
+        """添加种类，已存在时返回False"""
+        if not product_type or product_type in self.columns:
+            return False
+        self.types.append(product_type)
+        self.columns[product_type] = ModelColumns()
+        return True
+    
+    def delete_type(self, product_type):
+        """删除种类及其全部型号，不存在时返回False"""
+        if product_type not in self.columns:
+            return False
+        self.types.remove(product_type)
+        del self.columns[product_type]
+        return True
+    
+    def add_model(self, product_type, model, price):
+        """添加型号，种类不存在或型号已存在时返回False"""
+        columns = self.columns.get(product_type)
+        if columns is None or not model:
+            return False
+        return columns.add(model, price)
+    
+    def delete_model(self, product_type, model):
+        """删除型号，不存在时返回False"""
+        columns = self.columns.get(product_type)
+        if columns is None:
+            return False
+        return columns.remove(model)
+    
+    def set_price(self, product_type, model, price):
+        """修改型号价格，不存在时返回False"""
+        columns = self.columns.get(product_type)
+        if columns is None:
+            return False
+        return columns.set_price(model, price)
+    
+    def get_price(self, product_type, model):
+        """获取型号价格，不存在时返回0.0"""
+        columns = self.columns.get(product_type)
+        if columns is not None:
+            price = columns.price(model)
+            if price is not None:
+                return price
+        return 0.0
+    
+    def has_model(self, product_type, model):
+        """检查型号是否存在"""
+        columns = self.columns.get(product_type)
+        return columns is not None and model in columns.rows
+    
+    def get_models(self, product_type, limit=None):
+        """获取指定种类的型号列表，limit 为最多返回的型号数"""
+        columns = self.columns.get(product_type)
+        if columns is None:
+            return []
+        return columns.models(limit)
+    
+    def copy(self):
+        """
+        复制目录，用于在其他线程中读取目录快照
+        
+        Returns:
+            ProductCatalog: 目录副本
+        """
+        catalog = ProductCatalog()
+        catalog.types = list(self.types)
+        catalog.columns = {product_type: columns.copy()
+                           for product_type, columns in self.columns.items()}
+        return catalog
+    
+    def compact(self):
+        """压缩所有种类的型号列"""
+        for columns in self.columns.values():
+            columns.compact()
+    
+    def to_dict(self):
+        """
+        转换为JSON结构
+        
+        Returns:
+            dict: 种类 -> [{"model": 型号, "price": 价格}] 的映射
+        """
+        return {
+            product_type: [{"model": model, "price": price}
+                           for model, price in self.columns[product_type].items()]
+            for product_type in self.types
+        }
+
+
+class ModelListView(Sequence):
+    """
+    单个种类的型号只读视图，按需生成 {"model": 型号, "price": 价格} 记录
+    
+    读取时不修改型号列：有已删除的行时，通过缓存的未删除行号把序号映射到物理行。
+    """
+    
+    def __init__(self, columns):
+        self._columns = columns
+        self._version = None  # 行号缓存对应的行布局版本
+        self._live_rows = None  # 未删除行的物理行号
+    
+    def __len__(self):
+        return len(self._columns)
+    
+    def _rows(self):
+        """
+        获取序号到物理行号的映射
+        
+        Returns:
+            array: 未删除行的物理行号，没有已删除的行时返回None
+        """
+        columns = self._columns
+        if not columns.deleted:
+            return None
+        if self._version != columns.version:
+            self._live_rows = array("I", (row for row, name in enumerate(columns.names) if name is not None))
+            self._version = columns.version
+        return self._live_rows
+    
+    def __getitem__(self, index):
+        names = self._columns.names
+        prices = self._columns.prices
+        rows = self._rows()
+        if isinstance(index, slice):
+            if rows is None:
+                return [{"model": model, "price": price} for model, price in zip(names[index], prices[index])]
+            return [{"model": names[row], "price": prices[row]} for row in rows[index]]
+        if rows is not None:
+            index = rows[index]
+        return {"model": names[index], "price": prices[index]}
+    
+    def __iter__(self):
+        for model, price in self._columns.items():
+            yield {"model": model, "price": price}
+    
+    def __repr__(self):
+        return repr(list(self))
+
+
+class CatalogModelsView(Mapping):
+    """目录型号信息只读视图，结构与原来的 种类 -> 型号记录列表 映射一致"""
+    
+    def __init__(self, catalog):
+        self._catalog = catalog
+    
+    def __getitem__(self, product_type):
+        return ModelListView(self._catalog.columns[product_type])
+    
+    def __contains__(self, product_type):
+        return product_type in self._catalog.columns
+    
+    def __iter__(self):
+        return iter(list(self._catalog.types))
+    
+    def __len__(self):
+        return len(self._catalog.types)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+产品数据写入模块
+在专用的写入线程中按提交顺序写入快照和变更日志，界面线程只提交内存中的快照副本和变更记录，
+不等待磁盘。线程忙于写入期间提交的快照只保留最新的一份，变更记录合并为一次追加。
+"""
+
+import atexit
+import threading
+
+
+class CatalogWriter:
+    """产品数据写入线程，第一次提交写入时启动"""
+    
+    def __init__(self, write_snapshot, append_records):
+        """
+        初始化写入线程
+        
+        Args:
+            write_snapshot (callable): write_snapshot(snapshot)，写入完整快照并删除已被快照包含的变更日志
+            append_records (callable): append_records(records)，追加变更记录，返回变更日志的大小(字节)
+        """
+        self._write_snapshot = write_snapshot
+        self._append_records = append_records
+        self._condition = threading.Condition()
+        self._thread = None
+        
+        # 待写入的快照和快照之后的变更记录
+        self._snapshot = None
+        self._records = []
+        
+        # 已提交和已写入的写入请求序号，用于 flush() 等待
+        self._submitted = 0
+        self._written = 0
+        
+        # 变更日志的大小(字节)，供判断是否需要压缩
+        self.journal_size = 0
+        
+        # 最近的写入是否失败，失败后磁盘上的数据可能缺少部分修改，需要重新保存完整快照
+        self.failed = False
+    
+    def submit_snapshot(self, snapshot):
+        """
+        提交完整快照，快照已包含之前提交的全部变更记录
+        
+        Args:
+            snapshot: 传给 write_snapshot 的快照，提交后不能再修改
+        """
+        with self._condition:
+            self._snapshot = snapshot
+            self._records = []
+            self.journal_size = 0
+            self._submit()
+    
+    def submit_records(self, records):
+        """
+        提交变更记录
+        
+        Args:
+            records (list): 变更记录列表，提交后不能再修改
+        """
+        with self._condition:
+            self._records.extend(records)
+            self._submit()
+    
+    def _submit(self):
+        """记录新的写入请求并唤醒写入线程，调用时已持有锁"""
+        self._submitted += 1
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="CatalogWriter", daemon=True)
+            self._thread.start()
+            # 写入线程是守护线程，进程退出前先等待已提交的写入完成
+            atexit.register(self.flush)
+        self._condition.notify_all()
+    
+    def flush(self, timeout=None):
+        """
+        等待已提交的写入全部完成
+        
+        Args:
+            timeout (float): 最长等待时间(秒)，为None时一直等待
+            
+        Returns:
+            bool: 写入是否全部成功，超时时返回False
+        """
+        with self._condition:
+            target = self._submitted
+            if not self._condition.wait_for(lambda: self._written >= target, timeout):
+                return False
+            return not self.failed
+    
+    def _run(self):
+        """写入线程：每次取出当前全部待写入的内容，先写快照再追加快照之后的变更记录"""
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._snapshot is not None or self._records)
+                snapshot, records = self._snapshot, self._records
+                self._snapshot, self._records = None, []
+                target = self._submitted
+                failed = self.failed
+            
+            journal_size = None
+            try:
+                if snapshot is not None:
+                    self._write_snapshot(snapshot)
+                    failed = False
+                if records:
+                    journal_size = self._append_records(records)
+            except Exception as e:
+                print(f"写入产品数据失败: {e}")
+                failed = True
+            
+            with self._condition:
+                # 写入期间又提交了快照时，新快照会替换变更日志，保留 submit_snapshot 清零的大小
+                if journal_size is not None and self._snapshot is None:
+                    self.journal_size = journal_size
+                self.failed = failed
+                self._written = target
+                self._condition.notify_all()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+增量JSON读取模块
+按元素逐个读取产品目录和报价单文件中的大型数组，内存占用与文件大小无关
+"""
+
+import json
+import re
+
+
+# 每次从文件读取的字符数
+CHUNK_SIZE = 64 * 1024
+
+# 单个元素允许的最大字符数，超过时视为格式错误，避免把整个文件读入内存
+MAX_ELEMENT_SIZE = 64 * 1024 * 1024
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+DELIMITERS = " \t\n\r,:]}"
+
+
+class JSONStreamError(ValueError):
+    """JSON格式或数据结构错误"""
+
+
+class JSONStreamReader:
+    """增量JSON读取器，只缓冲当前正在解析的元素"""
+    
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        """
+        初始化读取器
+        
+        Args:
+            f: 以文本模式打开的文件对象
+            chunk_size (int): 每次读取的字符数
+        """
+        self._file = f
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._pos = 0
+        self._consumed = 0  # 已丢弃的字符数，用于报告错误位置
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+    
+    @property
+    def offset(self):
+        """当前读取位置(字符)"""
+        return self._consumed + self._pos
+    
+    def _fill(self):
+        """
+        读取更多数据到缓冲区，已解析的部分被丢弃
+        
+        每次至少读取与未解析部分等长的数据，保证大型元素的解析总开销为线性。
+        
+        Returns:
+            bool: 是否读到了新数据
+        """
+        if self._eof:
+            return False
+        pending = self._buffer[self._pos:]
+        chunk = self._file.read(max(self._chunk_size, len(pending)))
+        if not chunk:
+            self._eof = True
+            return False
+        self._consumed += self._pos
+        self._buffer = pending + chunk
+        self._pos = 0
+        return True
+    
+    def error(self, message):
+        """
+        生成带位置信息的错误
+        
+        Args:
+            message (str): 错误说明
+            
+        Returns:
+            JSONStreamError: 错误对象
+        """
+        return JSONStreamError(f"{message} (位置 {self.offset})")
+    
+    def peek(self):
+        """
+        跳过空白并返回下一个字符
+        
+        Returns:
+            str: 下一个字符，文件结束时返回空字符串
+        """
+        while True:
+            self._pos = WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+    
+    def expect(self, char):
+        """
+        读取指定的结构字符
+        
+        Args:
+            char (str): 期望的字符
+        """
+        if self.peek() != char:
+            raise self.error(f"应为 '{char}'")
+        self._pos += 1
+    
+    def read_value(self):
+        """
+        读取一个完整的JSON值
+        
+        Returns:
+            object: 解析得到的值
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as e:
+                if len(self._buffer) - self._pos < MAX_ELEMENT_SIZE and self._fill():
+                    continue
+                raise self.error(f"JSON格式错误: {e.msg}")
+            # 值之后不是分隔符(例如数字 "1." 被截断)时，需要读取更多数据确认
+            if (end == len(self._buffer) or self._buffer[end] not in DELIMITERS) and self._fill():
+                continue
+            self._pos = end
+            return value
+    
+    def iter_object(self):
+        """
+        逐个产生对象的键，调用方需在下一次迭代前读取该键对应的值
+        
+        Yields:
+            str: 对象的键
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        while True:
+            if self.peek() != '"':
+                raise self.error("对象的键必须是字符串")
+            key = self.read_value()
+            self.expect(":")
+            yield key
+            char = self.peek()
+            self._pos += 1
+            if char == "}":
+                return
+            if char != ",":
+                raise self.error("应为 ',' 或 '}'")
+    
+    def iter_array(self):
+        """
+        逐个产生数组元素的序号，调用方需在下一次迭代前读取该元素
+        
+        Yields:
+            int: 元素序号
+        """
+        self.expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        index = 0
+        while True:
+            yield index
+            index += 1
+            char = self.peek()
+            self._pos += 1
+            if char == "]":
+                return
+            if char != ",":
+                raise self.error("应为 ',' 或 ']'")
+
+
+class JSONDocumentStream:
+    """
+    遍历顶层JSON对象的读取器
+    
+    streamed 中指定的键按元素逐个产生：深度1表示值为数组，
+    深度2表示值为 键 -> 数组 的对象。其他键的值整体产生。
+    """
+    
+    def __init__(self, f, streamed):
+        """
+        初始化文档读取器
+        
+        Args:
+            f: 以文本模式打开的文件对象
+            streamed (dict): 键 -> 深度(1或2)
+        """
+        self.reader = JSONStreamReader(f)
+        self.streamed = streamed
+        self.keys = set()  # 已读取的顶层键
+    
+    def __iter__(self):
+        """
+        Yields:
+            tuple: (顶层键, 子键, 值)，非深度2的键子键为None
+        """
+        reader = self.reader
+        if reader.peek() != "{":
+            raise reader.error("文件内容必须是JSON对象")
+        for key in reader.iter_object():
+            self.keys.add(key)
+            depth = self.streamed.get(key)
+            if depth == 1:
+                for _ in reader.iter_array():
+                    yield key, None, reader.read_value()
+            elif depth == 2:
+                for sub_key in reader.iter_object():
+                    for _ in reader.iter_array():
+                        yield key, sub_key, reader.read_value()
+            else:
+                yield key, None, reader.read_value()
+        if reader.peek() != "":
+            raise reader.error("JSON对象之后存在多余内容")
@@ -8,12 +8,17 @@
 
 import sys
 import os
+import argparse
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QTabWidget,
                             QWidget, QVBoxLayout, QMessageBox, QDesktopWidget)
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QIcon, QFont
 
+from model_search import ModelSearchIndex
 from models import ProductDataModel, QuotationModel
+from quotation_archive import QuotationArchive
+from repricing import QuotationRepricer
+from sqlite_storage import SQLiteProductDataModel
 from product_manager import ProductManagerWidget
 from quotation_calculator import QuotationCalculatorWidget
 
@@ -21,13 +26,26 @@ from quotation_calculator import QuotationCalculatorWidget
 class MainWindow(QMainWindow):
     """主窗口类"""
     
-    def __init__(self):
-        """初始化主窗口"""
+    def __init__(self, storage="json"):
+        """
+        初始化主窗口
+        
+        Args:
+            storage (str): 产品数据存储方式，"json" 或 "sqlite"
+        """
         super().__init__()
         
         # 初始化数据模型
-        self.product_model = ProductDataModel()
+        if storage == "sqlite":
+            self.product_model = SQLiteProductDataModel()
+        else:
+            self.product_model = ProductDataModel()
         self.quotation_model = QuotationModel(self.product_model)
+        # 型号搜索索引由产品管理和报价计算界面共用
+        self.search_index = ModelSearchIndex(self.product_model)
+        self.quotation_archive = QuotationArchive()
+        # 产品调价后同步到当前报价单和报价单存档
+        self.repricer = QuotationRepricer(self.product_model, [self.quotation_model], self.quotation_archive)
         
         # 设置窗口属性
         self.setWindowTitle("橡胶接头报价工具")
@@ -55,11 +73,12 @@ class MainWindow(QMainWindow):
         tab_widget = QTabWidget()
         
         # 创建产品管理标签页
-        product_manager = ProductManagerWidget(self.product_model)
+        product_manager = ProductManagerWidget(self.product_model, self.search_index, self.repricer)
         tab_widget.addTab(product_manager, "产品管理")
         
         # 创建报价计算标签页
-        quotation_calculator = QuotationCalculatorWidget(self.product_model, self.quotation_model)
+        quotation_calculator = QuotationCalculatorWidget(self.product_model, self.quotation_model,
+                                                         self.search_index, self.quotation_archive)
         tab_widget.addTab(quotation_calculator, "报价计算")
         
         # 标签页切换事件
@@ -104,15 +123,26 @@ class MainWindow(QMainWindow):
         Args:
             event: 关闭事件对象
         """
-        # 在关闭窗口时保存数据
+        # 等待后台报价单生成线程结束，未完成的报价单不会保留
+        self.quotation_calculator.cancel_pdf_generation()
+        
+        # 在关闭窗口时保存完整快照，并等待写入线程把所有修改写入磁盘
         self.product_model.save_data()
+        self.product_model.flush()
+        self.quotation_archive.close()
         event.accept()
 
 
 def main():
     """主函数"""
+    # 解析命令行参数，其余参数交给Qt处理
+    parser = argparse.ArgumentParser(description="橡胶接头报价工具")
+    parser.add_argument("--storage", choices=["json", "sqlite"], default="json",
+                        help="产品数据存储方式 (默认: json)")
+    args, qt_args = parser.parse_known_args()
+    
     # 创建应用程序
-    app = QApplication(sys.argv)
+    app = QApplication(sys.argv[:1] + qt_args)
     
     # 设置应用程序样式
     app.setStyle("Fusion")
@@ -123,7 +153,7 @@ def main():
     app.setFont(font)
     
     # 创建主窗口
-    window = MainWindow()
+    window = MainWindow(storage=args.storage)
     window.show()
     
     # 运行应用程序事件循环
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+型号自动补全模块
+输入型号时从型号搜索索引中查找匹配的型号并在下拉列表中显示，
+只显示有限数量的候选型号，不把整个种类的型号放入补全列表
+"""
+
+from PyQt5.QtWidgets import QComboBox, QCompleter
+from PyQt5.QtCore import QStringListModel, Qt
+
+from model_search import SEARCH_LIMIT
+
+
+class ModelCompleter(QCompleter):
+    """根据输入内容查询 ModelSearchIndex 的型号补全器"""
+    
+    def __init__(self, search_index, kind, type_getter, widget, limit=SEARCH_LIMIT):
+        """
+        初始化型号补全器并安装到输入控件
+        
+        Args:
+            search_index (ModelSearchIndex): 型号搜索索引
+            kind (str): 产品类别，"sphere" 或 "flange"
+            type_getter (callable): 返回当前种类名称的函数
+            widget (QLineEdit | QComboBox): 输入型号的控件，下拉框必须可编辑
+            limit (int): 最多显示的候选型号数
+        """
+        super().__init__(widget)
+        self.search_index = search_index
+        self.kind = kind
+        self.type_getter = type_getter
+        self.limit = limit
+        self.setModel(QStringListModel(self))
+        # 候选型号已由搜索索引筛选，补全器不再按前缀过滤
+        self.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.setCaseSensitivity(Qt.CaseInsensitive)
+        self.setMaxVisibleItems(15)
+        
+        line_edit = widget.lineEdit() if isinstance(widget, QComboBox) else widget
+        widget.setCompleter(self)
+        line_edit.textEdited.connect(self.update_completions)
+    
+    def update_completions(self, text):
+        """
+        按输入内容更新候选型号
+        
+        Args:
+            text (str): 当前输入内容
+        """
+        text = text.strip()
+        models = self.search_index.search(self.kind, self.type_getter(), text, self.limit) if text else []
+        self.model().setStringList(models)
+        if models:
+            self.complete()
+        else:
+            self.popup().hide()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+型号搜索模块
+为每个种类的型号建立前缀和三元组(n-gram)索引，按输入内容快速查找型号，
+产品数据修改后增量更新
+"""
+
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from heapq import merge
+
+
+# 每次搜索最多返回的型号数
+SEARCH_LIMIT = 50
+
+# 子串索引使用的字符数
+GRAM_SIZE = 3
+
+# 增量修改累计超过该数量时重建种类索引
+REBUILD_THRESHOLD = 1000
+
+
+class TypeModelIndex:
+    """
+    单个种类的型号索引
+    
+    型号按忽略大小写的键排序保存，前缀查询用二分查找；
+    每个三元组对应包含它的行号数组，子串查询只检查最少的一个三元组对应的行；
+    不足三个字符的查询通过排序的三元组后缀二分查找包含它的三元组，合并这些三元组的行号，
+    不逐个检查三元组或型号。
+    建立索引之后添加和删除的型号单独记录，累计过多时重建。
+    """
+    
+    __slots__ = ("keys", "names", "grams", "suffixes", "suffix_grams", "short_rows", "added", "removed")
+    
+    def __init__(self, models):
+        """
+        建立索引
+        
+        Args:
+            models (iterable): 型号列表
+        """
+        entries = sorted((name.casefold(), name) for name in models)
+        self.keys = [key for key, _ in entries]
+        self.names = [name for _, name in entries]
+        self.grams = defaultdict(lambda: array("I"))
+        for row, key in enumerate(self.keys):
+            for gram in {key[i:i + GRAM_SIZE] for i in range(len(key) - GRAM_SIZE + 1)}:
+                self.grams[gram].append(row)
+        self.grams.default_factory = None
+        # 三元组的全部后缀及其所属的三元组，按后缀排序；短查询内容是某个三元组的子串时，
+        # 必定是该三元组某个后缀的前缀
+        suffixes = sorted((gram[i:], gram) for gram in self.grams for i in range(GRAM_SIZE))
+        self.suffixes = [suffix for suffix, _ in suffixes]
+        self.suffix_grams = [gram for _, gram in suffixes]
+        # 不足三个字符的型号没有三元组，单独记录
+        self.short_rows = array("I", (row for row, key in enumerate(self.keys) if len(key) < GRAM_SIZE))
+        self.added = {}  # 建立索引后添加的型号：型号 -> 键
+        self.removed = set()  # 建立索引后删除的型号
+    
+    @property
+    def pending(self):
+        """建立索引后累计的修改数"""
+        return len(self.added) + len(self.removed)
+    
+    def add(self, model):
+        """记录新添加的型号"""
+        if model in self.removed:
+            # 删除后重新添加的型号仍在索引中
+            self.removed.discard(model)
+        else:
+            self.added[model] = model.casefold()
+    
+    def remove(self, model):
+        """记录删除的型号"""
+        if self.added.pop(model, None) is None:
+            self.removed.add(model)
+    
+    def _candidates(self, query):
+        """
+        按行号顺序产生可能包含查询内容的行
+        
+        Args:
+            query (str): 忽略大小写的查询内容
+            
+        Yields:
+            int: 行号
+        """
+        if len(query) < GRAM_SIZE:
+            # 长度不足三元组的查询内容必定出现在某个三元组中，或者出现在不足三个字符的型号中；
+            # 以查询内容开头的后缀在排序后连续排列，找出这些三元组后按行号顺序合并行号数组并去重
+            grams = set()
+            position = bisect_left(self.suffixes, query)
+            while position < len(self.suffixes) and self.suffixes[position].startswith(query):
+                grams.add(self.suffix_grams[position])
+                position += 1
+            postings = [self.grams[gram] for gram in grams]
+            postings.append(self.short_rows)
+            previous = None
+            for row in merge(*postings):
+                if row != previous:
+                    previous = row
+                    yield row
+            return
+        postings = []
+        for i in range(len(query) - GRAM_SIZE + 1):
+            rows = self.grams.get(query[i:i + GRAM_SIZE])
+            if rows is None:
+                return
+            postings.append(rows)
+        yield from min(postings, key=len)
+    
+    def search(self, text, limit=SEARCH_LIMIT):
+        """
+        查找型号，以输入内容开头的型号排在前面，其次是包含输入内容的型号
+        
+        Args:
+            text (str): 输入内容，为空时返回排在最前面的型号
+            limit (int): 最多返回的型号数
+            
+        Returns:
+            list: 型号列表
+        """
+        query = text.casefold()
+        keys, names, removed = self.keys, self.names, self.removed
+        results = []
+        
+        # 以输入内容开头的型号在排序后的键中连续排列
+        row = bisect_left(keys, query)
+        while row < len(keys) and len(results) < limit and keys[row].startswith(query):
+            if names[row] not in removed:
+                results.append(names[row])
+            row += 1
+        
+        if len(results) < limit and query:
+            for row in self._candidates(query):
+                key = keys[row]
+                if query in key and not key.startswith(query) and names[row] not in removed:
+                    results.append(names[row])
+                    if len(results) >= limit:
+                        break
+        
+        # 建立索引后添加的型号数量较少，直接逐个检查
+        if self.added and len(results) < limit:
+            extra = sorted((not key.startswith(query), key, name)
+                           for name, key in self.added.items() if query in key)
+            results.extend(name for _, _, name in extra[:limit - len(results)])
+        return results
+
+
+class ModelSearchIndex:
+    """
+    球体和法兰型号搜索索引
+    
+    种类索引在第一次搜索时建立，之后根据产品数据模型的变更通知增量更新。
+    """
+    
+    def __init__(self, product_model):
+        """
+        初始化搜索索引并注册产品数据变更通知
+        
+        Args:
+            product_model (ProductDataModel): 产品数据模型实例
+        """
+        self.product_model = product_model
+        self._indexes = {}  # (类别, 种类) -> TypeModelIndex
+        product_model.add_listener(self.on_catalog_changed)
+    
+    def on_catalog_changed(self, record):
+        """
+        产品数据变更通知
+        
+        Args:
+            record (dict): 变更记录，为None时丢弃全部索引
+        """
+        if record is None:
+            self._indexes.clear()
+            return
+        key = (record["kind"], record["type"])
+        index = self._indexes.get(key)
+        if index is None:
+            return
+        op = record["op"]
+        if op in ("addType", "deleteType"):
+            del self._indexes[key]
+        elif op == "addModel":
+            index.add(record["model"])
+        elif op == "deleteModel":
+            index.remove(record["model"])
+    
+    def _get_index(self, kind, product_type):
+        """获取种类索引，不存在或累计修改过多时重新建立"""
+        key = (kind, product_type)
+        index = self._indexes.get(key)
+        if index is None or index.pending > REBUILD_THRESHOLD:
+            if kind == "sphere":
+                models = self.product_model.get_sphere_models_by_type(product_type)
+            else:
+                models = self.product_model.get_flange_models_by_type(product_type)
+            index = self._indexes[key] = TypeModelIndex(models)
+        return index
+    
+    def search(self, kind, product_type, text, limit=SEARCH_LIMIT):
+        """
+        查找指定种类中与输入内容匹配的型号(忽略大小写)
+        
+        Args:
+            kind (str): 产品类别，"sphere" 或 "flange"
+            product_type (str): 种类名称
+            text (str): 输入内容
+            limit (int): 最多返回的型号数
+            
+        Returns:
+            list: 以输入内容开头的型号在前、包含输入内容的型号在后的型号列表
+        """
+        if not product_type:
+            return []
+        return self._get_index(kind, product_type).search(text, limit)
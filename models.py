@@ -6,26 +6,339 @@
 包含球体、法兰和报价单数据模型的定义
 """
 
+import csv
+import io
 import json
 import os
+import time
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from itertools import repeat
+from operator import add, mul, truediv
+from types import MappingProxyType
+
+import binary_snapshot
+from catalog import CatalogModelsView, ProductCatalog, parse_price
+from catalog_writer import CatalogWriter
+from json_stream import JSONDocumentStream
+
+
+# 产品数据快照文件和变更日志文件
+DATA_FILE = os.path.join("data", "product_data.json")
+JOURNAL_FILE = os.path.join("data", "product_data.journal")
+
+# 与快照文件对应的二进制快照，启动时优先读取
+BINARY_FILE = os.path.join("data", "product_data.bin")
+
+# 变更日志超过该大小(字节)或距上次压缩超过该时间(秒)时，合并到快照文件
+JOURNAL_COMPACT_SIZE = 1024 * 1024
+JOURNAL_COMPACT_INTERVAL = 10 * 60
+
+
+# 产品数据文件必须包含的键，以及报价项目必须包含的字段
+CATALOG_KEYS = ("sphereTypes", "sphereModels", "flangeTypes", "flangeModels")
+QUOTATION_ITEM_KEYS = ("sphereType", "sphereModel", "flangeType", "flangeModel",
+                       "flangeQuantity", "jointQuantity", "spherePrice", "flangePrice",
+                       "jointPrice", "totalPrice")
+
+# 报价单(PDF、HTML和文本)中报价项目表格的表头
+TABLE_HEADERS = ["序号", "球体信息", "法兰信息", "法兰数量", "接头数量", "单价(元)", "小计(元)"]
+
+# 报价请求(批量报价、报价服务)中每个项目必须包含的字段
+REQUEST_ITEM_KEYS = ("sphereType", "sphereModel", "flangeType", "flangeModel",
+                     "flangeQuantity", "jointQuantity")
+
+# CSV价格表支持的列名和产品类别名称
+CSV_COLUMNS = {
+    "kind": ("kind", "类别"),
+    "type": ("type", "种类"),
+    "model": ("model", "型号"),
+    "price": ("price", "价格"),
+}
+CSV_KINDS = {"sphere": "sphere", "球体": "sphere", "flange": "flange", "法兰": "flange"}
+
+# CSV导入时每处理多少行报告一次进度，最多记录多少条错误信息
+CSV_PROGRESS_INTERVAL = 1000
+CSV_MAX_ERRORS = 100
+
+# 接头价格缓存最多保存的配置数
+JOINT_PRICE_CACHE_SIZE = 4096
+
+
+def to_cents(amount):
+    """
+    将以元为单位的金额转换为整数分，按四舍五入处理
+    
+    Args:
+        amount (float): 金额(元)
+        
+    Returns:
+        int: 金额(分)，金额是NaN或无穷大时抛出 ValueError
+    """
+    amount = Decimal(str(amount))
+    if not amount.is_finite():
+        raise ValueError(f"金额必须是有限的数字: {amount}")
+    return int((amount * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def parse_quantity(value, name):
+    """
+    将报价请求中的数量转换为正整数
+    
+    Args:
+        value: 数量，可以是整数或数字字符串
+        name (str): 字段名称，用于错误信息
+        
+    Returns:
+        int: 数量，不是正整数时抛出 ValueError
+    """
+    if not isinstance(value, bool):
+        try:
+            quantity = int(value)
+            if quantity > 0 and quantity == float(value):
+                return quantity
+        except (TypeError, ValueError, OverflowError):
+            pass
+    raise ValueError(f"{name} 必须是正整数")
+
+
+def find_quotation_files(paths, recursive=False):
+    """
+    查找报价单文件
+    
+    目录中以 "." 开头的文件(例如生成清单)不是报价单，会被跳过。
+    
+    Args:
+        paths (list): 报价单文件或目录路径，目录中的所有JSON文件都会被处理
+        recursive (bool): 是否同时查找子目录
+        
+    Returns:
+        list: 报价单文件路径列表，同一目录中的文件按名称排列
+    """
+    files = []
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+        for directory, subdirectories, names in os.walk(path):
+            subdirectories.sort()
+            files.extend(
+                os.path.join(directory, name)
+                for name in sorted(names)
+                if name.lower().endswith(".json") and not name.startswith(".")
+            )
+            if not recursive:
+                break
+    return files
+
+
+def read_quotation_file(file_path):
+    """
+    读取 QuotationModel.save_quotation 保存的报价单文件
+    
+    报价项目逐项读取并验证，格式错误时立即抛出异常。
+    
+    Args:
+        file_path (str): 报价单文件路径
+        
+    Returns:
+        tuple: (报价项目列表, 总价(分))，文件格式错误时抛出 ValueError
+    """
+    items, total_cents, _ = read_quotation_document(file_path)
+    return items, total_cents
+
+
+def read_quotation_document(file_path):
+    """
+    读取报价单文件中的报价项目和保存时间
+    
+    Args:
+        file_path (str): 报价单文件路径
+        
+    Returns:
+        tuple: (报价项目列表, 总价(分), 保存时间字符串)，文件中没有保存时间时为None，
+            文件格式错误时抛出 ValueError
+    """
+    items = []
+    total_cents = 0
+    save_date = None
+    with open(file_path, "r", encoding="utf-8") as f:
+        document = JSONDocumentStream(f, {"quotationItems": 1})
+        for key, _, value in document:
+            if key == "quotationItems":
+                if not isinstance(value, dict) or not all(k in value for k in QUOTATION_ITEM_KEYS):
+                    raise document.reader.error("报价项目格式错误")
+                items.append(value)
+                total_cents += to_cents(value["totalPrice"])
+            elif key == "saveDate" and isinstance(value, str):
+                save_date = value
+    
+    if "quotationItems" not in document.keys:
+        raise ValueError("报价单文件缺少 quotationItems")
+    return items, total_cents, save_date
 
 
 class ProductDataModel:
     """产品数据模型类，管理球体和法兰信息"""
     
-    def __init__(self):
-        """初始化产品数据模型"""
-        # 球体数据结构
-        self.sphere_types = []  # 球体种类列表
-        self.sphere_models = {}  # 球体型号和价格信息
+    def __init__(self, load=True):
+        """
+        初始化产品数据模型
+        
+        Args:
+            load (bool): 是否加载保存的数据，使用其他存储方式的子类传入False
+        """
+        # 球体和法兰目录，以列式结构保存型号和价格
+        self._spheres = ProductCatalog()
+        self._flanges = ProductCatalog()
+        
+        # 批量编辑状态：嵌套深度、待写入的变更记录和是否需要完整保存
+        self._batch_depth = 0
+        self._pending_records = []
+        self._snapshot_pending = False
+        
+        # 变更日志状态和后台写入线程
+        self._replaying = False
+        self._writer = CatalogWriter(self._write_snapshot, self._write_journal)
+        self._last_compact_time = time.monotonic()
         
-        # 法兰数据结构
-        self.flange_types = []  # 法兰种类列表
-        self.flange_models = {}  # 法兰型号和价格信息
+        # 修改计数：每次修改递增，记录每个种类最近一次修改时的计数，供价格缓存判断是否失效
+        self.generation = 0
+        self._reset_generation = 0
+        self._type_generations = {}
+        
+        # 产品数据变更通知回调
+        self._listeners = []
         
         # 尝试加载保存的数据
-        self.load_data()
+        if load:
+            self.load_data()
+    
+    @property
+    def sphere_types(self):
+        """球体种类列表"""
+        return self._spheres.types
+    
+    @property
+    def flange_types(self):
+        """法兰种类列表"""
+        return self._flanges.types
+    
+    @property
+    def sphere_models(self):
+        """球体型号和价格信息，种类 -> 型号记录列表 的只读视图"""
+        return CatalogModelsView(self._spheres)
+    
+    @property
+    def flange_models(self):
+        """法兰型号和价格信息，种类 -> 型号记录列表 的只读视图"""
+        return CatalogModelsView(self._flanges)
+    
+    @contextmanager
+    def batch(self):
+        """
+        批量编辑模式，期间的修改只在最外层批量结束时保存一次
+        
+        用法:
+            with product_model.batch():
+                product_model.add_sphere_model(...)
+                product_model.delete_flange_model(...)
+                
+        Yields:
+            ProductDataModel: 当前产品数据模型实例
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                records = self._pending_records
+                snapshot = self._snapshot_pending
+                self._pending_records = []
+                self._snapshot_pending = False
+                if snapshot:
+                    self.save_data()
+                elif records:
+                    self._append_journal(records)
+    
+    def _commit(self, record=None):
+        """
+        持久化修改，批量模式下推迟到批量结束时统一写入
+        
+        Args:
+            record (dict): 变更记录，为None时表示需要完整保存
+        """
+        self._bump_generation(record)
+        self._notify(record)
+        if self._replaying:
+            return
+        
+        if self._batch_depth > 0:
+            if record is None:
+                # 完整保存已包含之前的所有变更
+                self._snapshot_pending = True
+                self._pending_records = []
+            elif not self._snapshot_pending:
+                self._pending_records.append(record)
+        elif record is None:
+            self.save_data()
+        else:
+            self._append_journal([record])
+    
+    def _bump_generation(self, record=None):
+        """
+        递增修改计数
+        
+        Args:
+            record (dict): 变更记录，为None时表示整个目录都可能已修改
+        """
+        self.generation += 1
+        if record is None:
+            self._reset_generation = self.generation
+            self._type_generations.clear()
+        else:
+            self._type_generations[(record["kind"], record["type"])] = self.generation
+    
+    def add_listener(self, listener):
+        """
+        注册产品数据变更通知
+        
+        Args:
+            listener (callable): 回调函数，参数为变更记录，整个目录都可能已修改时为None
+        """
+        self._listeners.append(listener)
+    
+    def remove_listener(self, listener):
+        """
+        取消产品数据变更通知
+        
+        Args:
+            listener (callable): 已注册的回调函数
+        """
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def _notify(self, record=None):
+        """通知所有回调产品数据已变更"""
+        for listener in self._listeners:
+            listener(record)
+    
+    def type_generation(self, kind, product_type):
+        """
+        获取种类最近一次修改时的修改计数
+        
+        Args:
+            kind (str): 产品类别，"sphere" 或 "flange"
+            product_type (str): 种类名称
+            
+        Returns:
+            int: 修改计数，大于缓存条目的计数时说明条目已过期
+        """
+        return self._type_generations.get((kind, product_type), self._reset_generation)
     
     def add_sphere_type(self, sphere_type):
         """
@@ -37,10 +350,8 @@ class ProductDataModel:
         Returns:
             bool: 是否添加成功
         """
-        if sphere_type and sphere_type not in self.sphere_types:
-            self.sphere_types.append(sphere_type)
-            self.sphere_models[sphere_type] = []
-            self.save_data()
+        if self._spheres.add_type(sphere_type):
+            self._commit({"op": "addType", "kind": "sphere", "type": sphere_type})
             return True
         return False
     
@@ -56,20 +367,31 @@ class ProductDataModel:
         Returns:
             bool: 是否添加成功
         """
-        if sphere_type in self.sphere_types and model:
-            # 检查是否已存在相同型号
-            for item in self.sphere_models[sphere_type]:
-                if item["model"] == model:
-                    return False
-            
-            self.sphere_models[sphere_type].append({
-                "model": model,
-                "price": float(price)
-            })
-            self.save_data()
+        # 种类不存在或已存在相同型号时添加失败
+        if self._spheres.add_model(sphere_type, model, price):
+            self._commit({"op": "addModel", "kind": "sphere", "type": sphere_type,
+                          "model": model, "price": float(price)})
             return True
         return False
     
+    def add_sphere_models_bulk(self, sphere_type, models):
+        """
+        批量添加球体型号，只保存一次
+        
+        Args:
+            sphere_type (str): 球体种类名称
+            models (iterable): (型号, 价格) 元组序列
+            
+        Returns:
+            int: 成功添加的型号数量
+        """
+        added = 0
+        with self.batch():
+            for model, price in models:
+                if self.add_sphere_model(sphere_type, model, price):
+                    added += 1
+        return added
+    
     def delete_sphere_type(self, sphere_type):
         """
         删除球体种类
@@ -80,11 +402,26 @@ class ProductDataModel:
         Returns:
             bool: 是否删除成功
         """
-        if sphere_type in self.sphere_types:
-            self.sphere_types.remove(sphere_type)
-            if sphere_type in self.sphere_models:
-                del self.sphere_models[sphere_type]
-            self.save_data()
+        if self._spheres.delete_type(sphere_type):
+            self._commit({"op": "deleteType", "kind": "sphere", "type": sphere_type})
+            return True
+        return False
+    
+    def update_sphere_price(self, sphere_type, model, price):
+        """
+        修改球体型号价格
+        
+        Args:
+            sphere_type (str): 球体种类名称
+            model (str): 球体型号
+            price (float): 新价格
+            
+        Returns:
+            bool: 是否修改成功
+        """
+        if self._spheres.set_price(sphere_type, model, price):
+            self._commit({"op": "setPrice", "kind": "sphere", "type": sphere_type,
+                          "model": model, "price": float(price)})
             return True
         return False
     
@@ -99,12 +436,9 @@ class ProductDataModel:
         Returns:
             bool: 是否删除成功
         """
-        if sphere_type in self.sphere_models:
-            for i, item in enumerate(self.sphere_models[sphere_type]):
-                if item["model"] == model:
-                    self.sphere_models[sphere_type].pop(i)
-                    self.save_data()
-                    return True
+        if self._spheres.delete_model(sphere_type, model):
+            self._commit({"op": "deleteModel", "kind": "sphere", "type": sphere_type, "model": model})
+            return True
         return False
     
     def add_flange_type(self, flange_type):
@@ -117,10 +451,8 @@ class ProductDataModel:
         Returns:
             bool: 是否添加成功
         """
-        if flange_type and flange_type not in self.flange_types:
-            self.flange_types.append(flange_type)
-            self.flange_models[flange_type] = []
-            self.save_data()
+        if self._flanges.add_type(flange_type):
+            self._commit({"op": "addType", "kind": "flange", "type": flange_type})
             return True
         return False
     
@@ -136,20 +468,31 @@ class ProductDataModel:
         Returns:
             bool: 是否添加成功
         """
-        if flange_type in self.flange_types and model:
-            # 检查是否已存在相同型号
-            for item in self.flange_models[flange_type]:
-                if item["model"] == model:
-                    return False
-            
-            self.flange_models[flange_type].append({
-                "model": model,
-                "price": float(price)
-            })
-            self.save_data()
+        # 种类不存在或已存在相同型号时添加失败
+        if self._flanges.add_model(flange_type, model, price):
+            self._commit({"op": "addModel", "kind": "flange", "type": flange_type,
+                          "model": model, "price": float(price)})
             return True
         return False
     
+    def add_flange_models_bulk(self, flange_type, models):
+        """
+        批量添加法兰型号，只保存一次
+        
+        Args:
+            flange_type (str): 法兰种类名称
+            models (iterable): (型号, 价格) 元组序列
+            
+        Returns:
+            int: 成功添加的型号数量
+        """
+        added = 0
+        with self.batch():
+            for model, price in models:
+                if self.add_flange_model(flange_type, model, price):
+                    added += 1
+        return added
+    
     def delete_flange_type(self, flange_type):
         """
         删除法兰种类
@@ -160,11 +503,26 @@ class ProductDataModel:
         Returns:
             bool: 是否删除成功
         """
-        if flange_type in self.flange_types:
-            self.flange_types.remove(flange_type)
-            if flange_type in self.flange_models:
-                del self.flange_models[flange_type]
-            self.save_data()
+        if self._flanges.delete_type(flange_type):
+            self._commit({"op": "deleteType", "kind": "flange", "type": flange_type})
+            return True
+        return False
+    
+    def update_flange_price(self, flange_type, model, price):
+        """
+        修改法兰型号价格
+        
+        Args:
+            flange_type (str): 法兰种类名称
+            model (str): 法兰型号
+            price (float): 新价格
+            
+        Returns:
+            bool: 是否修改成功
+        """
+        if self._flanges.set_price(flange_type, model, price):
+            self._commit({"op": "setPrice", "kind": "flange", "type": flange_type,
+                          "model": model, "price": float(price)})
             return True
         return False
     
@@ -179,14 +537,36 @@ class ProductDataModel:
         Returns:
             bool: 是否删除成功
         """
-        if flange_type in self.flange_models:
-            for i, item in enumerate(self.flange_models[flange_type]):
-                if item["model"] == model:
-                    self.flange_models[flange_type].pop(i)
-                    self.save_data()
-                    return True
+        if self._flanges.delete_model(flange_type, model):
+            self._commit({"op": "deleteModel", "kind": "flange", "type": flange_type, "model": model})
+            return True
         return False
     
+    def delete_models_bulk(self, kind, items):
+        """
+        批量删除型号，只保存一次
+        
+        Args:
+            kind (str): 产品类别，"sphere" 或 "flange"
+            items (iterable): (种类, 型号) 元组序列
+            
+        Returns:
+            int: 成功删除的型号数量
+        """
+        if kind == "sphere":
+            delete = self.delete_sphere_model
+        elif kind == "flange":
+            delete = self.delete_flange_model
+        else:
+            raise ValueError(f"未知的产品类别: {kind}")
+        
+        deleted = 0
+        with self.batch():
+            for product_type, model in items:
+                if delete(product_type, model):
+                    deleted += 1
+        return deleted
+    
     def get_sphere_price(self, sphere_type, model):
         """
         获取球体价格
@@ -198,11 +578,7 @@ class ProductDataModel:
         Returns:
             float: 球体价格
         """
-        if sphere_type in self.sphere_models:
-            for item in self.sphere_models[sphere_type]:
-                if item["model"] == model:
-                    return item["price"]
-        return 0.0
+        return self._spheres.get_price(sphere_type, model)
     
     def get_flange_price(self, flange_type, model):
         """
@@ -215,81 +591,386 @@ class ProductDataModel:
         Returns:
             float: 法兰价格
         """
-        if flange_type in self.flange_models:
-            for item in self.flange_models[flange_type]:
-                if item["model"] == model:
-                    return item["price"]
-        return 0.0
+        return self._flanges.get_price(flange_type, model)
+    
+    def has_sphere_model(self, sphere_type, model):
+        """
+        检查球体型号是否存在
+        
+        Args:
+            sphere_type (str): 球体种类名称
+            model (str): 球体型号
+            
+        Returns:
+            bool: 型号是否存在
+        """
+        return self._spheres.has_model(sphere_type, model)
+    
+    def has_flange_model(self, flange_type, model):
+        """
+        检查法兰型号是否存在
+        
+        Args:
+            flange_type (str): 法兰种类名称
+            model (str): 法兰型号
+            
+        Returns:
+            bool: 型号是否存在
+        """
+        return self._flanges.has_model(flange_type, model)
+    
+    def get_sphere_prices(self, sphere_types, models):
+        """
+        批量获取球体价格
+        
+        Args:
+            sphere_types (iterable): 球体种类名称序列
+            models (iterable): 球体型号序列，与种类一一对应
+            
+        Returns:
+            array: 球体价格数组
+        """
+        return array("d", map(self._spheres.get_price, sphere_types, models))
+    
+    def get_flange_prices(self, flange_types, models):
+        """
+        批量获取法兰价格
+        
+        Args:
+            flange_types (iterable): 法兰种类名称序列
+            models (iterable): 法兰型号序列，与种类一一对应
+            
+        Returns:
+            array: 法兰价格数组
+        """
+        return array("d", map(self._flanges.get_price, flange_types, models))
     
-    def get_sphere_models_by_type(self, sphere_type):
+    def get_sphere_models_by_type(self, sphere_type, limit=None):
         """
         获取指定种类的球体型号列表
         
         Args:
             sphere_type (str): 球体种类名称
+            limit (int): 最多返回的型号数，为None时返回全部型号
             
         Returns:
-            list: 球体型号列表
+            list: 按添加顺序排列的球体型号列表
         """
-        if sphere_type in self.sphere_models:
-            return [item["model"] for item in self.sphere_models[sphere_type]]
-        return []
+        return self._spheres.get_models(sphere_type, limit)
     
-    def get_flange_models_by_type(self, flange_type):
+    def get_flange_models_by_type(self, flange_type, limit=None):
         """
         获取指定种类的法兰型号列表
         
         Args:
             flange_type (str): 法兰种类名称
+            limit (int): 最多返回的型号数，为None时返回全部型号
             
         Returns:
-            list: 法兰型号列表
+            list: 按添加顺序排列的法兰型号列表
         """
-        if flange_type in self.flange_models:
-            return [item["model"] for item in self.flange_models[flange_type]]
-        return []
+        return self._flanges.get_models(flange_type, limit)
     
-    def save_data(self):
-        """保存产品数据到文件"""
-        data = {
-            "sphereTypes": self.sphere_types,
-            "sphereModels": self.sphere_models,
-            "flangeTypes": self.flange_types,
-            "flangeModels": self.flange_models,
+    def rebuild_index(self):
+        """清除已删除的型号行并重建 型号 -> 行号 索引"""
+        self._spheres.compact()
+        self._flanges.compact()
+    
+    def _snapshot_data(self):
+        """
+        生成当前产品数据的快照
+        
+        Returns:
+            dict: 可直接序列化为JSON的产品数据
+        """
+        # 只使用公共接口读取，其他存储方式(如SQLite)的子类也能导出
+        return {
+            "sphereTypes": list(self.sphere_types),
+            "sphereModels": {t: list(items) for t, items in self.sphere_models.items()},
+            "flangeTypes": list(self.flange_types),
+            "flangeModels": {t: list(items) for t, items in self.flange_models.items()},
             "exportDate": datetime.now().isoformat(),
             "version": "1.0"
         }
+    
+    @staticmethod
+    def _catalog_document(spheres, flanges):
+        """
+        把球体和法兰目录转换为产品数据文件的JSON结构
         
+        Args:
+            spheres (ProductCatalog): 球体目录
+            flanges (ProductCatalog): 法兰目录
+            
+        Returns:
+            dict: 可直接序列化为JSON的产品数据
+        """
+        return {
+            "sphereTypes": list(spheres.types),
+            "sphereModels": spheres.to_dict(),
+            "flangeTypes": list(flanges.types),
+            "flangeModels": flanges.to_dict(),
+            "exportDate": datetime.now().isoformat(),
+            "version": "1.0"
+        }
+    
+    @staticmethod
+    def _binary_snapshot(spheres, flanges):
+        """
+        生成产品数据的二进制快照
+        
+        Args:
+            spheres (ProductCatalog): 球体目录
+            flanges (ProductCatalog): 法兰目录
+            
+        Returns:
+            bytes: 二进制快照数据，数据无法用二进制格式表示时返回None
+        """
         try:
-            # 确保数据目录存在
-            if not os.path.exists("data"):
-                os.makedirs("data")
+            return binary_snapshot.encode_catalogs(spheres, flanges)
+        except ValueError as e:
+            print(f"生成二进制快照失败: {e}")
+            return None
+    
+    @classmethod
+    def _write_snapshot(cls, catalogs):
+        """
+        在写入线程中原子地写入快照文件和二进制快照，并删除已被快照包含的变更日志
+        
+        Args:
+            catalogs (tuple): (球体目录, 法兰目录) 的副本
+        """
+        spheres, flanges = catalogs
+        data = cls._catalog_document(spheres, flanges)
+        binary = cls._binary_snapshot(spheres, flanges)
+        
+        # 确保数据目录存在
+        if not os.path.exists("data"):
+            os.makedirs("data")
+        
+        tmp_path = DATA_FILE + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, DATA_FILE)
+        
+        # 二进制快照在JSON快照之后写入，并记录JSON快照的大小和修改时间，
+        # 两者不一致时读取方会回退到JSON快照
+        if binary is not None:
+            binary_snapshot.write_snapshot(BINARY_FILE, binary, DATA_FILE)
+        elif os.path.exists(BINARY_FILE):
+            os.remove(BINARY_FILE)
+        
+        # 快照已包含变更日志(以及旧版本压缩中断时遗留的 .old 日志)中的全部变更
+        for journal_path in (JOURNAL_FILE + ".old", JOURNAL_FILE):
+            if os.path.exists(journal_path):
+                os.remove(journal_path)
+    
+    @staticmethod
+    def _write_journal(records):
+        """
+        在写入线程中把变更记录追加到变更日志
+        
+        Args:
+            records (list): 变更记录列表
             
-            # 保存数据到JSON文件
-            with open("data/product_data.json", "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+        Returns:
+            int: 变更日志的大小(字节)
+        """
+        lines = "".join(
+            json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+            for record in records
+        )
+        
+        if not os.path.exists("data"):
+            os.makedirs("data")
+        
+        with open(JOURNAL_FILE, "a", encoding="utf-8") as f:
+            f.write(lines)
+            return f.tell()
+    
+    def _append_journal(self, records):
+        """
+        把变更记录交给写入线程追加到变更日志，必要时压缩
+        
+        Args:
+            records (list): 变更记录列表
+            
+        Returns:
+            bool: 是否已提交写入
+        """
+        # 之前的写入失败时磁盘上可能缺少部分变更，改为保存完整快照
+        if self._writer.failed:
+            return self.save_data()
+        
+        self._writer.submit_records(records)
+        if (self._writer.journal_size >= JOURNAL_COMPACT_SIZE or
+                time.monotonic() - self._last_compact_time >= JOURNAL_COMPACT_INTERVAL):
+            self.compact()
+        return True
+    
+    def compact(self):
+        """
+        把变更日志合并到快照文件
+        
+        界面线程只复制当前目录，快照由写入线程生成并写入，之后的变更写入新的日志。
+        
+        Returns:
+            bool: 是否已提交写入
+        """
+        return self.save_data()
+    
+    def save_data(self):
+        """
+        保存完整产品数据到快照文件，并清空变更日志
+        
+        只复制当前目录并交给写入线程，不等待写入完成；需要确认数据已写入磁盘时调用 flush()。
+        
+        Returns:
+            bool: 是否已提交写入
+        """
+        self._writer.submit_snapshot((self._spheres.copy(), self._flanges.copy()))
+        self._last_compact_time = time.monotonic()
+        return True
+    
+    def flush(self, timeout=None):
+        """
+        等待已提交的修改全部写入磁盘，写入失败时重新保存一次完整快照
+        
+        Args:
+            timeout (float): 每次等待的最长时间(秒)，为None时一直等待
+            
+        Returns:
+            bool: 修改是否已全部写入磁盘
+        """
+        if self._writer.flush(timeout):
             return True
-        except Exception as e:
-            print(f"保存数据失败: {e}")
+        if not self._writer.failed:
             return False
+        self.save_data()
+        return self._writer.flush(timeout)
     
     def load_data(self):
-        """从文件加载产品数据"""
+        """从快照文件加载产品数据，并重放变更日志"""
+        self.flush()
+        loaded = False
         try:
-            # 检查数据文件是否存在
-            if os.path.exists("data/product_data.json"):
-                with open("data/product_data.json", "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                
-                # 加载数据
-                self.sphere_types = data.get("sphereTypes", [])
-                self.sphere_models = data.get("sphereModels", {})
-                self.flange_types = data.get("flangeTypes", [])
-                self.flange_models = data.get("flangeModels", {})
-                return True
+            loaded = self._load_files()
         except Exception as e:
             print(f"加载数据失败: {e}")
-        return False
+        self._bump_generation()
+        self._notify()
+        return loaded
+    
+    def _load_files(self):
+        """
+        读取快照文件并重放变更日志，读取失败时抛出异常
+        
+        Returns:
+            bool: 是否读取到数据
+        """
+        loaded = False
+        # 检查数据文件是否存在
+        if os.path.exists(DATA_FILE):
+            # 优先读取与快照文件一致的二进制快照，否则解析JSON快照
+            catalogs = binary_snapshot.read_snapshot(BINARY_FILE, DATA_FILE)
+            if catalogs is None:
+                catalogs = self._read_catalog(DATA_FILE)[:2]
+            self._spheres, self._flanges = catalogs
+            loaded = True
+        
+        # 先重放压缩中断时遗留的旧日志，再重放当前日志
+        for journal_path in (JOURNAL_FILE + ".old", JOURNAL_FILE):
+            if self._replay_journal(journal_path):
+                loaded = True
+        return loaded
+    
+    @staticmethod
+    def _read_catalog(file_path):
+        """
+        流式读取产品数据文件，边读取边构建目录
+        
+        型号记录逐条解析，格式错误时立即抛出异常，不会先把整个文件读入内存。
+        
+        Args:
+            file_path (str): 产品数据文件路径
+            
+        Returns:
+            tuple: (球体目录, 法兰目录, 文件中的顶层键集合)
+        """
+        catalogs = {"sphereModels": ProductCatalog(), "flangeModels": ProductCatalog()}
+        types = {}
+        
+        with open(file_path, "r", encoding="utf-8") as f:
+            document = JSONDocumentStream(f, {"sphereModels": 2, "flangeModels": 2})
+            for key, product_type, value in document:
+                if key in catalogs:
+                    if (not isinstance(value, dict) or not isinstance(value.get("model"), str) or
+                            isinstance(value.get("price"), bool) or
+                            not isinstance(value.get("price"), (int, float))):
+                        raise document.reader.error(f"{key} 中的型号记录格式错误")
+                    catalogs[key].add_type(product_type)
+                    try:
+                        catalogs[key].add_model(product_type, value["model"], value["price"])
+                    except ValueError as e:
+                        raise document.reader.error(f"{key} 中型号 {value['model']} 的{e}") from None
+                elif key in ("sphereTypes", "flangeTypes"):
+                    if not isinstance(value, list):
+                        raise document.reader.error(f"{key} 必须是列表")
+                    types[key] = value
+        
+        # 按种类列表整理目录，丢弃不属于任何种类的型号
+        spheres = catalogs["sphereModels"]
+        flanges = catalogs["flangeModels"]
+        spheres.retain_types(types.get("sphereTypes", []))
+        flanges.retain_types(types.get("flangeTypes", []))
+        return spheres, flanges, document.keys
+    
+    def _replay_journal(self, journal_path):
+        """
+        重放变更日志中的记录
+        
+        重放的操作都是幂等的，日志末尾写入不完整的记录会被忽略。
+        
+        Args:
+            journal_path (str): 变更日志文件路径
+            
+        Returns:
+            bool: 是否重放了日志
+        """
+        if not os.path.exists(journal_path):
+            return False
+        
+        handlers = {
+            ("addType", "sphere"): lambda r: self.add_sphere_type(r["type"]),
+            ("addType", "flange"): lambda r: self.add_flange_type(r["type"]),
+            ("deleteType", "sphere"): lambda r: self.delete_sphere_type(r["type"]),
+            ("deleteType", "flange"): lambda r: self.delete_flange_type(r["type"]),
+            ("addModel", "sphere"): lambda r: self.add_sphere_model(r["type"], r["model"], r["price"]),
+            ("addModel", "flange"): lambda r: self.add_flange_model(r["type"], r["model"], r["price"]),
+            ("deleteModel", "sphere"): lambda r: self.delete_sphere_model(r["type"], r["model"]),
+            ("deleteModel", "flange"): lambda r: self.delete_flange_model(r["type"], r["model"]),
+            ("setPrice", "sphere"): lambda r: self.update_sphere_price(r["type"], r["model"], r["price"]),
+            ("setPrice", "flange"): lambda r: self.update_flange_price(r["type"], r["model"], r["price"]),
+        }
+        
+        self._replaying = True
+        try:
+            with open(journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        handler = handlers[(record["op"], record["kind"])]
+                    except (ValueError, KeyError, TypeError):
+                        continue
+                    
+                    # 字段缺失或价格无效的记录跳过，不影响其他记录的重放
+                    try:
+                        handler(record)
+                    except (ValueError, KeyError, TypeError) as e:
+                        print(f"跳过无效的变更日志记录: {e}")
+        finally:
+            self._replaying = False
+        return True
     
     def export_data(self, file_path):
         """
@@ -301,16 +982,8 @@ class ProductDataModel:
         Returns:
             bool: 是否导出成功
         """
-        data = {
-            "sphereTypes": self.sphere_types,
-            "sphereModels": self.sphere_models,
-            "flangeTypes": self.flange_types,
-            "flangeModels": self.flange_models,
-            "exportDate": datetime.now().isoformat(),
-            "version": "1.0"
-        }
-        
         try:
+            data = self._snapshot_data()
             with open(file_path, "w", encoding="utf-8") as f:
                 json.dump(data, f, indent=2, ensure_ascii=False)
             return True
@@ -318,6 +991,198 @@ class ProductDataModel:
             print(f"导出数据失败: {e}")
             return False
     
+    def _replace_all(self, spheres, flanges):
+        """
+        用导入的目录整体替换当前产品数据
+        
+        Args:
+            spheres (ProductCatalog): 球体目录
+            flanges (ProductCatalog): 法兰目录
+        """
+        self._spheres = spheres
+        self._flanges = flanges
+    
+    def import_csv(self, file_path, kind=None, progress_callback=None):
+        """
+        从CSV价格表流式导入型号
+        
+        逐行读取文件，内存占用与文件大小无关。第一行为表头，需包含
+        种类(type)、型号(model)、价格(price)列，类别(kind)列可选，
+        缺少时使用kind参数。不存在的种类会自动创建，已存在的型号会被跳过。
+        所有行作为一次批量修改，只保存一次。
+        
+        Args:
+            file_path (str): CSV文件路径
+            kind (str): 默认产品类别，"sphere" 或 "flange"
+            progress_callback (callable): 进度回调，参数为 (已读取字节数, 文件总字节数)
+            
+        Returns:
+            dict: 导入结果，包含 added、duplicates、invalid 数量和 errors 错误信息列表；
+                  文件无法读取或表头不正确时返回None
+        """
+        result = {"added": 0, "duplicates": 0, "invalid": 0, "errors": []}
+        
+        def reject(line_number, message):
+            result["invalid"] += 1
+            if len(result["errors"]) < CSV_MAX_ERRORS:
+                result["errors"].append(f"第{line_number}行: {message}")
+        
+        try:
+            total_size = os.path.getsize(file_path)
+            with open(file_path, "rb") as raw:
+                reader = csv.reader(io.TextIOWrapper(raw, encoding="utf-8-sig", newline=""))
+                
+                # 解析表头
+                header = [name.strip().lower() for name in next(reader, [])]
+                columns = {}
+                for key, names in CSV_COLUMNS.items():
+                    for name in names:
+                        if name in header:
+                            columns[key] = header.index(name)
+                            break
+                if not all(key in columns for key in ("type", "model", "price")):
+                    print("导入CSV失败: 缺少种类、型号或价格列")
+                    return None
+                if "kind" not in columns and kind not in ("sphere", "flange"):
+                    print("导入CSV失败: 缺少类别列")
+                    return None
+                width = max(columns.values()) + 1
+                
+                with self.batch():
+                    # 大批量导入时直接保存完整快照，不逐条写入变更日志
+                    self._commit()
+                    
+                    for line_number, row in enumerate(reader, start=2):
+                        if line_number % CSV_PROGRESS_INTERVAL == 0 and progress_callback:
+                            progress_callback(raw.tell(), total_size)
+                        
+                        if not any(cell.strip() for cell in row):
+                            continue
+                        if len(row) < width:
+                            reject(line_number, "列数不足")
+                            continue
+                        
+                        row_kind = kind
+                        if "kind" in columns and row[columns["kind"]].strip():
+                            row_kind = CSV_KINDS.get(row[columns["kind"]].strip().lower())
+                        product_type = row[columns["type"]].strip()
+                        model = row[columns["model"]].strip()
+                        if row_kind not in ("sphere", "flange"):
+                            reject(line_number, "未知的产品类别")
+                            continue
+                        if not product_type or not model:
+                            reject(line_number, "种类或型号为空")
+                            continue
+                        try:
+                            price = parse_price(row[columns["price"]].strip())
+                        except ValueError as e:
+                            reject(line_number, str(e))
+                            continue
+                        
+                        if row_kind == "sphere":
+                            self.add_sphere_type(product_type)
+                            added = self.add_sphere_model(product_type, model, price)
+                        else:
+                            self.add_flange_type(product_type)
+                            added = self.add_flange_model(product_type, model, price)
+                        if added:
+                            result["added"] += 1
+                        else:
+                            result["duplicates"] += 1
+            
+            if progress_callback:
+                progress_callback(total_size, total_size)
+            return result
+        except Exception as e:
+            print(f"导入CSV失败: {e}")
+        return None
+    
+    def merge_data(self, file_path):
+        """
+        以增量方式导入产品数据
+        
+        把文件视为新的完整产品目录，与当前目录比较后只应用差异部分：
+        新增、删除和价格变化的型号，以及新增和删除的种类。
+        保存和界面刷新的开销只与变更的数量有关。
+        
+        Args:
+            file_path (str): 导入文件路径
+            
+        Returns:
+            dict: 变更集，"sphere" 和 "flange" 分别包含 addedTypes、removedTypes、
+                  added、removed、repriced 列表；导入失败时返回None
+        """
+        try:
+            spheres, flanges, keys = self._read_catalog(file_path)
+            
+            # 验证数据格式
+            if not all(key in keys for key in CATALOG_KEYS):
+                return None
+        except Exception as e:
+            print(f"导入数据失败: {e}")
+            return None
+        
+        with self.batch():
+            return {
+                "sphere": self._merge_catalog(
+                    spheres, self.sphere_types, self.sphere_models, self.add_sphere_type,
+                    self.delete_sphere_type, self.add_sphere_model, self.delete_sphere_model,
+                    self.update_sphere_price),
+                "flange": self._merge_catalog(
+                    flanges, self.flange_types, self.flange_models, self.add_flange_type,
+                    self.delete_flange_type, self.add_flange_model, self.delete_flange_model,
+                    self.update_flange_price),
+            }
+    
+    @staticmethod
+    def _merge_catalog(catalog, current_types, current_models, add_type, delete_type,
+                       add_model, delete_model, update_price):
+        """
+        计算并应用单类产品的目录差异
+        
+        Args:
+            catalog (ProductCatalog): 新的目录
+            current_types (list): 当前种类列表
+            current_models (Mapping): 当前 种类 -> 型号记录列表 映射
+            add_type, delete_type, add_model, delete_model, update_price: 对应类别的修改方法
+            
+        Returns:
+            dict: 该类产品的变更集
+        """
+        changes = {"addedTypes": [], "removedTypes": [], "added": [], "removed": [], "repriced": []}
+        
+        # 删除新目录中不存在的种类
+        for product_type in list(current_types):
+            if product_type not in catalog.columns:
+                changes["removed"].extend({"type": product_type, "model": item["model"]}
+                                          for item in current_models[product_type])
+                delete_type(product_type)
+                changes["removedTypes"].append(product_type)
+        
+        for product_type in catalog.types:
+            if add_type(product_type):
+                changes["addedTypes"].append(product_type)
+                current = {}
+            else:
+                current = {item["model"]: item["price"] for item in current_models[product_type]}
+            
+            for model, price in catalog.columns[product_type].items():
+                old_price = current.pop(model, None)
+                if old_price is None:
+                    add_model(product_type, model, price)
+                    changes["added"].append({"type": product_type, "model": model, "price": price})
+                elif old_price != price:
+                    update_price(product_type, model, price)
+                    changes["repriced"].append({"type": product_type, "model": model,
+                                                "oldPrice": old_price, "newPrice": price})
+            
+            # 删除新目录中不存在的型号
+            for model in current:
+                delete_model(product_type, model)
+                changes["removed"].append({"type": product_type, "model": model})
+        
+        return changes
+    
     def import_data(self, file_path):
         """
         从指定文件导入产品数据
@@ -329,35 +1194,183 @@ class ProductDataModel:
             bool: 是否导入成功
         """
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            spheres, flanges, keys = self._read_catalog(file_path)
             
             # 验证数据格式
-            if all(key in data for key in ["sphereTypes", "sphereModels", "flangeTypes", "flangeModels"]):
-                self.sphere_types = data["sphereTypes"]
-                self.sphere_models = data["sphereModels"]
-                self.flange_types = data["flangeTypes"]
-                self.flange_models = data["flangeModels"]
-                self.save_data()
+            if all(key in keys for key in CATALOG_KEYS):
+                self._replace_all(spheres, flanges)
+                self._commit()
                 return True
         except Exception as e:
             print(f"导入数据失败: {e}")
         return False
 
 
+class JointPriceCache:
+    """
+    接头价格的LRU缓存
+    
+    按 (球体种类, 球体型号, 法兰种类, 法兰型号) 缓存球体和法兰价格(分)，
+    接头单价由缓存的价格和法兰数量直接算出。条目记录计算时的修改计数，
+    球体或法兰种类在此之后被修改过时条目失效，其他种类的条目不受影响。
+    """
+    
+    def __init__(self, product_model, maxsize=JOINT_PRICE_CACHE_SIZE):
+        """
+        初始化接头价格缓存
+        
+        Args:
+            product_model (ProductDataModel): 产品数据模型实例
+            maxsize (int): 最多缓存的配置数
+        """
+        self.product_model = product_model
+        self.maxsize = maxsize
+        self._entries = OrderedDict()  # 配置 -> (球体价格(分), 法兰价格(分), 修改计数)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+    
+    def lookup(self, sphere_type, sphere_model, flange_type, flange_model):
+        """
+        获取球体和法兰价格
+        
+        Args:
+            sphere_type (str): 球体种类
+            sphere_model (str): 球体型号
+            flange_type (str): 法兰种类
+            flange_model (str): 法兰型号
+            
+        Returns:
+            tuple: (球体价格(分), 法兰价格(分))
+        """
+        product_model = self.product_model
+        key = (sphere_type, sphere_model, flange_type, flange_model)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if (product_model.type_generation("sphere", sphere_type) <= entry[2] and
+                    product_model.type_generation("flange", flange_type) <= entry[2]):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], entry[1]
+            self.invalidations += 1
+        
+        self.misses += 1
+        sphere_cents = to_cents(product_model.get_sphere_price(sphere_type, sphere_model))
+        flange_cents = to_cents(product_model.get_flange_price(flange_type, flange_model))
+        self._entries[key] = (sphere_cents, flange_cents, product_model.generation)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return sphere_cents, flange_cents
+    
+    def clear(self):
+        """清空缓存和统计信息"""
+        self._entries.clear()
+        self.hits = self.misses = self.invalidations = 0
+    
+    def stats(self):
+        """
+        获取缓存统计信息
+        
+        Returns:
+            dict: 命中次数、未命中次数、失效次数、当前条目数、容量和命中率
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hitRate": self.hits / total if total else 0.0
+        }
+
+
 class QuotationModel:
     """报价单数据模型类，管理报价单信息"""
     
-    def __init__(self, product_model):
+    def __init__(self, product_model, price_cache=None):
         """
         初始化报价单数据模型
         
         Args:
             product_model (ProductDataModel): 产品数据模型实例
+            price_cache (JointPriceCache): 接头价格缓存，可在多个报价单之间共用，默认新建
         """
         self.product_model = product_model
+        self.price_cache = price_cache if price_cache is not None else JointPriceCache(product_model)
         self.quotation_items = []  # 报价单项目列表
-        self.total_price = 0.0  # 总价
+        self._total_cents = 0  # 总价(分)，随项目增删增量更新
+        self._listeners = []  # 报价项目变更通知回调
+        self._line_index = {}  # (类别, 种类, 型号) -> 引用该产品的报价项目列表
+    
+    @property
+    def total_price(self):
+        """报价单总价(元)"""
+        return self._total_cents / 100
+    
+    def snapshot(self):
+        """
+        获取报价单的只读快照，供后台线程在报价单继续编辑时使用
+        
+        Returns:
+            tuple: (报价项目只读副本组成的元组, 总价)
+        """
+        items = tuple(MappingProxyType(dict(item)) for item in self.quotation_items)
+        return items, self.total_price
+    
+    def add_listener(self, listener):
+        """
+        注册报价项目变更通知
+        
+        Args:
+            listener (callable): 回调函数 listener(change, index)，change 为 "insert"、"remove"、
+                                 "update" 或 "reset"，index 为变更的项目索引，"reset" 时为None
+        """
+        self._listeners.append(listener)
+    
+    def remove_listener(self, listener):
+        """
+        取消报价项目变更通知
+        
+        Args:
+            listener (callable): 已注册的回调函数
+        """
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def _notify(self, change, index=None):
+        """通知所有回调报价项目已变更"""
+        for listener in self._listeners:
+            listener(change, index)
+    
+    @staticmethod
+    def _line_keys(item):
+        """报价项目引用的球体和法兰，即反向索引中的键"""
+        return (("sphere", item["sphereType"], item["sphereModel"]),
+                ("flange", item["flangeType"], item["flangeModel"]))
+    
+    def _index_item(self, item):
+        """把报价项目加入反向索引"""
+        for key in self._line_keys(item):
+            self._line_index.setdefault(key, []).append(item)
+    
+    def _unindex_item(self, item):
+        """从反向索引中移除报价项目，相同内容的其他项目不受影响"""
+        for key in self._line_keys(item):
+            lines = self._line_index.get(key, [])
+            for position, line in enumerate(lines):
+                if line is item:
+                    del lines[position]
+                    break
+            if not lines:
+                self._line_index.pop(key, None)
+    
+    def _rebuild_line_index(self):
+        """整体替换报价项目后重建反向索引"""
+        self._line_index = {}
+        for item in self.quotation_items:
+            self._index_item(item)
     
     def add_item(self, sphere_type, sphere_model, flange_type, flange_model, flange_quantity, joint_quantity):
         """
@@ -374,34 +1387,84 @@ class QuotationModel:
         Returns:
             float: 项目小计价格
         """
-        # 获取价格信息
-        sphere_price = self.product_model.get_sphere_price(sphere_type, sphere_model)
-        flange_price = self.product_model.get_flange_price(flange_type, flange_model)
+        # 获取价格信息(分)，价格表中不足一分的部分先四舍五入，再乘以数量
+        sphere_cents, flange_cents = self.price_cache.lookup(sphere_type, sphere_model,
+                                                             flange_type, flange_model)
         
         # 计算单个接头价格
-        joint_price = sphere_price + flange_price * flange_quantity
+        joint_cents = sphere_cents + flange_cents * flange_quantity
         
         # 计算小计
-        item_total = joint_price * joint_quantity
+        item_cents = joint_cents * joint_quantity
         
         # 添加到报价单
-        self.quotation_items.append({
+        item = {
             "sphereType": sphere_type,
             "sphereModel": sphere_model,
             "flangeType": flange_type,
             "flangeModel": flange_model,
             "flangeQuantity": flange_quantity,
             "jointQuantity": joint_quantity,
-            "spherePrice": sphere_price,
-            "flangePrice": flange_price,
-            "jointPrice": joint_price,
-            "totalPrice": item_total
-        })
+            "spherePrice": sphere_cents / 100,
+            "flangePrice": flange_cents / 100,
+            "jointPrice": joint_cents / 100,
+            "totalPrice": item_cents / 100
+        }
+        self.quotation_items.append(item)
+        self._index_item(item)
         
         # 更新总价
-        self.update_total_price()
+        self._total_cents += item_cents
+        self._notify("insert", len(self.quotation_items) - 1)
+        
+        return item_cents / 100
+    
+    def check_request_item(self, item):
+        """
+        验证报价请求中的一个项目
+        
+        Args:
+            item (dict): 包含 REQUEST_ITEM_KEYS 字段的项目，不含 jointQuantity 时只验证接头配置
+            
+        Returns:
+            tuple: (球体种类, 球体型号, 法兰种类, 法兰型号, 法兰数量, 接头数量)，
+                   格式错误、型号不存在或数量不是正整数时抛出 ValueError
+        """
+        if not isinstance(item, dict) or not all(key in item for key in REQUEST_ITEM_KEYS[:5]):
+            raise ValueError("项目格式错误")
+        sphere_type, sphere_model = item["sphereType"], item["sphereModel"]
+        flange_type, flange_model = item["flangeType"], item["flangeModel"]
+        if not self.product_model.has_sphere_model(sphere_type, sphere_model):
+            raise ValueError(f"球体型号不存在: {sphere_type} - {sphere_model}")
+        if not self.product_model.has_flange_model(flange_type, flange_model):
+            raise ValueError(f"法兰型号不存在: {flange_type} - {flange_model}")
+        return (sphere_type, sphere_model, flange_type, flange_model,
+                parse_quantity(item["flangeQuantity"], "法兰数量"),
+                parse_quantity(item.get("jointQuantity", 1), "接头数量"))
+    
+    def add_request_items(self, items):
+        """
+        按报价请求添加报价项目，全部项目验证通过后才添加
         
-        return item_total
+        Args:
+            items (list): 报价请求项目列表
+            
+        Returns:
+            float: 报价单总价，任一项目无效时抛出 ValueError 且不添加任何项目
+        """
+        if not isinstance(items, list) or not items:
+            raise ValueError("报价请求没有项目")
+        checked = []
+        for index, item in enumerate(items, start=1):
+            if not isinstance(item, dict) or "jointQuantity" not in item:
+                raise ValueError(f"第 {index} 个项目格式错误")
+            try:
+                checked.append(self.check_request_item(item))
+            except ValueError as e:
+                raise ValueError(f"第 {index} 个项目: {e}")
+        for args in checked:
+            self.add_item(*args)
+        return self.total_price
     
     def delete_item(self, index):
         """
@@ -414,19 +1477,51 @@ class QuotationModel:
             bool: 是否删除成功
         """
         if 0 <= index < len(self.quotation_items):
-            self.quotation_items.pop(index)
-            self.update_total_price()
+            item = self.quotation_items.pop(index)
+            self._unindex_item(item)
+            self._total_cents -= to_cents(item["totalPrice"])
+            self._notify("remove", index)
+            return True
+        return False
+    
+    def update_item(self, index, flange_quantity, joint_quantity):
+        """
+        修改报价项目的数量，按项目中保存的单价重新计算小计
+        
+        Args:
+            index (int): 项目索引
+            flange_quantity (int): 法兰数量
+            joint_quantity (int): 接头数量
+            
+        Returns:
+            bool: 是否修改成功
+        """
+        if 0 <= index < len(self.quotation_items):
+            item = self.quotation_items[index]
+            joint_cents = to_cents(item["spherePrice"]) + to_cents(item["flangePrice"]) * flange_quantity
+            item_cents = joint_cents * joint_quantity
+            
+            self._total_cents += item_cents - to_cents(item["totalPrice"])
+            item.update({
+                "flangeQuantity": flange_quantity,
+                "jointQuantity": joint_quantity,
+                "jointPrice": joint_cents / 100,
+                "totalPrice": item_cents / 100
+            })
+            self._notify("update", index)
             return True
         return False
     
     def clear_items(self):
         """清空报价单"""
         self.quotation_items = []
-        self.total_price = 0.0
+        self._total_cents = 0
+        self._line_index = {}
+        self._notify("reset")
     
     def update_total_price(self):
-        """更新报价单总价"""
-        self.total_price = sum(item["totalPrice"] for item in self.quotation_items)
+        """根据全部项目重新计算报价单总价"""
+        self._total_cents = sum(to_cents(item["totalPrice"]) for item in self.quotation_items)
     
     def calculate_joint_price(self, sphere_type, sphere_model, flange_type, flange_model, flange_quantity):
         """
@@ -442,10 +1537,50 @@ class QuotationModel:
         Returns:
             float: 接头单价
         """
-        sphere_price = self.product_model.get_sphere_price(sphere_type, sphere_model)
-        flange_price = self.product_model.get_flange_price(flange_type, flange_model)
+        sphere_cents, flange_cents = self.price_cache.lookup(sphere_type, sphere_model,
+                                                             flange_type, flange_model)
         
-        return sphere_price + flange_price * flange_quantity
+        return (sphere_cents + flange_cents * flange_quantity) / 100
+    
+    def price_batch(self, sphere_types, sphere_models, flange_types, flange_models,
+                    flange_quantities, joint_quantities):
+        """
+        批量计算接头单价和小计，适用于一次报价成千上万种配置
+        
+        各参数为等长序列，第i个元素共同描述第i种配置。
+        
+        Args:
+            sphere_types (sequence): 球体种类序列
+            sphere_models (sequence): 球体型号序列
+            flange_types (sequence): 法兰种类序列
+            flange_models (sequence): 法兰型号序列
+            flange_quantities (sequence): 法兰数量序列
+            joint_quantities (sequence): 接头数量序列
+            
+        Returns:
+            tuple: (接头单价数组, 小计数组)，各参数长度不一致时抛出 ValueError
+        """
+        columns = (sphere_types, sphere_models, flange_types, flange_models,
+                   flange_quantities, joint_quantities)
+        if len({len(column) for column in columns}) > 1:
+            raise ValueError("批量报价的各参数长度必须相同")
+        
+        sphere_cents = self._to_cents_array(self.product_model.get_sphere_prices(sphere_types, sphere_models))
+        flange_cents = self._to_cents_array(self.product_model.get_flange_prices(flange_types, flange_models))
+        
+        # 以分为单位计算：接头单价 = 球体价格 + 法兰价格 * 法兰数量，小计 = 接头单价 * 接头数量
+        joint_cents = array("q", map(add, sphere_cents, map(mul, flange_cents, flange_quantities)))
+        item_cents = array("q", map(mul, joint_cents, joint_quantities))
+        
+        joint_prices = array("d", map(truediv, joint_cents, repeat(100)))
+        item_totals = array("d", map(truediv, item_cents, repeat(100)))
+        return joint_prices, item_totals
+    
+    @staticmethod
+    def _to_cents_array(prices):
+        """将价格数组转换为整数分数组，相同价格只转换一次"""
+        cents = {price: to_cents(price) for price in set(prices)}
+        return array("q", map(cents.__getitem__, prices))
     
     def save_quotation(self, file_path):
         """
@@ -483,14 +1618,63 @@ class QuotationModel:
             bool: 是否加载成功
         """
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            
-            # 验证数据格式
-            if "quotationItems" in data:
-                self.quotation_items = data["quotationItems"]
-                self.update_total_price()
-                return True
+            items, total_cents = read_quotation_file(file_path)
         except Exception as e:
             print(f"加载报价单失败: {e}")
-        return False
\ No newline at end of file
+            return False
+        
+        self.quotation_items = items
+        self._total_cents = total_cents
+        self._rebuild_line_index()
+        self._notify("reset")
+        return True
+    
+    def load_items(self, items):
+        """
+        用给定的报价项目替换当前报价单，例如从报价单存档中读取的项目
+        
+        Args:
+            items (list): 包含 QUOTATION_ITEM_KEYS 全部字段的报价项目列表
+        """
+        self.quotation_items = [dict(item) for item in items]
+        self._total_cents = sum(to_cents(item["totalPrice"]) for item in self.quotation_items)
+        self._rebuild_line_index()
+        self._notify("reset")
+    
+    def reprice(self, changes):
+        """
+        按新的产品价格重新计算引用这些产品的报价项目
+        
+        通过反向索引只处理引用了已调价产品的项目，项目数量不变，单价和小计按新价格计算。
+        
+        Args:
+            changes (list): (类别, 种类, 型号, 新价格) 列表，类别为 "sphere" 或 "flange"
+            
+        Returns:
+            dict: 报价单有变化时返回 {"lines": 变化的项目数, "old_total": 原总价, "new_total": 新总价}，
+                  否则返回None
+        """
+        old_cents = self._total_cents
+        changed = set()
+        for kind, product_type, model, price in changes:
+            price_key = "spherePrice" if kind == "sphere" else "flangePrice"
+            price_cents = to_cents(price)
+            for item in self._line_index.get((kind, product_type, model), ()):
+                if to_cents(item[price_key]) == price_cents:
+                    continue
+                item[price_key] = price_cents / 100
+                joint_cents = to_cents(item["spherePrice"]) + to_cents(item["flangePrice"]) * item["flangeQuantity"]
+                item_cents = joint_cents * item["jointQuantity"]
+                self._total_cents += item_cents - to_cents(item["totalPrice"])
+                item["jointPrice"] = joint_cents / 100
+                item["totalPrice"] = item_cents / 100
+                changed.add(id(item))
+        
+        if not changed:
+            return None
+        
+        # 只通知发生变化的项目，调价时扫描一遍报价单找出位置，增删项目时无需维护位置表
+        for index, item in enumerate(self.quotation_items):
+            if id(item) in changed:
+                self._notify("update", index)
+        return {"lines": len(changed), "old_total": old_cents / 100, "new_total": self._total_cents / 100}
\ No newline at end of file
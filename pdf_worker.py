@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+后台报价单生成模块
+在工作线程中根据报价单快照生成PDF，报告进度并支持取消，生成期间界面可以继续编辑报价单
+"""
+
+import os
+import threading
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from quotation_pdf import create_quotation_pdf
+
+
+class PDFGenerationCancelled(Exception):
+    """报价单生成已被取消"""
+
+
+class QuotationPDFWorker(QThread):
+    """报价单PDF生成线程，只读取创建时传入的报价单快照"""
+    
+    progress = pyqtSignal(int, int)  # (已完成步数, 总步数)
+    succeeded = pyqtSignal(str)  # 生成的文件路径
+    failed = pyqtSignal(str)  # 错误信息
+    cancelled = pyqtSignal()
+    
+    def __init__(self, file_path, quotation_items, total_price, parent=None):
+        """
+        初始化生成线程
+        
+        Args:
+            file_path (str): 保存文件路径
+            quotation_items (tuple): QuotationModel.snapshot() 返回的报价项目快照
+            total_price (float): 报价单总价
+            parent (QObject): 父对象
+        """
+        super().__init__(parent)
+        self.file_path = file_path
+        self.quotation_items = quotation_items
+        self.total_price = total_price
+        self._cancel_event = threading.Event()
+    
+    def cancel(self):
+        """请求取消生成，在下一次报告进度时生效"""
+        self._cancel_event.set()
+    
+    def _report_progress(self, done, total):
+        """生成过程中的进度回调，已请求取消时中止生成"""
+        if self._cancel_event.is_set():
+            raise PDFGenerationCancelled()
+        self.progress.emit(done, total)
+    
+    def run(self):
+        # 先写入临时文件，完成后再替换目标文件，取消或失败时不留下不完整的文件
+        tmp_path = self.file_path + ".tmp"
+        try:
+            create_quotation_pdf(tmp_path, self.quotation_items, self.total_price,
+                                 self._report_progress)
+            os.replace(tmp_path, self.file_path)
+        except PDFGenerationCancelled:
+            self._remove_file(tmp_path)
+            self.cancelled.emit()
+        except Exception as e:
+            self._remove_file(tmp_path)
+            self.failed.emit(str(e))
+        else:
+            self.succeeded.emit(self.file_path)
+    
+    @staticmethod
+    def _remove_file(file_path):
+        """删除未完成的临时文件"""
+        try:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        except OSError as e:
+            print(f"删除临时文件失败: {e}")
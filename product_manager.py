@@ -8,23 +8,33 @@
 
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTabWidget,
                             QLabel, QLineEdit, QPushButton, QComboBox,
-                            QTableWidget, QTableWidgetItem, QHeaderView,
-                            QMessageBox, QFileDialog, QGroupBox)
+                            QTableView, QHeaderView,
+                            QMessageBox, QFileDialog, QGroupBox, QProgressDialog,
+                            QApplication)
 from PyQt5.QtCore import Qt
 
+from catalog import parse_price
+from model_completer import ModelCompleter
+from model_search import ModelSearchIndex
+from product_table import ButtonDelegate, ProductTableModel
+
 
 class ProductManagerWidget(QWidget):
     """产品管理界面类"""
     
-    def __init__(self, product_model):
+    def __init__(self, product_model, search_index=None, repricer=None):
         """
         初始化产品管理界面
         
         Args:
             product_model: 产品数据模型实例
+            search_index: 型号搜索索引，为None时自行创建
+            repricer: 报价单调价器，调价后同步到报价单，为None时不同步
         """
         super().__init__()
         self.product_model = product_model
+        self.search_index = search_index or ModelSearchIndex(product_model)
+        self.repricer = repricer
         self.init_ui()
     
     def init_ui(self):
@@ -34,6 +44,7 @@ class ProductManagerWidget(QWidget):
         
         # 创建标签页切换器
         tab_widget = QTabWidget()
+        self.tab_widget = tab_widget
         
         # 创建球体管理和法兰管理标签页
         sphere_tab = self.create_sphere_tab()
@@ -84,6 +95,9 @@ class ProductManagerWidget(QWidget):
         
         model_label = QLabel("型号:")
         self.sphere_model_input = QLineEdit()
+        # 输入时列出已有的相似型号，避免重复添加
+        ModelCompleter(self.search_index, "sphere", self.sphere_type_combo.currentText,
+                       self.sphere_model_input)
         
         price_label = QLabel("价格:")
         self.sphere_price_input = QLineEdit()
@@ -107,17 +121,16 @@ class ProductManagerWidget(QWidget):
         table_group = QGroupBox("球体信息列表")
         table_layout = QVBoxLayout()
         
-        self.sphere_table = QTableWidget(0, 4)
-        self.sphere_table.setHorizontalHeaderLabels(["种类", "型号", "价格", "操作"])
-        self.sphere_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.sphere_table = self.create_product_table("sphere")
+        self.sphere_table_model = self.sphere_table.model()
+        self.sphere_table.itemDelegateForColumn(ProductTableModel.ACTION_COLUMN).clicked.connect(
+            self.delete_sphere_row, Qt.QueuedConnection
+        )
         
         table_layout.addWidget(self.sphere_table)
         table_group.setLayout(table_layout)
         layout.addWidget(table_group)
         
-        # 更新表格数据
-        self.update_sphere_table()
-        
         tab.setLayout(layout)
         return tab
     
@@ -152,6 +165,9 @@ class ProductManagerWidget(QWidget):
         
         model_label = QLabel("型号:")
         self.flange_model_input = QLineEdit()
+        # 输入时列出已有的相似型号，避免重复添加
+        ModelCompleter(self.search_index, "flange", self.flange_type_combo.currentText,
+                       self.flange_model_input)
         
         price_label = QLabel("价格:")
         self.flange_price_input = QLineEdit()
@@ -175,20 +191,39 @@ class ProductManagerWidget(QWidget):
         table_group = QGroupBox("法兰信息列表")
         table_layout = QVBoxLayout()
         
-        self.flange_table = QTableWidget(0, 4)
-        self.flange_table.setHorizontalHeaderLabels(["种类", "型号", "价格", "操作"])
-        self.flange_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.flange_table = self.create_product_table("flange")
+        self.flange_table_model = self.flange_table.model()
+        self.flange_table.itemDelegateForColumn(ProductTableModel.ACTION_COLUMN).clicked.connect(
+            self.delete_flange_row, Qt.QueuedConnection
+        )
         
         table_layout.addWidget(self.flange_table)
         table_group.setLayout(table_layout)
         layout.addWidget(table_group)
         
-        # 更新表格数据
-        self.update_flange_table()
-        
         tab.setLayout(layout)
         return tab
     
+    def create_product_table(self, kind):
+        """
+        创建产品信息表格，表格直接读取产品数据模型，只绘制可见的行
+        
+        Args:
+            kind (str): 产品类别，"sphere" 或 "flange"
+            
+        Returns:
+            QTableView: 产品信息表格
+        """
+        table = QTableView()
+        table.setModel(ProductTableModel(self.product_model, kind, table))
+        table.setItemDelegateForColumn(ProductTableModel.ACTION_COLUMN, ButtonDelegate("删除", table))
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        
+        # 固定行高，避免为计算行高读取所有行
+        table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        table.setSelectionBehavior(QTableView.SelectRows)
+        return table
+    
     def create_import_export_group(self):
         """创建数据导入导出控件组"""
         group = QGroupBox("数据导入导出")
@@ -200,8 +235,16 @@ class ProductManagerWidget(QWidget):
         import_btn = QPushButton("导入产品数据")
         import_btn.clicked.connect(self.import_data)
         
+        merge_btn = QPushButton("增量导入产品数据")
+        merge_btn.clicked.connect(self.merge_data)
+        
+        import_csv_btn = QPushButton("导入CSV价格表")
+        import_csv_btn.clicked.connect(self.import_csv)
+        
         layout.addWidget(export_btn)
         layout.addWidget(import_btn)
+        layout.addWidget(merge_btn)
+        layout.addWidget(import_csv_btn)
         
         group.setLayout(layout)
         return group
@@ -218,57 +261,21 @@ class ProductManagerWidget(QWidget):
     
     def update_sphere_table(self):
         """更新球体信息表格"""
-        self.sphere_table.setRowCount(0)
-        
-        row = 0
-        for sphere_type in self.product_model.sphere_types:
-            if sphere_type in self.product_model.sphere_models:
-                for model_info in self.product_model.sphere_models[sphere_type]:
-                    self.sphere_table.insertRow(row)
-                    
-                    # 添加表格项
-                    type_item = QTableWidgetItem(sphere_type)
-                    model_item = QTableWidgetItem(model_info["model"])
-                    price_item = QTableWidgetItem(f"{model_info['price']:.2f}")
-                    
-                    self.sphere_table.setItem(row, 0, type_item)
-                    self.sphere_table.setItem(row, 1, model_item)
-                    self.sphere_table.setItem(row, 2, price_item)
-                    
-                    # 添加删除按钮
-                    delete_btn = QPushButton("删除")
-                    delete_btn.clicked.connect(lambda checked, t=sphere_type, m=model_info["model"]: self.delete_sphere_model(t, m))
-                    
-                    self.sphere_table.setCellWidget(row, 3, delete_btn)
-                    
-                    row += 1
+        self.sphere_table_model.refresh()
     
     def update_flange_table(self):
         """更新法兰信息表格"""
-        self.flange_table.setRowCount(0)
-        
-        row = 0
-        for flange_type in self.product_model.flange_types:
-            if flange_type in self.product_model.flange_models:
-                for model_info in self.product_model.flange_models[flange_type]:
-                    self.flange_table.insertRow(row)
-                    
-                    # 添加表格项
-                    type_item = QTableWidgetItem(flange_type)
-                    model_item = QTableWidgetItem(model_info["model"])
-                    price_item = QTableWidgetItem(f"{model_info['price']:.2f}")
-                    
-                    self.flange_table.setItem(row, 0, type_item)
-                    self.flange_table.setItem(row, 1, model_item)
-                    self.flange_table.setItem(row, 2, price_item)
-                    
-                    # 添加删除按钮
-                    delete_btn = QPushButton("删除")
-                    delete_btn.clicked.connect(lambda checked, t=flange_type, m=model_info["model"]: self.delete_flange_model(t, m))
-                    
-                    self.flange_table.setCellWidget(row, 3, delete_btn)
-                    
-                    row += 1
+        self.flange_table_model.refresh()
+    
+    def delete_sphere_row(self, row):
+        """删除球体信息表格中指定行的型号"""
+        sphere_type, model, _ = self.sphere_table_model.record(row)
+        self.delete_sphere_model(sphere_type, model)
+    
+    def delete_flange_row(self, row):
+        """删除法兰信息表格中指定行的型号"""
+        flange_type, model, _ = self.flange_table_model.record(row)
+        self.delete_flange_model(flange_type, model)
     
     def add_sphere_type(self):
         """添加球体种类"""
@@ -302,9 +309,9 @@ class ProductManagerWidget(QWidget):
             return
         
         try:
-            price = float(price_text) if price_text else 0.0
-        except ValueError:
-            QMessageBox.warning(self, "警告", "价格必须是有效的数字")
+            price = parse_price(price_text) if price_text else 0.0
+        except ValueError as e:
+            QMessageBox.warning(self, "警告", str(e))
             return
         
         # 添加球体型号
@@ -361,9 +368,9 @@ class ProductManagerWidget(QWidget):
             return
         
         try:
-            price = float(price_text) if price_text else 0.0
-        except ValueError:
-            QMessageBox.warning(self, "警告", "价格必须是有效的数字")
+            price = parse_price(price_text) if price_text else 0.0
+        except ValueError as e:
+            QMessageBox.warning(self, "警告", str(e))
             return
         
         # 添加法兰型号
@@ -420,4 +427,77 @@ class ProductManagerWidget(QWidget):
                     
                     QMessageBox.information(self, "成功", "产品数据导入成功")
                 else:
-                    QMessageBox.warning(self, "警告", "导入产品数据失败，请检查文件格式是否正确")
\ No newline at end of file
+                    QMessageBox.warning(self, "警告", "导入产品数据失败，请检查文件格式是否正确")
+    
+    def merge_data(self):
+        """增量导入产品数据，只应用与当前数据的差异"""
+        file_path, _ = QFileDialog.getOpenFileName(self, "增量导入产品数据", "", "JSON文件 (*.json)")
+        
+        if not file_path:
+            return
+        
+        changes = self.product_model.merge_data(file_path)
+        if changes is None:
+            QMessageBox.warning(self, "警告", "导入产品数据失败，请检查文件格式是否正确")
+            return
+        
+        # 更新UI
+        self.update_sphere_type_combo()
+        self.update_flange_type_combo()
+        self.update_sphere_table()
+        self.update_flange_table()
+        
+        lines = []
+        for kind, name in (("sphere", "球体"), ("flange", "法兰")):
+            change = changes[kind]
+            lines.append(f"{name}: 新增 {len(change['added'])} 个型号，删除 {len(change['removed'])} 个型号，"
+                         f"调价 {len(change['repriced'])} 个型号")
+        
+        # 把调价同步到引用这些型号的报价单
+        if self.repricer is not None:
+            report = self.repricer.reprice()
+            if report:
+                lines.append(f"\n受调价影响的报价单: {len(report)} 份")
+                for result in report[:10]:
+                    lines.append(f"{result['name']}: {result['old_total']:.2f} -> {result['new_total']:.2f} 元 "
+                                 f"({result['new_total'] - result['old_total']:+.2f}，{result['lines']} 个项目)")
+        QMessageBox.information(self, "导入完成", "\n".join(lines))
+    
+    def import_csv(self):
+        """导入CSV价格表"""
+        file_path, _ = QFileDialog.getOpenFileName(self, "导入CSV价格表", "", "CSV文件 (*.csv)")
+        
+        if not file_path:
+            return
+        
+        progress = QProgressDialog("正在导入价格表...", None, 0, 1000, self)
+        progress.setWindowTitle("导入CSV价格表")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(0)
+        
+        def update_progress(bytes_read, total_bytes):
+            if total_bytes > 0:
+                progress.setValue(int(bytes_read * 1000 / total_bytes))
+            QApplication.processEvents()
+        
+        # 表中没有类别列时，默认导入为当前标签页对应的产品
+        kind = "flange" if self.tab_widget.currentIndex() == 1 else "sphere"
+        result = self.product_model.import_csv(file_path, kind, update_progress)
+        progress.close()
+        
+        if result is None:
+            QMessageBox.warning(self, "警告", "导入CSV价格表失败，请检查文件格式是否正确")
+            return
+        
+        # 更新UI
+        self.update_sphere_type_combo()
+        self.update_flange_type_combo()
+        self.update_sphere_table()
+        self.update_flange_table()
+        
+        message = (f"新增型号: {result['added']}\n"
+                   f"已存在的型号: {result['duplicates']}\n"
+                   f"无效行: {result['invalid']}")
+        if result["errors"]:
+            message += "\n\n" + "\n".join(result["errors"][:10])
+        QMessageBox.information(self, "导入完成", message)
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+产品表格模块
+为产品管理界面提供直接读取产品数据模型的表格模型和删除按钮委托，
+表格只为可见的行读取数据，不为每行创建表格项和按钮控件
+"""
+
+from bisect import bisect_right
+from itertools import accumulate
+
+from PyQt5.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton
+from PyQt5.QtCore import QAbstractTableModel, QEvent, QModelIndex, Qt, pyqtSignal
+
+
+class ProductTableModel(QAbstractTableModel):
+    """球体或法兰信息表格模型，行按种类顺序依次排列各种类的型号"""
+    
+    HEADERS = ["种类", "型号", "价格", "操作"]
+    ACTION_COLUMN = 3
+    
+    def __init__(self, product_model, kind, parent=None):
+        """
+        初始化表格模型
+        
+        Args:
+            product_model (ProductDataModel): 产品数据模型实例
+            kind (str): 产品类别，"sphere" 或 "flange"
+            parent (QObject): 父对象
+        """
+        super().__init__(parent)
+        self.product_model = product_model
+        self.kind = kind
+        self._types = []  # 有型号信息的种类
+        self._models = []  # 每个种类的型号记录序列
+        self._offsets = []  # 每个种类最后一行之后的行号
+        self.refresh()
+    
+    def refresh(self):
+        """产品数据变化后重新读取种类和型号数量，型号信息在绘制时按需读取"""
+        self.beginResetModel()
+        if self.kind == "sphere":
+            types, models = self.product_model.sphere_types, self.product_model.sphere_models
+        else:
+            types, models = self.product_model.flange_types, self.product_model.flange_models
+        self._types = [product_type for product_type in types if product_type in models]
+        self._models = [models[product_type] for product_type in self._types]
+        self._offsets = list(accumulate(len(model_list) for model_list in self._models))
+        self.endResetModel()
+    
+    def record(self, row):
+        """
+        获取指定行的型号信息
+        
+        Args:
+            row (int): 行号
+            
+        Returns:
+            tuple: (种类, 型号, 价格)
+        """
+        index = bisect_right(self._offsets, row)
+        start = self._offsets[index - 1] if index else 0
+        model_info = self._models[index][row - start]
+        return self._types[index], model_info["model"], model_info["price"]
+    
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or not self._offsets:
+            return 0
+        return self._offsets[-1]
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid() or index.column() == self.ACTION_COLUMN:
+            return None
+        try:
+            product_type, model, price = self.record(index.row())
+        except IndexError:
+            # 产品数据已修改但表格尚未刷新
+            return None
+        return (product_type, model, f"{price:.2f}")[index.column()]
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+    
+    def flags(self, index):
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+
+class ButtonDelegate(QStyledItemDelegate):
+    """在单元格中绘制按钮的委托，点击时发出行号，不为每行创建按钮控件"""
+    
+    clicked = pyqtSignal(int)
+    
+    def __init__(self, text, parent=None):
+        """
+        初始化按钮委托
+        
+        Args:
+            text (str): 按钮文字
+            parent (QObject): 父对象
+        """
+        super().__init__(parent)
+        self.text = text
+        self._pressed = None  # 鼠标按下的单元格 (行, 列)
+    
+    @staticmethod
+    def _button_rect(option):
+        """按钮在单元格中的位置"""
+        return option.rect.adjusted(4, 2, -4, -2)
+    
+    def paint(self, painter, option, index):
+        button = QStyleOptionButton()
+        button.rect = self._button_rect(option)
+        button.text = self.text
+        button.state = QStyle.State_Enabled
+        if self._pressed == (index.row(), index.column()):
+            button.state |= QStyle.State_Sunken
+        else:
+            button.state |= QStyle.State_Raised
+        style = option.widget.style() if option.widget is not None else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+    
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonPress and event.button() == Qt.LeftButton:
+            if self._button_rect(option).contains(event.pos()):
+                self._pressed = (index.row(), index.column())
+                return True
+        elif event.type() == QEvent.MouseButtonRelease and self._pressed is not None:
+            pressed, self._pressed = self._pressed, None
+            if pressed == (index.row(), index.column()) and self._button_rect(option).contains(event.pos()):
+                self.clicked.emit(index.row())
+            return True
+        return False
@@ -0,0 +1,488 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+报价单存档模块
+把保存的报价单文件收录到本地SQLite数据库，按保存日期、总价以及球体和法兰的种类、型号建立索引，
+查询时不需要逐个打开报价单文件。查询结果按保存时间从新到旧分页返回。
+
+用法:
+    python quotation_archive.py add 报价单目录 a.json
+    python quotation_archive.py search --sphere-model DN100 --from 2026-07-01 --to 2026-09-30
+    python quotation_archive.py search --min-total 10000 --after 120
+    python quotation_archive.py show 120
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+from datetime import date, datetime, timedelta
+
+from models import QUOTATION_ITEM_KEYS, find_quotation_files, read_quotation_document, to_cents
+
+
+# 默认的报价单存档数据库文件
+ARCHIVE_FILE = os.path.join("data", "quotation_archive.db")
+
+# 每页返回的报价单数
+PAGE_SIZE = 50
+
+# 批量收录时每收录多少个文件提交一次
+COMMIT_INTERVAL = 100
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quotations (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    saved_at TEXT NOT NULL,
+    total_cents INTEGER NOT NULL,
+    item_count INTEGER NOT NULL,
+    file_size INTEGER NOT NULL,
+    file_mtime REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_quotations_saved_at
+    ON quotations (saved_at, id);
+CREATE INDEX IF NOT EXISTS idx_quotations_total
+    ON quotations (total_cents);
+CREATE TABLE IF NOT EXISTS quotation_lines (
+    quotation_id INTEGER NOT NULL,
+    line INTEGER NOT NULL,
+    sphere_type TEXT NOT NULL,
+    sphere_model TEXT NOT NULL,
+    flange_type TEXT NOT NULL,
+    flange_model TEXT NOT NULL,
+    flange_quantity INTEGER NOT NULL,
+    joint_quantity INTEGER NOT NULL,
+    sphere_price REAL NOT NULL,
+    flange_price REAL NOT NULL,
+    joint_price REAL NOT NULL,
+    total_price REAL NOT NULL,
+    PRIMARY KEY (quotation_id, line)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_quotation_lines_sphere
+    ON quotation_lines (sphere_model, sphere_type);
+CREATE INDEX IF NOT EXISTS idx_quotation_lines_sphere_type
+    ON quotation_lines (sphere_type);
+CREATE INDEX IF NOT EXISTS idx_quotation_lines_flange
+    ON quotation_lines (flange_model, flange_type);
+CREATE INDEX IF NOT EXISTS idx_quotation_lines_flange_type
+    ON quotation_lines (flange_type);
+"""
+
+# 报价项目字段与 quotation_lines 列的对应关系，顺序与 QUOTATION_ITEM_KEYS 相同
+LINE_COLUMNS = ("sphere_type", "sphere_model", "flange_type", "flange_model",
+                "flange_quantity", "joint_quantity", "sphere_price", "flange_price",
+                "joint_price", "total_price")
+
+# 支持的查询条件，按产品种类和型号筛选的条件与 quotation_lines 的列同名
+CRITERIA = ("date_from", "date_to", "min_total", "max_total",
+            "sphere_type", "sphere_model", "flange_type", "flange_model")
+
+
+def _parse_date(value):
+    """
+    解析查询条件中的日期
+    
+    Args:
+        value: date 对象或 YYYY-MM-DD 格式的字符串
+        
+    Returns:
+        date: 日期，格式错误时抛出 ValueError
+    """
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"日期格式错误: {value}，应为 YYYY-MM-DD") from None
+
+
+def _saved_at(save_date, file_mtime):
+    """
+    确定报价单的保存时间，文件中没有有效的保存时间时使用文件修改时间
+    
+    Args:
+        save_date (str): 报价单文件中的保存时间
+        file_mtime (float): 文件修改时间
+        
+    Returns:
+        str: ISO格式的保存时间
+    """
+    if save_date:
+        try:
+            return datetime.fromisoformat(save_date).isoformat()
+        except ValueError:
+            pass
+    return datetime.fromtimestamp(file_mtime).isoformat()
+
+
+class QuotationArchive:
+    """报价单存档，保存报价单的汇总信息和全部报价项目"""
+    
+    def __init__(self, db_path=ARCHIVE_FILE):
+        """
+        打开报价单存档，数据库不存在时自动创建
+        
+        Args:
+            db_path (str): 数据库文件路径
+        """
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+    
+    def add_file(self, file_path):
+        """
+        把报价单文件收录到存档，文件已收录且未修改时跳过
+        
+        Args:
+            file_path (str): 报价单文件路径
+            
+        Returns:
+            str: "added"、"updated" 或 "unchanged"，文件格式错误时抛出 ValueError
+        """
+        status = self._add_file(file_path)
+        self.conn.commit()
+        return status
+    
+    def add_files(self, file_paths):
+        """
+        批量收录报价单文件，每个文件的错误不影响其他文件
+        
+        Args:
+            file_paths (list): 报价单文件路径列表
+            
+        Yields:
+            dict: 每个文件的处理结果，包含文件路径、状态和错误信息
+        """
+        try:
+            for count, file_path in enumerate(file_paths, 1):
+                result = {"source": file_path, "status": None, "error": None}
+                try:
+                    result["status"] = self._add_file(file_path)
+                except (OSError, ValueError, sqlite3.Error) as e:
+                    result["error"] = str(e)
+                if count % COMMIT_INTERVAL == 0:
+                    self.conn.commit()
+                yield result
+        finally:
+            self.conn.commit()
+    
+    def _add_file(self, file_path):
+        """收录报价单文件，不提交事务"""
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        row = self.conn.execute(
+            "SELECT id, file_size, file_mtime FROM quotations WHERE path = ?", (path,)
+        ).fetchone()
+        if row is not None and row[1] == stat.st_size and row[2] == stat.st_mtime:
+            return "unchanged"
+        
+        # 先读取并验证整个文件，格式错误时不修改存档
+        items, total_cents, save_date = read_quotation_document(path)
+        values = (_saved_at(save_date, stat.st_mtime), total_cents, len(items),
+                  stat.st_size, stat.st_mtime)
+        
+        # 每个文件在单独的保存点中写入，写入失败时只撤销该文件的修改
+        if not self.conn.in_transaction:
+            self.conn.execute("BEGIN")
+        self.conn.execute("SAVEPOINT add_file")
+        try:
+            if row is None:
+                cursor = self.conn.execute(
+                    "INSERT INTO quotations (saved_at, total_cents, item_count, file_size, file_mtime, path) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    values + (path,)
+                )
+                quotation_id = cursor.lastrowid
+            else:
+                quotation_id = row[0]
+                self.conn.execute(
+                    "UPDATE quotations SET saved_at = ?, total_cents = ?, item_count = ?, "
+                    "file_size = ?, file_mtime = ? WHERE id = ?",
+                    values + (quotation_id,)
+                )
+                self.conn.execute("DELETE FROM quotation_lines WHERE quotation_id = ?", (quotation_id,))
+            
+            self.conn.executemany(
+                f"INSERT INTO quotation_lines (quotation_id, line, {', '.join(LINE_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * (len(LINE_COLUMNS) + 2))})",
+                ((quotation_id, line) + tuple(item[key] for key in QUOTATION_ITEM_KEYS)
+                 for line, item in enumerate(items))
+            )
+        except sqlite3.Error:
+            self.conn.execute("ROLLBACK TO add_file")
+            self.conn.execute("RELEASE add_file")
+            raise
+        self.conn.execute("RELEASE add_file")
+        return "added" if row is None else "updated"
+    
+    def remove(self, quotation_id):
+        """
+        从存档中删除报价单，不删除报价单文件
+        
+        Args:
+            quotation_id (int): 报价单编号
+            
+        Returns:
+            bool: 是否删除成功
+        """
+        try:
+            self.conn.execute("DELETE FROM quotation_lines WHERE quotation_id = ?", (quotation_id,))
+            cursor = self.conn.execute("DELETE FROM quotations WHERE id = ?", (quotation_id,))
+            self.conn.commit()
+            return cursor.rowcount > 0
+        except Exception as e:
+            self.conn.rollback()
+            print(f"删除存档报价单失败: {e}")
+            return False
+    
+    @staticmethod
+    def _where(criteria):
+        """
+        把查询条件转换为SQL条件
+        
+        Args:
+            criteria (dict): 查询条件，值为None或空字符串的条件被忽略
+            
+        Returns:
+            tuple: (条件表达式列表, 参数列表)，条件无效时抛出 ValueError
+        """
+        unknown = set(criteria) - set(CRITERIA)
+        if unknown:
+            raise ValueError(f"不支持的查询条件: {', '.join(sorted(unknown))}")
+        
+        clauses = []
+        params = []
+        if criteria.get("date_from"):
+            clauses.append("q.saved_at >= ?")
+            params.append(_parse_date(criteria["date_from"]).isoformat())
+        if criteria.get("date_to"):
+            # 结束日期包含当天
+            clauses.append("q.saved_at < ?")
+            params.append((_parse_date(criteria["date_to"]) + timedelta(days=1)).isoformat())
+        if criteria.get("min_total") is not None:
+            clauses.append("q.total_cents >= ?")
+            params.append(to_cents(criteria["min_total"]))
+        if criteria.get("max_total") is not None:
+            clauses.append("q.total_cents <= ?")
+            params.append(to_cents(criteria["max_total"]))
+        
+        # 同一类产品的种类和型号条件必须由同一个报价项目满足
+        for kind in ("sphere", "flange"):
+            line_clauses = []
+            for name in (f"{kind}_type", f"{kind}_model"):
+                if criteria.get(name):
+                    line_clauses.append(f"{name} = ?")
+                    params.append(criteria[name])
+            if line_clauses:
+                clauses.append(
+                    "q.id IN (SELECT quotation_id FROM quotation_lines WHERE "
+                    + " AND ".join(line_clauses) + ")"
+                )
+        return clauses, params
+    
+    def search(self, limit=PAGE_SIZE, after=None, **criteria):
+        """
+        按条件查询报价单，结果按保存时间从新到旧排列
+        
+        Args:
+            limit (int): 最多返回的报价单数
+            after (int): 上一页最后一份报价单的编号，为None时返回第一页
+            **criteria: 查询条件，date_from/date_to 为保存日期范围(YYYY-MM-DD，包含两端)，
+                min_total/max_total 为总价范围(元)，sphere_type/sphere_model/flange_type/flange_model
+                为报价单中至少一个项目的产品种类和型号
+                
+        Returns:
+            list: 报价单汇总信息列表，每项包含 id、path、saved_at、total_price 和 item_count
+        """
+        clauses, params = self._where(criteria)
+        if after is not None:
+            # 按 (保存时间, 编号) 翻页，每页的查询时间与页码无关
+            clauses.append("(q.saved_at, q.id) < (SELECT saved_at, id FROM quotations WHERE id = ?)")
+            params.append(after)
+        
+        sql = "SELECT q.id, q.path, q.saved_at, q.total_cents, q.item_count FROM quotations q"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY q.saved_at DESC, q.id DESC LIMIT ?"
+        params.append(limit)
+        
+        return [
+            {"id": quotation_id, "path": path, "saved_at": saved_at,
+             "total_price": total_cents / 100, "item_count": item_count}
+            for quotation_id, path, saved_at, total_cents, item_count in self.conn.execute(sql, params)
+        ]
+    
+    def count(self, **criteria):
+        """
+        统计符合条件的报价单数
+        
+        Args:
+            **criteria: 与 search() 相同的查询条件
+            
+        Returns:
+            int: 报价单数
+        """
+        clauses, params = self._where(criteria)
+        sql = "SELECT COUNT(*) FROM quotations q"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        return self.conn.execute(sql, params).fetchone()[0]
+    
+    def get_items(self, quotation_id):
+        """
+        获取存档报价单的全部报价项目
+        
+        Args:
+            quotation_id (int): 报价单编号
+            
+        Returns:
+            list: 报价项目列表，字段与报价单文件相同，报价单不存在时为空
+        """
+        rows = self.conn.execute(
+            f"SELECT {', '.join(LINE_COLUMNS)} FROM quotation_lines "
+            "WHERE quotation_id = ? ORDER BY line",
+            (quotation_id,)
+        )
+        return [dict(zip(QUOTATION_ITEM_KEYS, row)) for row in rows]
+    
+    def reprice(self, changes):
+        """
+        按新的产品价格计算存档中哪些报价单的总价会发生变化
+        
+        通过种类和型号索引只读取受影响的报价项目。只报告受影响的报价单，不修改存档，
+        也不修改原报价单文件，存档始终与原文件一致。
+        
+        Args:
+            changes (list): (类别, 种类, 型号, 新价格) 列表，类别为 "sphere" 或 "flange"
+            
+        Returns:
+            list: 受调价影响的报价单，每项包含 id、path、lines(变化的项目数)、old_total 和 new_total
+        """
+        # 新价格(分)：(类别, 种类, 型号) -> 价格
+        prices = {}
+        for kind, product_type, model, price in changes:
+            if kind not in ("sphere", "flange"):
+                raise ValueError(f"不支持的产品类别: {kind}")
+            prices[(kind, product_type, model)] = to_cents(price)
+        
+        # 先通过索引收集受影响的报价项目，同时引用多个调价产品的项目只处理一次
+        affected = {}  # (报价单编号, 项目序号) -> 项目的种类、型号、价格和数量
+        for kind, product_type, model in prices:
+            rows = self.conn.execute(
+                "SELECT quotation_id, line, sphere_type, sphere_model, flange_type, flange_model, "
+                "sphere_price, flange_price, flange_quantity, joint_quantity, total_price "
+                f"FROM quotation_lines WHERE {kind}_model = ? AND {kind}_type = ?",
+                (model, product_type)
+            )
+            for row in rows:
+                affected[row[:2]] = row[2:]
+        
+        deltas = {}  # 报价单编号 -> [变化的项目数, 总价变化(分)]
+        for (quotation_id, line), row in affected.items():
+            (sphere_type, sphere_model, flange_type, flange_model, sphere_price, flange_price,
+             flange_quantity, joint_quantity, total_price) = row
+            old_sphere_cents = to_cents(sphere_price)
+            old_flange_cents = to_cents(flange_price)
+            sphere_cents = prices.get(("sphere", sphere_type, sphere_model), old_sphere_cents)
+            flange_cents = prices.get(("flange", flange_type, flange_model), old_flange_cents)
+            if sphere_cents == old_sphere_cents and flange_cents == old_flange_cents:
+                continue
+            item_cents = (sphere_cents + flange_cents * flange_quantity) * joint_quantity
+            delta = deltas.setdefault(quotation_id, [0, 0])
+            delta[0] += 1
+            delta[1] += item_cents - to_cents(total_price)
+        
+        report = []
+        for quotation_id, (lines, delta_cents) in deltas.items():
+            path, total_cents = self.conn.execute(
+                "SELECT path, total_cents FROM quotations WHERE id = ?", (quotation_id,)
+            ).fetchone()
+            report.append({"id": quotation_id, "path": path, "lines": lines,
+                           "old_total": total_cents / 100, "new_total": (total_cents + delta_cents) / 100})
+        return report
+    
+    def close(self):
+        """提交修改并关闭数据库连接"""
+        self.conn.commit()
+        self.conn.close()
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="橡胶接头报价单存档工具")
+    parser.add_argument("--db", default=ARCHIVE_FILE, help=f"存档数据库文件 (默认: {ARCHIVE_FILE})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    add_parser = subparsers.add_parser("add", help="收录报价单文件")
+    add_parser.add_argument("inputs", nargs="+", help="报价单JSON文件或包含报价单文件的目录")
+    
+    search_parser = subparsers.add_parser("search", help="查询报价单")
+    search_parser.add_argument("--from", dest="date_from", help="起始保存日期 YYYY-MM-DD")
+    search_parser.add_argument("--to", dest="date_to", help="结束保存日期 YYYY-MM-DD (包含当天)")
+    search_parser.add_argument("--min-total", type=float, help="最低总价(元)")
+    search_parser.add_argument("--max-total", type=float, help="最高总价(元)")
+    search_parser.add_argument("--sphere-type", help="球体种类")
+    search_parser.add_argument("--sphere-model", help="球体型号")
+    search_parser.add_argument("--flange-type", help="法兰种类")
+    search_parser.add_argument("--flange-model", help="法兰型号")
+    search_parser.add_argument("--limit", type=int, default=PAGE_SIZE,
+                               help=f"每页报价单数 (默认: {PAGE_SIZE})")
+    search_parser.add_argument("--after", type=int, help="从该编号之后的报价单开始显示下一页")
+    
+    show_parser = subparsers.add_parser("show", help="显示存档报价单的报价项目")
+    show_parser.add_argument("id", type=int, help="报价单编号")
+    args = parser.parse_args()
+    
+    archive = QuotationArchive(args.db)
+    try:
+        if args.command == "add":
+            counts = {"added": 0, "updated": 0, "unchanged": 0}
+            failed = 0
+            for result in archive.add_files(find_quotation_files(args.inputs, recursive=True)):
+                if result["error"]:
+                    failed += 1
+                    print(f"{result['source']}: 失败: {result['error']}", file=sys.stderr)
+                else:
+                    counts[result["status"]] += 1
+            print(f"完成: 新增 {counts['added']} 份, 更新 {counts['updated']} 份, "
+                  f"未修改 {counts['unchanged']} 份, 失败 {failed} 份")
+            return 1 if failed else 0
+        
+        if args.command == "show":
+            items = archive.get_items(args.id)
+            if not items:
+                print(f"存档中没有编号为 {args.id} 的报价单", file=sys.stderr)
+                return 1
+            for index, item in enumerate(items, 1):
+                print(f"{index}. 球体: {item['sphereType']} - {item['sphereModel']}  "
+                      f"法兰: {item['flangeType']} - {item['flangeModel']}  "
+                      f"法兰数量: {item['flangeQuantity']}  接头数量: {item['jointQuantity']}  "
+                      f"单价: {item['jointPrice']:.2f}元  小计: {item['totalPrice']:.2f}元")
+            return 0
+        
+        criteria = {name: getattr(args, name) for name in CRITERIA}
+        try:
+            total = archive.count(**criteria)
+            results = archive.search(args.limit, args.after, **criteria)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+        for result in results:
+            print(f"{result['id']:>6}  {result['saved_at'][:19].replace('T', ' ')}  "
+                  f"{result['total_price']:>12.2f}元  {result['item_count']:>5} 项  {result['path']}")
+        print(f"共 {total} 份报价单")
+        if len(results) == args.limit:
+            print(f"下一页: --after {results[-1]['id']}")
+        return 0
+    finally:
+        archive.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,35 +7,59 @@
 """
 
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-                            QLineEdit, QPushButton, QComboBox, QTableWidget,
-                            QTableWidgetItem, QHeaderView, QMessageBox,
+                            QLineEdit, QPushButton, QComboBox, QTableView,
+                            QHeaderView, QMessageBox,
                             QFileDialog, QGroupBox, QSpinBox, QDoubleSpinBox,
-                            QFormLayout)
+                            QFormLayout, QProgressDialog, QDialog, QTextBrowser)
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QFont
 import json
 import os
-from datetime import datetime
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
+
+from archive_dialog import QuotationArchiveDialog
+from model_completer import ModelCompleter
+from model_search import ModelSearchIndex
+from pdf_worker import QuotationPDFWorker
+from quotation_archive import QuotationArchive
+from quotation_html import render_quotation, write_quotation
+from product_table import ButtonDelegate
+from quotation_pdf import create_quotation_pdf
+from quotation_table import QuotationTableModel
+
+
+# 型号下拉列表中最多列出的型号数，其余型号通过输入查找
+MODEL_COMBO_LIMIT = 200
+
+# 报价单预览最多显示的项目数
+PREVIEW_ITEM_LIMIT = 500
+
+# 生成报价单时可选的文件格式：文件类型过滤器 -> (扩展名, 格式)
+QUOTATION_FILE_FORMATS = {
+    "PDF文件 (*.pdf)": (".pdf", "pdf"),
+    "HTML文件 (*.html)": (".html", "html"),
+    "文本文件 (*.txt)": (".txt", "text"),
+}
 
 
 class QuotationCalculatorWidget(QWidget):
     """报价计算界面类"""
     
-    def __init__(self, product_model, quotation_model):
+    def __init__(self, product_model, quotation_model, search_index=None, quotation_archive=None):
         """
         初始化报价计算界面
         
         Args:
             product_model: 产品数据模型实例
             quotation_model: 报价单数据模型实例
+            search_index: 型号搜索索引，为None时自行创建
+            quotation_archive: 报价单存档，为None时自行打开默认存档
         """
         super().__init__()
         self.product_model = product_model
         self.quotation_model = quotation_model
+        self.search_index = search_index or ModelSearchIndex(product_model)
+        self.quotation_archive = quotation_archive or QuotationArchive()
+        self.pdf_worker = None  # 正在运行的报价单生成线程
         self.init_ui()
     
     def init_ui(self):
@@ -73,8 +97,8 @@ class QuotationCalculatorWidget(QWidget):
         self.sphere_type_combo.currentIndexChanged.connect(self.update_sphere_model_combo)
         sphere_form.addRow("球体种类:", self.sphere_type_combo)
         
-        # 球体型号选择
-        self.sphere_model_combo = QComboBox()
+        # 球体型号选择，可输入型号查找
+        self.sphere_model_combo = self.create_model_combo("sphere", self.sphere_type_combo)
         sphere_form.addRow("球体型号:", self.sphere_model_combo)
         
         # 法兰选择区域
@@ -85,8 +109,8 @@ class QuotationCalculatorWidget(QWidget):
         self.flange_type_combo.currentIndexChanged.connect(self.update_flange_model_combo)
         flange_form.addRow("法兰种类:", self.flange_type_combo)
         
-        # 法兰型号选择
-        self.flange_model_combo = QComboBox()
+        # 法兰型号选择，可输入型号查找
+        self.flange_model_combo = self.create_model_combo("flange", self.flange_type_combo)
         flange_form.addRow("法兰型号:", self.flange_model_combo)
         
         # 法兰数量选择
@@ -154,11 +178,20 @@ class QuotationCalculatorWidget(QWidget):
         group = QGroupBox("报价单明细")
         layout = QVBoxLayout()
         
-        # 报价单表格
-        self.quotation_table = QTableWidget(0, 8)
-        headers = ["序号", "球体信息", "法兰信息", "法兰数量", "接头数量", "单价(元)", "小计(元)", "操作"]
-        self.quotation_table.setHorizontalHeaderLabels(headers)
+        # 报价单表格，随报价单数据模型的变更通知逐行更新
+        self.quotation_table = QTableView()
+        self.quotation_table_model = QuotationTableModel(self.quotation_model, self.quotation_table)
+        self.quotation_table.setModel(self.quotation_table_model)
         self.quotation_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.quotation_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        
+        # 删除按钮由委托绘制，不为每行创建按钮控件
+        delete_delegate = ButtonDelegate("删除", self.quotation_table)
+        delete_delegate.clicked.connect(self.delete_quotation_item, Qt.QueuedConnection)
+        self.quotation_table.setItemDelegateForColumn(QuotationTableModel.ACTION_COLUMN, delete_delegate)
+        
+        # 报价项目变化时更新总价显示
+        self.quotation_model.add_listener(self.on_quotation_changed)
         
         # 总价显示
         total_layout = QHBoxLayout()
@@ -189,6 +222,10 @@ class QuotationCalculatorWidget(QWidget):
         clear_btn = QPushButton("清空报价单")
         clear_btn.clicked.connect(self.clear_quotation)
         
+        # 预览报价单按钮
+        preview_btn = QPushButton("预览报价单")
+        preview_btn.clicked.connect(self.preview_quotation)
+        
         # 生成报价单按钮
         generate_btn = QPushButton("生成报价单")
         generate_btn.clicked.connect(self.generate_quotation)
@@ -201,17 +238,40 @@ class QuotationCalculatorWidget(QWidget):
         load_btn = QPushButton("加载报价单数据")
         load_btn.clicked.connect(self.load_quotation_data)
         
+        # 报价单存档按钮
+        archive_btn = QPushButton("报价单存档")
+        archive_btn.clicked.connect(self.open_quotation_archive)
+        
         # 添加到布局
         layout.addWidget(clear_btn)
+        layout.addWidget(preview_btn)
         layout.addWidget(generate_btn)
         layout.addWidget(save_btn)
         layout.addWidget(load_btn)
+        layout.addWidget(archive_btn)
         
         # 设置组框布局
         group.setLayout(layout)
         
         return group
     
+    def create_model_combo(self, kind, type_combo):
+        """
+        创建可输入的型号下拉框，输入时从型号搜索索引中补全
+        
+        Args:
+            kind (str): 产品类别，"sphere" 或 "flange"
+            type_combo (QComboBox): 对应的种类下拉框
+            
+        Returns:
+            QComboBox: 型号下拉框
+        """
+        combo = QComboBox()
+        combo.setEditable(True)
+        combo.setInsertPolicy(QComboBox.NoInsert)
+        ModelCompleter(self.search_index, kind, type_combo.currentText, combo)
+        return combo
+    
     def update_type_combos(self):
         """更新所有类型选择框"""
         # 更新球体种类下拉框
@@ -232,7 +292,7 @@ class QuotationCalculatorWidget(QWidget):
         
         sphere_type = self.sphere_type_combo.currentText()
         if sphere_type:
-            models = self.product_model.get_sphere_models_by_type(sphere_type)
+            models = self.product_model.get_sphere_models_by_type(sphere_type, MODEL_COMBO_LIMIT)
             self.sphere_model_combo.addItems(models)
     
     def update_flange_model_combo(self):
@@ -241,24 +301,42 @@ class QuotationCalculatorWidget(QWidget):
         
         flange_type = self.flange_type_combo.currentText()
         if flange_type:
-            models = self.product_model.get_flange_models_by_type(flange_type)
+            models = self.product_model.get_flange_models_by_type(flange_type, MODEL_COMBO_LIMIT)
             self.flange_model_combo.addItems(models)
     
-    def calculate_current_price(self):
-        """计算当前配置的接头单价"""
-        # 检查是否已选择所有必要的项目
-        if (self.sphere_type_combo.count() == 0 or
-            self.sphere_model_combo.count() == 0 or
-            self.flange_type_combo.count() == 0 or
-            self.flange_model_combo.count() == 0):
-            QMessageBox.warning(self, "警告", "请确保已选择球体和法兰的种类及型号")
-            return
+    def selected_configuration(self):
+        """
+        获取选择的球体和法兰，型号不存在时提示用户
         
-        # 获取选择的配置
+        Returns:
+            tuple: (球体种类, 球体型号, 法兰种类, 法兰型号)，选择不完整或型号不存在时返回None
+        """
         sphere_type = self.sphere_type_combo.currentText()
-        sphere_model = self.sphere_model_combo.currentText()
+        sphere_model = self.sphere_model_combo.currentText().strip()
         flange_type = self.flange_type_combo.currentText()
-        flange_model = self.flange_model_combo.currentText()
+        flange_model = self.flange_model_combo.currentText().strip()
+        
+        # 检查是否已选择所有必要的项目
+        if not (sphere_type and sphere_model and flange_type and flange_model):
+            QMessageBox.warning(self, "警告", "请确保已选择球体和法兰的种类及型号")
+            return None
+        
+        # 型号可以手动输入，需要确认型号存在
+        if not self.product_model.has_sphere_model(sphere_type, sphere_model):
+            QMessageBox.warning(self, "警告", f"球体种类 {sphere_type} 中没有型号 {sphere_model}")
+            return None
+        if not self.product_model.has_flange_model(flange_type, flange_model):
+            QMessageBox.warning(self, "警告", f"法兰种类 {flange_type} 中没有型号 {flange_model}")
+            return None
+        return sphere_type, sphere_model, flange_type, flange_model
+    
+    def calculate_current_price(self):
+        """计算当前配置的接头单价"""
+        # 获取并检查选择的配置
+        selection = self.selected_configuration()
+        if selection is None:
+            return
+        sphere_type, sphere_model, flange_type, flange_model = selection
         flange_quantity = self.flange_quantity_spin.value()
         
         # 计算接头单价
@@ -271,88 +349,39 @@ class QuotationCalculatorWidget(QWidget):
     
     def add_to_quotation(self):
         """将当前配置添加到报价单"""
-        # 检查是否已选择所有必要的项目
-        if (self.sphere_type_combo.count() == 0 or
-            self.sphere_model_combo.count() == 0 or
-            self.flange_type_combo.count() == 0 or
-            self.flange_model_combo.count() == 0):
-            QMessageBox.warning(self, "警告", "请确保已选择球体和法兰的种类及型号")
+        # 获取并检查选择的配置
+        selection = self.selected_configuration()
+        if selection is None:
             return
-        
-        # 获取选择的配置
-        sphere_type = self.sphere_type_combo.currentText()
-        sphere_model = self.sphere_model_combo.currentText()
-        flange_type = self.flange_type_combo.currentText()
-        flange_model = self.flange_model_combo.currentText()
+        sphere_type, sphere_model, flange_type, flange_model = selection
         flange_quantity = self.flange_quantity_spin.value()
         joint_quantity = self.joint_quantity_spin.value()
         
-        # 添加到报价单
+        # 添加到报价单，表格和总价通过变更通知更新
         item_total = self.quotation_model.add_item(
             sphere_type, sphere_model, flange_type, flange_model, flange_quantity, joint_quantity
         )
         
-        # 更新报价单显示
-        self.update_quotation_table()
-        
-        # 更新总价显示
-        self.total_price_label.setText(f"{self.quotation_model.total_price:.2f}")
-        
         QMessageBox.information(self, "成功", f"已添加到报价单，小计: {item_total:.2f}元")
     
     def update_quotation_table(self):
-        """更新报价单表格"""
-        self.quotation_table.setRowCount(0)
-        
-        for i, item in enumerate(self.quotation_model.quotation_items):
-            self.quotation_table.insertRow(i)
-            
-            # 序号
-            index_item = QTableWidgetItem(str(i + 1))
-            
-            # 球体信息
-            sphere_info = f"{item['sphereType']} - {item['sphereModel']}"
-            sphere_item = QTableWidgetItem(sphere_info)
-            
-            # 法兰信息
-            flange_info = f"{item['flangeType']} - {item['flangeModel']}"
-            flange_item = QTableWidgetItem(flange_info)
-            
-            # 法兰数量
-            flange_quantity_item = QTableWidgetItem(str(item['flangeQuantity']))
-            
-            # 接头数量
-            joint_quantity_item = QTableWidgetItem(str(item['jointQuantity']))
-            
-            # 单价
-            price_item = QTableWidgetItem(f"{item['jointPrice']:.2f}")
-            
-            # 小计
-            total_item = QTableWidgetItem(f"{item['totalPrice']:.2f}")
-            
-            # 添加表格项
-            self.quotation_table.setItem(i, 0, index_item)
-            self.quotation_table.setItem(i, 1, sphere_item)
-            self.quotation_table.setItem(i, 2, flange_item)
-            self.quotation_table.setItem(i, 3, flange_quantity_item)
-            self.quotation_table.setItem(i, 4, joint_quantity_item)
-            self.quotation_table.setItem(i, 5, price_item)
-            self.quotation_table.setItem(i, 6, total_item)
-            
-            # 添加删除按钮
-            delete_btn = QPushButton("删除")
-            delete_btn.clicked.connect(lambda checked, idx=i: self.delete_quotation_item(idx))
-            
-            self.quotation_table.setCellWidget(i, 7, delete_btn)
+        """重新显示整个报价单表格"""
+        self.quotation_table_model.on_items_changed("reset", None)
+        self.total_price_label.setText(f"{self.quotation_model.total_price:.2f}")
+    
+    def on_quotation_changed(self, change, index):
+        """
+        报价项目变更通知，更新总价显示
         
-        # 更新总价显示
+        Args:
+            change (str): 变更类型
+            index (int): 变更的项目索引
+        """
         self.total_price_label.setText(f"{self.quotation_model.total_price:.2f}")
     
     def delete_quotation_item(self, index):
         """删除报价单项目"""
-        if self.quotation_model.delete_item(index):
-            self.update_quotation_table()
-        else:
+        if not self.quotation_model.delete_item(index):
             QMessageBox.warning(self, "警告", "删除报价单项目失败")
     
     def clear_quotation(self):
@@ -366,7 +395,6 @@ class QuotationCalculatorWidget(QWidget):
         
         if reply == QMessageBox.Yes:
             self.quotation_model.clear_items()
-            self.update_quotation_table()
             QMessageBox.information(self, "成功", "已清空报价单")
     
     def save_quotation_data(self):
@@ -382,6 +410,11 @@ class QuotationCalculatorWidget(QWidget):
                 file_path += ".json"
             
             if self.quotation_model.save_quotation(file_path):
+                # 保存的报价单自动收录到存档，收录失败不影响保存结果
+                try:
+                    self.quotation_archive.add_file(file_path)
+                except Exception as e:
+                    print(f"收录报价单到存档失败: {e}")
                 QMessageBox.information(self, "成功", f"报价单数据已保存到 {file_path}")
             else:
                 QMessageBox.warning(self, "警告", "保存报价单数据失败")
@@ -397,28 +430,126 @@ class QuotationCalculatorWidget(QWidget):
             
             if reply == QMessageBox.Yes:
                 if self.quotation_model.load_quotation(file_path):
-                    self.update_quotation_table()
                     QMessageBox.information(self, "成功", "报价单数据加载成功")
                 else:
                     QMessageBox.warning(self, "警告", "加载报价单数据失败，请检查文件格式是否正确")
     
+    def open_quotation_archive(self):
+        """打开报价单存档，把选中的存档报价单加载到当前报价单"""
+        dialog = QuotationArchiveDialog(self.quotation_archive, self)
+        if dialog.exec_() != QDialog.Accepted or dialog.selected_items is None:
+            return
+        
+        if self.quotation_model.quotation_items:
+            reply = QMessageBox.question(self, "确认加载",
+                                         "加载存档报价单将覆盖当前报价单，确定要继续吗？",
+                                         QMessageBox.Yes | QMessageBox.No)
+            if reply != QMessageBox.Yes:
+                return
+        
+        self.quotation_model.load_items(dialog.selected_items)
+    
+    def preview_quotation(self):
+        """以HTML格式预览报价单，项目很多时只显示前面的部分项目"""
+        if len(self.quotation_model.quotation_items) == 0:
+            QMessageBox.warning(self, "警告", "报价单为空，无法预览")
+            return
+        
+        html = render_quotation(self.quotation_model.quotation_items, self.quotation_model.total_price,
+                                "html", PREVIEW_ITEM_LIMIT)
+        
+        dialog = QDialog(self)
+        dialog.setWindowTitle("报价单预览")
+        dialog.resize(800, 600)
+        layout = QVBoxLayout(dialog)
+        browser = QTextBrowser()
+        browser.setHtml(html)
+        layout.addWidget(browser)
+        close_btn = QPushButton("关闭")
+        close_btn.clicked.connect(dialog.accept)
+        layout.addWidget(close_btn, alignment=Qt.AlignRight)
+        dialog.exec_()
+    
     def generate_quotation(self):
         """生成报价单"""
         if len(self.quotation_model.quotation_items) == 0:
             QMessageBox.warning(self, "警告", "报价单为空，无法生成")
             return
         
-        file_path, _ = QFileDialog.getSaveFileName(self, "保存报价单", "", "PDF文件 (*.pdf)")
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "保存报价单", "", ";;".join(QUOTATION_FILE_FORMATS))
         
         if file_path:
-            if not file_path.endswith(".pdf"):
-                file_path += ".pdf"
+            extension, output_format = QUOTATION_FILE_FORMATS.get(selected_filter, (".pdf", "pdf"))
+            if not file_path.endswith(extension):
+                file_path += extension
+            
+            # HTML和文本报价单生成很快，直接写入文件
+            if output_format != "pdf":
+                try:
+                    write_quotation(file_path, self.quotation_model.quotation_items,
+                                    self.quotation_model.total_price, output_format)
+                    QMessageBox.information(self, "成功", f"报价单已生成: {file_path}")
+                except Exception as e:
+                    QMessageBox.warning(self, "警告", f"生成报价单失败: {e}")
+                return
+            
+            if self.pdf_worker is not None:
+                QMessageBox.warning(self, "警告", "正在生成PDF报价单，请等待完成或取消后再试")
+                return
             
-            try:
-                self.create_quotation_pdf(file_path)
-                QMessageBox.information(self, "成功", f"报价单已生成: {file_path}")
-            except Exception as e:
-                QMessageBox.warning(self, "警告", f"生成报价单失败: {e}")
+            # 在后台线程中按当前报价单的快照生成，生成期间可以继续编辑报价单
+            quotation_items, total_price = self.quotation_model.snapshot()
+            self.start_pdf_generation(file_path, quotation_items, total_price)
+    
+    def start_pdf_generation(self, file_path, quotation_items, total_price):
+        """
+        启动后台报价单生成线程并显示进度
+        
+        Args:
+            file_path (str): 保存文件路径
+            quotation_items (tuple): 报价项目快照
+            total_price (float): 报价单总价
+        """
+        worker = QuotationPDFWorker(file_path, quotation_items, total_price, self)
+        
+        progress = QProgressDialog("正在生成报价单...", "取消", 0, 1000, self)
+        progress.setWindowTitle("生成报价单")
+        progress.setWindowModality(Qt.NonModal)
+        progress.setMinimumDuration(500)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
+        
+        def update_progress(done, total):
+            if total > 0:
+                progress.setValue(done * 1000 // total)
+        
+        def cancel():
+            progress.setLabelText("正在取消...")
+            worker.cancel()
+        
+        def cleanup():
+            progress.close()
+            progress.deleteLater()
+            worker.deleteLater()
+            self.pdf_worker = None
+        
+        worker.progress.connect(update_progress)
+        progress.canceled.connect(cancel)
+        worker.succeeded.connect(
+            lambda path: QMessageBox.information(self, "成功", f"报价单已生成: {path}"))
+        worker.failed.connect(
+            lambda message: QMessageBox.warning(self, "警告", f"生成报价单失败: {message}"))
+        worker.finished.connect(cleanup)
+        
+        self.pdf_worker = worker
+        worker.start()
+    
+    def cancel_pdf_generation(self):
+        """取消正在进行的报价单生成并等待线程结束"""
+        if self.pdf_worker is not None:
+            self.pdf_worker.cancel()
+            self.pdf_worker.wait()
     
     def create_quotation_pdf(self, file_path):
         """
@@ -427,81 +558,5 @@ class QuotationCalculatorWidget(QWidget):
         Args:
             file_path (str): 保存文件路径
         """
-        # 创建PDF文档
-        doc = SimpleDocTemplate(file_path, pagesize=A4)
-        elements = []
-        
-        # 获取样式
-        styles = getSampleStyleSheet()
-        title_style = styles["Title"]
-        normal_style = styles["Normal"]
-        
-        # 添加标题
-        elements.append(Paragraph("橡胶接头报价单", title_style))
-        elements.append(Spacer(1, 20))
-        
-        # 添加日期
-        date_text = f"日期: {datetime.now().strftime('%Y-%m-%d')}"
-        elements.append(Paragraph(date_text, normal_style))
-        elements.append(Spacer(1, 20))
-        
-        # 创建表格数据
-        table_data = [
-            ["序号", "球体信息", "法兰信息", "法兰数量", "接头数量", "单价(元)", "小计(元)"]
-        ]
-        
-        # 添加报价项目
-        for i, item in enumerate(self.quotation_model.quotation_items):
-            sphere_info = f"{item['sphereType']} - {item['sphereModel']}"
-            flange_info = f"{item['flangeType']} - {item['flangeModel']}"
-            
-            row = [
-                str(i + 1),
-                sphere_info,
-                flange_info,
-                str(item['flangeQuantity']),
-                str(item['jointQuantity']),
-                f"{item['jointPrice']:.2f}",
-                f"{item['totalPrice']:.2f}"
-            ]
-            
-            table_data.append(row)
-        
-        # 添加总计行
-        total_row = ["", "", "", "", "", "总计", f"{self.quotation_model.total_price:.2f}"]
-        table_data.append(total_row)
-        
-        # 创建表格
-        table = Table(table_data)
-        
-        # 设置表格样式
-        style = TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 12),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, -1), (-1, -1), colors.beige),
-            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-            ('ALIGN', (0, -1), (-1, -1), 'RIGHT'),
-            ('GRID', (0, 0), (-1, -2), 1, colors.black),
-            ('GRID', (-2, -1), (-1, -1), 1, colors.black),
-            ('ALIGN', (0, 1), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')
-        ])
-        
-        table.setStyle(style)
-        
-        # 添加表格到文档
-        elements.append(table)
-        
-        # 添加备注
-        elements.append(Spacer(1, 30))
-        elements.append(Paragraph("备注:", normal_style))
-        elements.append(Paragraph("1. 价格单位为人民币元。", normal_style))
-        elements.append(Paragraph("2. 报价单有效期为30天。", normal_style))
-        elements.append(Paragraph("3. 如有疑问，请联系我们。", normal_style))
-        
-        # 构建PDF
-        doc.build(elements)
\ No newline at end of file
+        create_quotation_pdf(file_path, self.quotation_model.quotation_items,
+                             self.quotation_model.total_price)
\ No newline at end of file
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+报价单HTML和文本生成模块
+使用Jinja2模板生成HTML或纯文本格式的报价单，用于快速预览以及邮件和网页发送。
+模板在每个进程中只编译一次，大报价单逐段生成并写入，不在内存中拼接完整内容。
+"""
+
+import threading
+from datetime import datetime
+
+from jinja2 import DictLoader, Environment, select_autoescape
+
+from models import TABLE_HEADERS
+
+
+# 报价单模板，文件扩展名为 .html 的模板自动转义HTML特殊字符
+QUOTATION_TEMPLATES = {
+    "quotation.html": """\
+<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="utf-8">
+<title>橡胶接头报价单</title>
+<style>
+body { font-family: "Microsoft YaHei", "SimHei", sans-serif; margin: 24px; }
+h1 { text-align: center; }
+table { border-collapse: collapse; width: 100%; }
+th, td { border: 1px solid #000; padding: 4px 6px; text-align: center; }
+th { background: #808080; color: #f5f5f5; }
+tr.total td { background: #f5f5dc; font-weight: bold; }
+</style>
+</head>
+<body>
+<h1>橡胶接头报价单</h1>
+<p>日期: {{ date }}</p>
+<table>
+<thead>
+<tr>{% for header in headers %}<th>{{ header }}</th>{% endfor %}</tr>
+</thead>
+<tbody>
+{% for item in items %}
+<tr><td>{{ loop.index }}</td><td>{{ item["sphereType"] }} - {{ item["sphereModel"] }}</td><td>{{ item["flangeType"] }} - {{ item["flangeModel"] }}</td><td>{{ item["flangeQuantity"] }}</td><td>{{ item["jointQuantity"] }}</td><td>{{ "%.2f"|format(item["jointPrice"]) }}</td><td>{{ "%.2f"|format(item["totalPrice"]) }}</td></tr>
+{% endfor %}
+{% if item_count > items|length %}
+<tr><td colspan="7">共 {{ item_count }} 项，仅显示前 {{ items|length }} 项</td></tr>
+{% endif %}
+<tr class="total"><td colspan="5"></td><td>总计</td><td>{{ "%.2f"|format(total_price) }}</td></tr>
+</tbody>
+</table>
+<p>备注:</p>
+<ol>
+<li>价格单位为人民币元。</li>
+<li>报价单有效期为30天。</li>
+<li>如有疑问，请联系我们。</li>
+</ol>
+</body>
+</html>
+""",
+    "quotation.txt": """\
+橡胶接头报价单
+日期: {{ date }}
+
+{% for item in items %}
+{{ loop.index }}. 球体: {{ item["sphereType"] }} - {{ item["sphereModel"] }}  法兰: {{ item["flangeType"] }} - {{ item["flangeModel"] }}  法兰数量: {{ item["flangeQuantity"] }}  接头数量: {{ item["jointQuantity"] }}  单价: {{ "%.2f"|format(item["jointPrice"]) }}元  小计: {{ "%.2f"|format(item["totalPrice"]) }}元
+{% endfor %}
+{% if item_count > items|length %}
+... 共 {{ item_count }} 项，仅显示前 {{ items|length }} 项
+{% endif %}
+
+总计: {{ "%.2f"|format(total_price) }}元
+
+备注:
+1. 价格单位为人民币元。
+2. 报价单有效期为30天。
+3. 如有疑问，请联系我们。
+""",
+}
+
+# 输出格式对应的模板
+QUOTATION_FORMATS = {"html": "quotation.html", "text": "quotation.txt"}
+
+# 写入文件时每次合并写入的模板片段数
+STREAM_BUFFER_SIZE = 256
+
+# 每个进程共用的模板环境
+_environment = None
+_environment_lock = threading.Lock()
+
+
+def get_environment():
+    """
+    获取当前进程共用的模板环境，第一次调用时创建并编译全部报价单模板
+    
+    Returns:
+        Environment: Jinja2模板环境
+    """
+    global _environment
+    with _environment_lock:
+        if _environment is None:
+            environment = Environment(
+                loader=DictLoader(QUOTATION_TEMPLATES),
+                autoescape=select_autoescape(["html"]),
+                trim_blocks=True,
+                lstrip_blocks=True,
+                keep_trailing_newline=True,
+                auto_reload=False,
+            )
+            for name in QUOTATION_TEMPLATES:
+                environment.get_template(name)
+            _environment = environment
+        return _environment
+
+
+def _get_template(output_format):
+    """获取输出格式对应的已编译模板"""
+    if output_format not in QUOTATION_FORMATS:
+        raise ValueError(f"不支持的报价单格式: {output_format}")
+    return get_environment().get_template(QUOTATION_FORMATS[output_format])
+
+
+def _context(quotation_items, total_price, limit=None):
+    """
+    生成模板参数
+    
+    Args:
+        quotation_items (sequence): 报价项目列表
+        total_price (float): 报价单总价
+        limit (int): 最多显示的项目数，为None时显示全部项目
+        
+    Returns:
+        dict: 模板参数
+    """
+    items = quotation_items if limit is None else quotation_items[:limit]
+    return {
+        "date": datetime.now().strftime("%Y-%m-%d"),
+        "headers": TABLE_HEADERS,
+        "items": items,
+        "item_count": len(quotation_items),
+        "total_price": total_price,
+    }
+
+
+def render_quotation(quotation_items, total_price, output_format="html", limit=None):
+    """
+    生成报价单文本，适合预览和较小的报价单
+    
+    Args:
+        quotation_items (sequence): 报价项目列表
+        total_price (float): 报价单总价
+        output_format (str): "html" 或 "text"
+        limit (int): 最多显示的项目数，为None时显示全部项目
+        
+    Returns:
+        str: 报价单内容
+    """
+    return _get_template(output_format).render(_context(quotation_items, total_price, limit))
+
+
+def generate_quotation(quotation_items, total_price, output_format="html"):
+    """
+    逐段生成报价单，适合直接发送给网络连接等流式输出
+    
+    Args:
+        quotation_items (sequence): 报价项目列表
+        total_price (float): 报价单总价
+        output_format (str): "html" 或 "text"
+        
+    Returns:
+        iterator: 依次产生报价单内容片段的迭代器
+    """
+    return _get_template(output_format).generate(_context(quotation_items, total_price))
+
+
+def write_quotation(file_path, quotation_items, total_price, output_format="html"):
+    """
+    把报价单逐段写入文件
+    
+    Args:
+        file_path (str): 保存文件路径，也可以是可写入的二进制文件对象
+        quotation_items (sequence): 报价项目列表
+        total_price (float): 报价单总价
+        output_format (str): "html" 或 "text"
+    """
+    stream = _get_template(output_format).stream(_context(quotation_items, total_price))
+    stream.enable_buffering(STREAM_BUFFER_SIZE)
+    stream.dump(file_path, encoding="utf-8")
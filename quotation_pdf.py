@@ -0,0 +1,363 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+报价单PDF生成模块
+不依赖图形界面，报价计算界面和批量报价命令行工具共用
+
+报价项目表格按页面剩余空间分块排版，每块表格在排版到它时才生成，
+因此生成时间与项目数成正比，内存中只保留当前一块表格。
+字体注册、样式和固定的标题、备注元素在每个进程中只准备一次，由所有报价单共用。
+"""
+
+import copy
+import os
+import threading
+from datetime import datetime
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import (SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer,
+                                Flowable, FrameBreak)
+from reportlab.lib import colors
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+
+from models import TABLE_HEADERS
+
+
+# 报价单中文字体：环境变量指定的TrueType字体优先，其次依次查找以下字体文件，
+# 每项为 (字体文件, TTC字体集中的字体序号)
+CJK_FONT_ENV = "QUOTATION_PDF_FONT"
+CJK_FONT_CANDIDATES = [
+    (os.path.join("data", "fonts", "quotation.ttf"), 0),
+    ("C:/Windows/Fonts/msyh.ttc", 0),
+    ("C:/Windows/Fonts/simhei.ttf", 0),
+    ("C:/Windows/Fonts/simsun.ttc", 0),
+    ("/System/Library/Fonts/STHeiti Light.ttc", 0),
+    ("/Library/Fonts/Arial Unicode.ttf", 0),
+    ("/usr/share/fonts/truetype/wqy/wqy-microhei.ttc", 0),
+    ("/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc", 0),
+    ("/usr/share/fonts/truetype/droid/DroidSansFallbackFull.ttf", 0),
+    ("/usr/share/fonts/truetype/arphic/uming.ttc", 0),
+]
+
+# 注册后的TrueType字体名称；找不到字体文件时使用阅读器自带的CID字体，不嵌入PDF
+CJK_FONT_NAME = "QuotationCJK"
+CJK_FALLBACK_FONT = "STSong-Light"
+
+# 表格字号
+TABLE_FONT_SIZE = 10
+HEADER_FONT_SIZE = 12
+
+# 表头行和项目行的固定行高，用于计算每页能容纳的行数
+HEADER_ROW_HEIGHT = 30
+ROW_HEIGHT = 18
+
+# 单元格左右内边距之和
+CELL_PADDING = 12
+
+# 每个进程共用的报价单模板
+_template = None
+_template_lock = threading.Lock()
+
+
+def register_cjk_font():
+    """
+    注册报价单使用的中文字体，重复调用时直接返回已注册的字体
+    
+    TrueType字体在生成PDF时只嵌入报价单中实际用到的字符。
+    
+    Returns:
+        str: 字体名称
+    """
+    if CJK_FONT_NAME in pdfmetrics.getRegisteredFontNames():
+        return CJK_FONT_NAME
+    
+    candidates = list(CJK_FONT_CANDIDATES)
+    if os.environ.get(CJK_FONT_ENV):
+        candidates.insert(0, (os.environ[CJK_FONT_ENV], 0))
+    for font_path, subfont_index in candidates:
+        if not os.path.exists(font_path):
+            continue
+        try:
+            pdfmetrics.registerFont(TTFont(CJK_FONT_NAME, font_path, subfontIndex=subfont_index))
+            return CJK_FONT_NAME
+        except Exception as e:
+            print(f"加载字体 {font_path} 失败: {e}")
+    
+    print(f"未找到中文TrueType字体，使用不嵌入的 {CJK_FALLBACK_FONT} 字体")
+    if CJK_FALLBACK_FONT not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(UnicodeCIDFont(CJK_FALLBACK_FONT))
+    return CJK_FALLBACK_FONT
+
+
+def cjk_font_file():
+    """
+    获取报价单实际使用的中文字体文件，必要时先注册字体
+    
+    Returns:
+        str: TrueType字体文件路径，使用不嵌入的CID字体时为None
+    """
+    font_name = register_cjk_font()
+    if font_name != CJK_FONT_NAME:
+        return None
+    return pdfmetrics.getFont(font_name).face.filename
+
+
+def _item_row(index, item):
+    """
+    生成一个报价项目的表格行
+    
+    Args:
+        index (int): 项目索引
+        item (dict): 报价项目
+        
+    Returns:
+        list: 表格行
+    """
+    return [
+        str(index + 1),
+        f"{item['sphereType']} - {item['sphereModel']}",
+        f"{item['flangeType']} - {item['flangeModel']}",
+        str(item['flangeQuantity']),
+        str(item['jointQuantity']),
+        f"{item['jointPrice']:.2f}",
+        f"{item['totalPrice']:.2f}"
+    ]
+
+
+class QuotationTemplate:
+    """
+    报价单模板
+    
+    创建时注册字体并准备样式、表头宽度和固定的标题、备注元素，
+    之后每次生成报价单只需要排版报价项目。
+    """
+    
+    def __init__(self):
+        """初始化报价单模板"""
+        self.font_name = register_cjk_font()
+        
+        styles = getSampleStyleSheet()
+        self.title_style = ParagraphStyle("QuotationTitle", parent=styles["Title"],
+                                          fontName=self.font_name)
+        self.normal_style = ParagraphStyle("QuotationNormal", parent=styles["Normal"],
+                                           fontName=self.font_name)
+        
+        self.body_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, -1), self.font_name),
+            ('FONTSIZE', (0, 0), (-1, 0), HEADER_FONT_SIZE),
+            ('FONTSIZE', (0, 1), (-1, -1), TABLE_FONT_SIZE),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')
+        ])
+        self.total_table_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), colors.beige),
+            ('FONTNAME', (0, 0), (-1, -1), self.font_name),
+            ('FONTSIZE', (0, 0), (-1, -1), TABLE_FONT_SIZE),
+            ('GRID', (-2, 0), (-1, 0), 1, colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')
+        ])
+        self.header_widths = [self.text_width(text, HEADER_FONT_SIZE) for text in TABLE_HEADERS]
+        
+        # 固定的标题和备注元素，每次生成时使用浅拷贝，排版状态不会互相影响
+        self._title = [Paragraph("橡胶接头报价单", self.title_style), Spacer(1, 20)]
+        self._notes = [
+            Spacer(1, 30),
+            Paragraph("备注:", self.normal_style),
+            Paragraph("1. 价格单位为人民币元。", self.normal_style),
+            Paragraph("2. 报价单有效期为30天。", self.normal_style),
+            Paragraph("3. 如有疑问，请联系我们。", self.normal_style)
+        ]
+    
+    def text_width(self, text, font_size=TABLE_FONT_SIZE):
+        """计算文字在报价单字体下的宽度"""
+        return pdfmetrics.stringWidth(text, self.font_name, font_size)
+    
+    def column_widths(self, quotation_items, total_row):
+        """
+        计算各列宽度，所有分块表格使用相同的列宽以保证各页对齐
+        
+        Args:
+            quotation_items (sequence): 报价项目列表
+            total_row (list): 总计行
+            
+        Returns:
+            list: 列宽
+        """
+        widths = list(self.header_widths)
+        for column, text in enumerate(total_row):
+            widths[column] = max(widths[column], self.text_width(text))
+        
+        # 球体和法兰信息列中相同的文字只测量一次；数字列中各数字宽度相同，只测量最长的文字
+        measured = set()
+        longest = [""] * len(TABLE_HEADERS)
+        for index, item in enumerate(quotation_items):
+            row = _item_row(index, item)
+            for column, text in enumerate(row):
+                if column in (1, 2):
+                    if text not in measured:
+                        measured.add(text)
+                        widths[column] = max(widths[column], self.text_width(text))
+                elif len(text) > len(longest[column]):
+                    longest[column] = text
+        for column, text in enumerate(longest):
+            if text:
+                widths[column] = max(widths[column], self.text_width(text))
+        return [width + CELL_PADDING for width in widths]
+    
+    def render(self, file_path, quotation_items, total_price, progress_callback=None):
+        """
+        生成PDF格式的报价单
+        
+        Args:
+            file_path (str): 保存文件路径，也可以是可写入的二进制文件对象
+            quotation_items (sequence): 报价项目列表
+            total_price (float): 报价单总价
+            progress_callback (callable): 进度回调，参数为 (已排版项目数, 总步数)，
+                回调中抛出的异常会中止生成
+        """
+        doc = SimpleDocTemplate(file_path, pagesize=A4)
+        
+        # 标题和日期
+        elements = [copy.copy(flowable) for flowable in self._title]
+        date_text = f"日期: {datetime.now().strftime('%Y-%m-%d')}"
+        elements.append(Paragraph(date_text, self.normal_style))
+        elements.append(Spacer(1, 20))
+        
+        # 报价项目表格在排版时分块生成，最后是总计行
+        total_row = ["", "", "", "", "", "总计", f"{total_price:.2f}"]
+        # 页面框架上下各有6点内边距
+        page_rows = int((doc.height - 12 - HEADER_ROW_HEIGHT) // ROW_HEIGHT)
+        rows = _QuotationRows(self, quotation_items, total_row,
+                              self.column_widths(quotation_items, total_row),
+                              page_rows, progress_callback)
+        elements.append(rows)
+        
+        # 备注
+        elements.extend(copy.copy(flowable) for flowable in self._notes)
+        
+        doc.build(elements)
+        if progress_callback:
+            progress_callback(rows.steps, rows.steps)
+
+
+class _QuotationRows(Flowable):
+    """
+    报价项目表格的占位元素
+    
+    占位元素的高度总是超过页面剩余空间，排版时 reportlab 调用 split() 拆分它：
+    split() 按剩余高度生成下一块表格，占位元素排在表格之后等待下一次拆分，本身不会被绘制。
+    """
+    
+    def __init__(self, template, quotation_items, total_row, column_widths, page_rows,
+                 progress_callback=None):
+        """
+        初始化占位元素
+        
+        Args:
+            template (QuotationTemplate): 提供表格样式的报价单模板
+            quotation_items (sequence): 报价项目列表
+            total_row (list): 总计行
+            column_widths (list): 列宽
+            page_rows (int): 一整页能容纳的项目行数
+            progress_callback (callable): 进度回调，参数为 (已排版项目数, 总步数)
+        """
+        super().__init__()
+        self.template = template
+        self.quotation_items = quotation_items
+        self.total_row = total_row
+        self.column_widths = column_widths
+        self.page_rows = max(page_rows, 1)
+        self.progress_callback = progress_callback
+        self.steps = max(len(quotation_items), 1)
+        self._position = 0  # 下一块表格的第一个项目索引
+        self._started = False
+        self._finished = False
+    
+    def next_table(self, available_height):
+        """
+        生成下一块表格
+        
+        Args:
+            available_height (float): 当前页面剩余高度
+            
+        Returns:
+            Table: 带表头的项目表格，项目排完后为总计行表格；剩余高度放不下一行时返回None
+        """
+        items = self.quotation_items
+        if self._started and self._position >= len(items):
+            if available_height < ROW_HEIGHT:
+                return None
+            self._finished = True
+            table = Table([self.total_row], colWidths=self.column_widths, rowHeights=ROW_HEIGHT)
+            table.setStyle(self.template.total_table_style)
+            return table
+        
+        # 按剩余高度确定行数，并留出1点余量，保证表格之后还有剩余空间，
+        # 否则剩余高度为0时 reportlab 不再调用 split()
+        rows = min(int((available_height - HEADER_ROW_HEIGHT - 1) // ROW_HEIGHT), self.page_rows)
+        if rows < (1 if items else 0):
+            return None
+        start = self._position
+        end = min(start + rows, len(items))
+        data = [TABLE_HEADERS]
+        data.extend(_item_row(index, items[index]) for index in range(start, end))
+        table = Table(data, colWidths=self.column_widths,
+                      rowHeights=[HEADER_ROW_HEIGHT] + [ROW_HEIGHT] * (end - start), repeatRows=1)
+        table.setStyle(self.template.body_table_style)
+        self._position = end
+        self._started = True
+        
+        if self.progress_callback:
+            self.progress_callback(min(end, self.steps), self.steps)
+        return table
+    
+    def wrap(self, available_width, available_height):
+        # 总是放不下，由 split() 按剩余高度生成表格
+        return available_width, available_height + 1
+    
+    def split(self, available_width, available_height):
+        table = self.next_table(available_height)
+        if table is None:
+            # 剩余空间放不下一行，换到下一页后再拆分
+            return [FrameBreak(), self]
+        if self._finished:
+            return [table]
+        return [table, self]
+    
+    def draw(self):
+        pass
+
+
+def get_quotation_template():
+    """
+    获取当前进程共用的报价单模板，第一次调用时创建
+    
+    Returns:
+        QuotationTemplate: 报价单模板
+    """
+    global _template
+    with _template_lock:
+        if _template is None:
+            _template = QuotationTemplate()
+        return _template
+
+
+def create_quotation_pdf(file_path, quotation_items, total_price, progress_callback=None):
+    """
+    创建PDF格式的报价单
+    
+    Args:
+        file_path (str): 保存文件路径，也可以是可写入的二进制文件对象
+        quotation_items (sequence): 报价项目列表
+        total_price (float): 报价单总价
+        progress_callback (callable): 进度回调，参数为 (已排版项目数, 总步数)，
+            回调中抛出的异常会中止生成
+    """
+    get_quotation_template().render(file_path, quotation_items, total_price, progress_callback)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+报价单表格模块
+根据报价单数据模型的变更通知逐行更新报价单表格，添加或删除项目只影响一行
+"""
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from models import TABLE_HEADERS
+
+
+class QuotationTableModel(QAbstractTableModel):
+    """报价单明细表格模型，直接读取 QuotationModel.quotation_items"""
+    
+    HEADERS = TABLE_HEADERS + ["操作"]
+    ACTION_COLUMN = len(TABLE_HEADERS)
+    
+    def __init__(self, quotation_model, parent=None):
+        """
+        初始化表格模型
+        
+        Args:
+            quotation_model (QuotationModel): 报价单数据模型实例
+            parent (QObject): 父对象
+        """
+        super().__init__(parent)
+        self.quotation_model = quotation_model
+        # 表格当前显示的行数，在通知视图行增删的同时更新
+        self._row_count = len(quotation_model.quotation_items)
+        quotation_model.add_listener(self.on_items_changed)
+    
+    def on_items_changed(self, change, index):
+        """
+        报价项目变更通知
+        
+        Args:
+            change (str): "insert"、"remove"、"update" 或 "reset"
+            index (int): 变更的项目索引
+        """
+        if change == "insert":
+            self.beginInsertRows(QModelIndex(), index, index)
+            self._row_count += 1
+            self.endInsertRows()
+        elif change == "remove":
+            self.beginRemoveRows(QModelIndex(), index, index)
+            self._row_count -= 1
+            self.endRemoveRows()
+        elif change == "update":
+            self.dataChanged.emit(self.index(index, 0), self.index(index, self.ACTION_COLUMN - 1))
+        else:
+            self.beginResetModel()
+            self._row_count = len(self.quotation_model.quotation_items)
+            self.endResetModel()
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid() or index.column() == self.ACTION_COLUMN:
+            return None
+        row, column = index.row(), index.column()
+        if row >= len(self.quotation_model.quotation_items):
+            return None
+        item = self.quotation_model.quotation_items[row]
+        if column == 0:
+            return str(row + 1)
+        if column == 1:
+            return f"{item['sphereType']} - {item['sphereModel']}"
+        if column == 2:
+            return f"{item['flangeType']} - {item['flangeModel']}"
+        if column == 3:
+            return str(item['flangeQuantity'])
+        if column == 4:
+            return str(item['jointQuantity'])
+        if column == 5:
+            return f"{item['jointPrice']:.2f}"
+        return f"{item['totalPrice']:.2f}"
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+    
+    def flags(self, index):
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
@@ -0,0 +1,483 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+本地报价服务
+基于asyncio的HTTP服务，启动时加载一次产品目录，以JSON接口提供接头单价和报价单计算，
+供ERP等本地系统直接调用。
+
+接口:
+    GET  /health          服务状态和价格缓存统计
+    POST /joint-price     接头单价，请求体为一个接头配置或配置数组
+    POST /quotation       报价单计算，请求体为 {"items": [...]} 或其数组
+    POST /quotation/pdf   生成PDF报价单，请求体为 {"items": [...]}，返回PDF文件
+    POST /quotation/html  生成HTML报价单，请求体为 {"items": [...]}
+    POST /quotation/text  生成纯文本报价单，请求体为 {"items": [...]}
+
+用法:
+    python quote_server.py --port 8765 --pdf-workers 2
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+
+from models import JointPriceCache, ProductDataModel, QuotationModel
+from sqlite_storage import SQLiteProductDataModel
+from quotation_html import render_quotation
+from quotation_pdf import create_quotation_pdf
+
+
+# 默认监听地址，只接受本机连接
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# 空闲连接保持时间(秒)和请求体的最大字节数
+KEEP_ALIVE_TIMEOUT = 15
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+# 收到请求行之后，读取全部请求头和请求体的最长时间(秒)，超时返回408
+REQUEST_TIMEOUT = 30
+
+# 请求头的最大数量，以及请求行之前允许跳过的空行数
+MAX_HEADER_COUNT = 100
+MAX_EMPTY_LINES = 8
+
+# 每个PDF工作进程允许排队的请求数，超过时返回503
+PDF_QUEUE_PER_WORKER = 4
+
+
+class HTTPError(Exception):
+    """带HTTP状态码的请求错误"""
+    
+    def __init__(self, status, message):
+        """
+        初始化请求错误
+        
+        Args:
+            status (HTTPStatus): HTTP状态码
+            message (str): 错误信息
+        """
+        super().__init__(message)
+        self.status = status
+
+
+def render_quotation_pdf(quotation_items, total_price):
+    """
+    在PDF工作进程中生成报价单
+    
+    Args:
+        quotation_items (list): 报价项目列表
+        total_price (float): 报价单总价
+        
+    Returns:
+        bytes: PDF文件内容
+    """
+    buffer = io.BytesIO()
+    create_quotation_pdf(buffer, quotation_items, total_price)
+    return buffer.getvalue()
+
+
+class QuotationServer:
+    """报价服务，所有请求共用同一个产品数据模型"""
+    
+    def __init__(self, product_model, pdf_workers=None):
+        """
+        初始化报价服务
+        
+        Args:
+            product_model (ProductDataModel): 已加载的产品数据模型
+            pdf_workers (int): PDF工作进程数，默认为CPU核心数
+        """
+        self.product_model = product_model
+        self.price_cache = JointPriceCache(product_model)  # 所有请求共用的接头价格缓存
+        self.pdf_workers = pdf_workers or os.cpu_count() or 1
+        self._pdf_executor = None
+        self._pdf_pending = 0
+        self._server = None
+        self.routes = {
+            ("GET", "/health"): self.health,
+            ("POST", "/joint-price"): self.price_joint,
+            ("POST", "/quotation"): self.price_quotation,
+            ("POST", "/quotation/pdf"): self.quotation_pdf,
+            ("POST", "/quotation/html"): self.quotation_html,
+            ("POST", "/quotation/text"): self.quotation_text,
+        }
+    
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        开始监听
+        
+        Args:
+            host (str): 监听地址
+            port (int): 监听端口，为0时由系统分配
+            
+        Returns:
+            int: 实际监听的端口
+        """
+        self._pdf_executor = ProcessPoolExecutor(max_workers=self.pdf_workers)
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server.sockets[0].getsockname()[1]
+    
+    async def serve_forever(self):
+        """持续处理请求，直到被取消"""
+        async with self._server:
+            await self._server.serve_forever()
+    
+    async def close(self):
+        """停止监听并关闭PDF工作进程"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._pdf_executor is not None:
+            self._pdf_executor.shutdown(wait=True)
+    
+    async def _handle_connection(self, reader, writer):
+        """
+        处理一个连接，连接保持期间依次处理多个请求
+        
+        Args:
+            reader (asyncio.StreamReader): 连接读取端
+            writer (asyncio.StreamWriter): 连接写入端
+        """
+        try:
+            while True:
+                try:
+                    # 空闲连接超过保持时间后关闭
+                    request_line = await asyncio.wait_for(self._read_request_line(reader), KEEP_ALIVE_TIMEOUT)
+                    if not request_line:
+                        break
+                    try:
+                        request = await asyncio.wait_for(self._read_request(reader, request_line),
+                                                         REQUEST_TIMEOUT)
+                    except asyncio.TimeoutError:
+                        raise HTTPError(HTTPStatus.REQUEST_TIMEOUT, "读取请求超时") from None
+                except HTTPError as e:
+                    await self._write_response(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    break
+                
+                method, path, headers, body, keep_alive = request
+                handler = self.routes.get((method, path))
+                try:
+                    if handler is None:
+                        raise HTTPError(HTTPStatus.NOT_FOUND, f"接口不存在: {method} {path}")
+                    status, content = HTTPStatus.OK, await handler(body)
+                except HTTPError as e:
+                    status, content = e.status, {"error": str(e)}
+                except Exception as e:
+                    print(f"处理请求失败: {e}")
+                    status, content = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+                
+                await self._write_response(writer, status, content, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    
+    @staticmethod
+    async def _read_request_line(reader):
+        """
+        读取请求行，跳过保持连接的两个请求之间多余的空行
+        
+        Args:
+            reader (asyncio.StreamReader): 连接读取端
+            
+        Returns:
+            bytes: 请求行，连接已关闭时返回空字节串
+        """
+        for _ in range(MAX_EMPTY_LINES + 1):
+            try:
+                line = await reader.readline()
+            except (asyncio.LimitOverrunError, ValueError):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "请求行过长")
+            if not line or line.strip():
+                return line
+        raise HTTPError(HTTPStatus.BAD_REQUEST, "请求行之前的空行过多")
+    
+    async def _read_request(self, reader, request_line):
+        """
+        读取请求行之后的请求头和请求体
+        
+        Args:
+            reader (asyncio.StreamReader): 连接读取端
+            request_line (bytes): 已读取的请求行
+            
+        Returns:
+            tuple: (方法, 路径, 请求头, 请求体, 是否保持连接)
+        """
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "请求行格式错误")
+        
+        headers = {}
+        count = 0
+        while True:
+            try:
+                line = await reader.readline()
+            except (asyncio.LimitOverrunError, ValueError):
+                raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "请求头过长")
+            if line in (b"\r\n", b"\n", b""):
+                break
+            count += 1
+            if count > MAX_HEADER_COUNT:
+                raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "请求头过多")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        
+        if "transfer-encoding" in headers:
+            raise HTTPError(HTTPStatus.NOT_IMPLEMENTED, "不支持分块传输的请求体")
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Content-Length 格式错误")
+        if length < 0 or length > MAX_BODY_SIZE:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "请求体过大")
+        body = await reader.readexactly(length) if length else b""
+        
+        # HTTP/1.1 默认保持连接，HTTP/1.0 需要显式要求
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.0":
+            keep_alive = connection == "keep-alive"
+        else:
+            keep_alive = connection != "close"
+        return method, target.split("?", 1)[0], headers, body, keep_alive
+    
+    @staticmethod
+    async def _write_response(writer, status, content, keep_alive):
+        """
+        写入HTTP响应
+        
+        Args:
+            writer (asyncio.StreamWriter): 连接写入端
+            status (HTTPStatus): HTTP状态码
+            content: 响应内容，bytes 作为PDF返回，(bytes, 内容类型) 按指定类型返回，
+                其他内容序列化为JSON
+            keep_alive (bool): 是否保持连接
+        """
+        if isinstance(content, bytes):
+            body, content_type = content, "application/pdf"
+        elif isinstance(content, tuple):
+            body, content_type = content
+        else:
+            body = json.dumps(content, ensure_ascii=False).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+    
+    @staticmethod
+    def _parse_json(body):
+        """解析JSON请求体"""
+        try:
+            return json.loads(body)
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"JSON格式错误: {e}")
+    
+    async def health(self, body):
+        """服务状态和接头价格缓存统计"""
+        return {"status": "ok", "priceCache": self.price_cache.stats()}
+    
+    async def price_joint(self, body):
+        """
+        计算接头单价
+        
+        请求体为一个接头配置，或配置数组(批量计算，结果按相同顺序返回)。
+        
+        Args:
+            body (bytes): 请求体
+            
+        Returns:
+            dict: {"jointPrice": 单价}，批量请求时为 {"results": [...]}
+        """
+        payload = self._parse_json(body)
+        quotation_model = QuotationModel(self.product_model, self.price_cache)
+        if not isinstance(payload, list):
+            try:
+                args = quotation_model.check_request_item(payload)
+            except ValueError as e:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, str(e))
+            return {"jointPrice": quotation_model.calculate_joint_price(*args[:5])}
+        
+        # 先逐个验证，再对有效的配置一次性批量计算
+        results = [None] * len(payload)
+        valid = []
+        for index, item in enumerate(payload):
+            try:
+                valid.append((index, quotation_model.check_request_item(item)))
+            except ValueError as e:
+                results[index] = {"error": str(e)}
+        if valid:
+            columns = list(zip(*(args for _, args in valid)))
+            joint_prices, _ = quotation_model.price_batch(*columns)
+            for (index, _), joint_price in zip(valid, joint_prices):
+                results[index] = {"jointPrice": joint_price}
+        return {"results": results}
+    
+    def _quote(self, payload):
+        """
+        计算一份报价单
+        
+        Args:
+            payload (dict): {"items": [报价请求项目, ...]}
+            
+        Returns:
+            QuotationModel: 已添加全部项目的报价单
+        """
+        if not isinstance(payload, dict):
+            raise ValueError("请求必须是包含 items 的对象")
+        quotation_model = QuotationModel(self.product_model, self.price_cache)
+        quotation_model.add_request_items(payload.get("items"))
+        return quotation_model
+    
+    async def price_quotation(self, body):
+        """
+        计算报价单，与报价计算界面添加项目的计算方式一致
+        
+        请求体为 {"items": [...]}，或其数组(批量计算，结果按相同顺序返回)。
+        
+        Args:
+            body (bytes): 请求体
+            
+        Returns:
+            dict: {"quotationItems": [...], "totalPrice": 总价}，批量请求时为 {"results": [...]}
+        """
+        payload = self._parse_json(body)
+        if not isinstance(payload, list):
+            try:
+                quotation_model = self._quote(payload)
+            except ValueError as e:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, str(e))
+            return {"quotationItems": quotation_model.quotation_items,
+                    "totalPrice": quotation_model.total_price}
+        
+        results = []
+        for quotation in payload:
+            try:
+                quotation_model = self._quote(quotation)
+                results.append({"quotationItems": quotation_model.quotation_items,
+                                "totalPrice": quotation_model.total_price})
+            except ValueError as e:
+                results.append({"error": str(e)})
+        return {"results": results}
+    
+    async def quotation_pdf(self, body):
+        """
+        计算报价单并在PDF工作进程中生成PDF
+        
+        Args:
+            body (bytes): 请求体，{"items": [...]}
+            
+        Returns:
+            bytes: PDF文件内容
+        """
+        try:
+            quotation_model = self._quote(self._parse_json(body))
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, str(e))
+        
+        # 限制排队的PDF请求数，避免请求堆积耗尽内存
+        if self._pdf_pending >= self.pdf_workers * PDF_QUEUE_PER_WORKER:
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "PDF生成繁忙，请稍后重试")
+        self._pdf_pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._pdf_executor, render_quotation_pdf,
+                quotation_model.quotation_items, quotation_model.total_price
+            )
+        finally:
+            self._pdf_pending -= 1
+    
+    async def _render_document(self, body, output_format, content_type):
+        """
+        计算报价单并生成HTML或文本格式的报价单
+        
+        模板渲染很快，在线程中进行，不占用PDF工作进程。
+        
+        Args:
+            body (bytes): 请求体，{"items": [...]}
+            output_format (str): "html" 或 "text"
+            content_type (str): 响应内容类型
+            
+        Returns:
+            tuple: (报价单内容, 内容类型)
+        """
+        try:
+            quotation_model = self._quote(self._parse_json(body))
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, str(e))
+        loop = asyncio.get_running_loop()
+        document = await loop.run_in_executor(
+            None, render_quotation,
+            quotation_model.quotation_items, quotation_model.total_price, output_format
+        )
+        return document.encode("utf-8"), content_type
+    
+    async def quotation_html(self, body):
+        """计算报价单并生成HTML报价单"""
+        return await self._render_document(body, "html", "text/html; charset=utf-8")
+    
+    async def quotation_text(self, body):
+        """计算报价单并生成纯文本报价单"""
+        return await self._render_document(body, "text", "text/plain; charset=utf-8")
+
+
+async def serve(product_model, host, port, pdf_workers):
+    """
+    启动报价服务并持续运行
+    
+    Args:
+        product_model (ProductDataModel): 产品数据模型
+        host (str): 监听地址
+        port (int): 监听端口
+        pdf_workers (int): PDF工作进程数
+    """
+    server = QuotationServer(product_model, pdf_workers)
+    port = await server.start(host, port)
+    print(f"报价服务已启动: http://{host}:{port}")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="橡胶接头本地报价服务")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"监听地址 (默认: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help=f"监听端口 (默认: {DEFAULT_PORT})")
+    parser.add_argument("--storage", choices=["json", "sqlite"], default="json",
+                        help="产品数据存储方式 (默认: json)")
+    parser.add_argument("--pdf-workers", type=int, default=None,
+                        help="PDF工作进程数 (默认: CPU核心数)")
+    args = parser.parse_args()
+    
+    if args.storage == "sqlite":
+        product_model = SQLiteProductDataModel()
+    else:
+        product_model = ProductDataModel()
+    
+    try:
+        asyncio.run(serve(product_model, args.host, args.port, args.pdf_workers))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
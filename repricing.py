@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+报价单调价模块
+产品价格修改后，通过 产品 -> 报价项目 的反向索引只重新计算引用已调价产品的报价项目和总价，
+不需要重新读取全部报价单，并报告哪些报价单的总价发生了变化。
+存档中的报价单只报告按新价格计算的总价，存档和原报价单文件都不会被修改。
+"""
+
+
+class QuotationRepricer:
+    """收集产品价格变化，同步到打开的报价单，并报告受影响的存档报价单"""
+    
+    def __init__(self, product_model, quotation_models=(), archive=None):
+        """
+        初始化调价器，并注册产品数据变更通知
+        
+        Args:
+            product_model (ProductDataModel): 产品数据模型实例
+            quotation_models (list): 需要同步调价的报价单数据模型
+            archive (QuotationArchive): 需要报告调价影响的报价单存档，为None时只处理打开的报价单
+        """
+        self.product_model = product_model
+        self.quotation_models = list(quotation_models)
+        self.archive = archive
+        self._pending = {}  # (类别, 种类, 型号) -> 新价格，同一型号多次调价只保留最后的价格
+        product_model.add_listener(self.on_catalog_changed)
+    
+    def on_catalog_changed(self, record):
+        """
+        产品数据变更通知，记录调价的型号
+        
+        整体导入产品数据(record 为None)时无法知道哪些型号调价，不会记录。
+        
+        Args:
+            record (dict): 变更记录
+        """
+        if record is not None and record["op"] == "setPrice":
+            self._pending[(record["kind"], record["type"], record["model"])] = record["price"]
+    
+    @property
+    def pending_count(self):
+        """尚未同步到报价单的调价型号数"""
+        return len(self._pending)
+    
+    def reprice(self):
+        """
+        把记录的调价同步到打开的报价单，并列出受影响的存档报价单
+        
+        Returns:
+            list: 总价发生变化(存档报价单为按新价格将会变化)的报价单，每项包含 name(打开的报价单为"当前报价单"，存档报价单为文件路径)、
+                  lines(变化的项目数)、old_total 和 new_total
+        """
+        changes = [key + (price,) for key, price in self._pending.items()]
+        self._pending = {}
+        if not changes:
+            return []
+        
+        report = []
+        for quotation_model in self.quotation_models:
+            result = quotation_model.reprice(changes)
+            if result is not None:
+                result["name"] = "当前报价单"
+                report.append(result)
+        
+        if self.archive is not None:
+            try:
+                for result in self.archive.reprice(changes):
+                    result["name"] = result["path"]
+                    report.append(result)
+            except Exception as e:
+                # 保留调价记录，下次同步时重试；已调价的打开报价单再次同步时不会变化
+                for kind, product_type, model, price in changes:
+                    self._pending.setdefault((kind, product_type, model), price)
+                print(f"检查报价单存档调价影响失败: {e}")
+        return report
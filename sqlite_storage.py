@@ -0,0 +1,475 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+SQLite存储模块
+提供基于本地SQLite数据库的产品数据模型，查询和修改只涉及相关的行
+"""
+
+import os
+import sqlite3
+from array import array
+from collections.abc import Mapping, Sequence
+from contextlib import contextmanager
+
+from catalog import parse_price
+from models import DATA_FILE, JOURNAL_FILE, ProductDataModel
+
+
+# 默认的SQLite数据库文件
+SQLITE_FILE = os.path.join("data", "product_data.db")
+
+# 数据库版本，记录在 PRAGMA user_version 中，低于该版本时需要迁移JSON格式的产品数据
+SCHEMA_VERSION = 1
+
+# 型号列表视图每次从数据库读取的记录数
+MODEL_PAGE_SIZE = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS product_types (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    type TEXT NOT NULL,
+    UNIQUE (kind, type)
+);
+CREATE TABLE IF NOT EXISTS product_models (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    type TEXT NOT NULL,
+    model TEXT NOT NULL,
+    price REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_product_models_key
+    ON product_models (kind, type, model);
+CREATE INDEX IF NOT EXISTS idx_product_models_price
+    ON product_models (kind, price);
+"""
+
+
+class SQLiteModelListView(Sequence):
+    """
+    单个种类的型号只读视图，按页从数据库读取 {"model": 型号, "price": 价格} 记录
+    
+    型号数量用 COUNT(*) 查询，记录按需用 LIMIT/OFFSET 分页读取并缓存最近一页，
+    数据库有修改后缓存失效。
+    """
+    
+    def __init__(self, conn, kind, product_type):
+        """
+        初始化型号列表视图
+        
+        Args:
+            conn (sqlite3.Connection): 数据库连接
+            kind (str): 产品类别，"sphere" 或 "flange"
+            product_type (str): 种类
+        """
+        self.conn = conn
+        self.kind = kind
+        self.product_type = product_type
+        self._changes = None  # 缓存对应的数据库修改计数
+        self._length = 0
+        self._page = (None, [])  # (页号, 记录列表)
+    
+    def _check_cache(self):
+        """数据库有修改时清除缓存"""
+        if self._changes != self.conn.total_changes:
+            self._length = self.conn.execute(
+                "SELECT COUNT(*) FROM product_models WHERE kind = ? AND type = ?",
+                (self.kind, self.product_type)
+            ).fetchone()[0]
+            self._page = (None, [])
+            self._changes = self.conn.total_changes
+    
+    def __len__(self):
+        self._check_cache()
+        return self._length
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("型号序号超出范围")
+        
+        page, records = self._page
+        if page != index // MODEL_PAGE_SIZE:
+            page = index // MODEL_PAGE_SIZE
+            rows = self.conn.execute(
+                "SELECT model, price FROM product_models WHERE kind = ? AND type = ? "
+                "ORDER BY id LIMIT ? OFFSET ?",
+                (self.kind, self.product_type, MODEL_PAGE_SIZE, page * MODEL_PAGE_SIZE)
+            )
+            records = [{"model": model, "price": price} for model, price in rows]
+            self._page = (page, records)
+        return records[index - page * MODEL_PAGE_SIZE]
+    
+    def __iter__(self):
+        rows = self.conn.execute(
+            "SELECT model, price FROM product_models WHERE kind = ? AND type = ? ORDER BY id",
+            (self.kind, self.product_type)
+        )
+        for model, price in rows:
+            yield {"model": model, "price": price}
+    
+    def __repr__(self):
+        return repr(list(self))
+
+
+class SQLiteModelsView(Mapping):
+    """型号信息只读视图，结构与 ProductDataModel.sphere_models 相同，按需从数据库读取"""
+    
+    def __init__(self, conn, kind):
+        """
+        初始化型号信息视图
+        
+        Args:
+            conn (sqlite3.Connection): 数据库连接
+            kind (str): 产品类别，"sphere" 或 "flange"
+        """
+        self.conn = conn
+        self.kind = kind
+    
+    def __getitem__(self, product_type):
+        if product_type not in self:
+            raise KeyError(product_type)
+        return SQLiteModelListView(self.conn, self.kind, product_type)
+    
+    def __contains__(self, product_type):
+        row = self.conn.execute(
+            "SELECT 1 FROM product_types WHERE kind = ? AND type = ?",
+            (self.kind, product_type)
+        ).fetchone()
+        return row is not None
+    
+    def __iter__(self):
+        rows = self.conn.execute(
+            "SELECT type FROM product_types WHERE kind = ? ORDER BY id", (self.kind,)
+        )
+        return iter([product_type for (product_type,) in rows])
+    
+    def __len__(self):
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM product_types WHERE kind = ?", (self.kind,)
+        ).fetchone()[0]
+
+
+class SQLiteProductDataModel(ProductDataModel):
+    """基于SQLite的产品数据模型类，公共接口与 ProductDataModel 一致"""
+    
+    def __init__(self, db_path=SQLITE_FILE):
+        """
+        初始化SQLite产品数据模型
+        
+        启动时只打开数据库，不读取整个产品目录。数据库尚未迁移时，
+        如果存在JSON格式的产品数据，会自动迁移过来。
+        
+        Args:
+            db_path (str): 数据库文件路径
+        """
+        # 产品数据保存在数据库中，不加载JSON数据文件
+        super().__init__(load=False)
+        self.db_path = db_path
+        
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+    
+    def _migrate(self):
+        """
+        把JSON格式的产品数据迁移到数据库
+        
+        迁移结果和数据库版本在同一个事务中提交，迁移失败时回滚，下次启动时重试。
+        数据库中已有产品数据(旧版本创建的数据库)时只更新版本，不覆盖已有数据。
+        
+        Returns:
+            bool: 数据库是否已是当前版本
+        """
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return True
+        try:
+            has_data = self.conn.execute("SELECT 1 FROM product_types LIMIT 1").fetchone() is not None
+            if not has_data and (os.path.exists(DATA_FILE) or os.path.exists(JOURNAL_FILE)):
+                source = ProductDataModel(load=False)
+                source._load_files()
+                self._replace_all(source._spheres, source._flanges)
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self.conn.commit()
+            return True
+        except Exception as e:
+            self.conn.rollback()
+            print(f"迁移产品数据失败: {e}")
+            return False
+    
+    @property
+    def sphere_types(self):
+        """球体种类列表"""
+        return self._get_types("sphere")
+    
+    @property
+    def flange_types(self):
+        """法兰种类列表"""
+        return self._get_types("flange")
+    
+    @property
+    def sphere_models(self):
+        """球体型号和价格信息"""
+        return SQLiteModelsView(self.conn, "sphere")
+    
+    @property
+    def flange_models(self):
+        """法兰型号和价格信息"""
+        return SQLiteModelsView(self.conn, "flange")
+    
+    @contextmanager
+    def batch(self):
+        """
+        批量编辑模式，期间的修改在同一个事务中，最外层批量结束时提交
+        
+        Yields:
+            SQLiteProductDataModel: 当前产品数据模型实例
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.conn.commit()
+    
+    def _commit(self, record=None):
+        """
+        提交修改，批量模式下推迟到批量结束时统一提交
+        
+        Args:
+            record (dict): 变更记录
+        """
+        self._bump_generation(record)
+        self._notify(record)
+        if self._batch_depth == 0:
+            self.conn.commit()
+    
+    def _get_types(self, kind):
+        """获取指定类别的种类列表"""
+        rows = self.conn.execute(
+            "SELECT type FROM product_types WHERE kind = ? ORDER BY id", (kind,)
+        )
+        return [product_type for (product_type,) in rows]
+    
+    def _has_type(self, kind, product_type):
+        """检查种类是否存在"""
+        row = self.conn.execute(
+            "SELECT 1 FROM product_types WHERE kind = ? AND type = ?", (kind, product_type)
+        ).fetchone()
+        return row is not None
+    
+    def _add_type(self, kind, product_type):
+        """添加种类"""
+        if not product_type:
+            return False
+        try:
+            self.conn.execute(
+                "INSERT INTO product_types (kind, type) VALUES (?, ?)", (kind, product_type)
+            )
+        except sqlite3.IntegrityError:
+            return False
+        self._commit({"op": "addType", "kind": kind, "type": product_type})
+        return True
+    
+    def _add_model(self, kind, product_type, model, price):
+        """添加型号"""
+        if not model or not self._has_type(kind, product_type):
+            return False
+        price = parse_price(price)
+        try:
+            self.conn.execute(
+                "INSERT INTO product_models (kind, type, model, price) VALUES (?, ?, ?, ?)",
+                (kind, product_type, model, price)
+            )
+        except sqlite3.IntegrityError:
+            return False
+        self._commit({"op": "addModel", "kind": kind, "type": product_type,
+                      "model": model, "price": price})
+        return True
+    
+    def _delete_type(self, kind, product_type):
+        """删除种类及其全部型号"""
+        cursor = self.conn.execute(
+            "DELETE FROM product_types WHERE kind = ? AND type = ?", (kind, product_type)
+        )
+        if cursor.rowcount == 0:
+            return False
+        self.conn.execute(
+            "DELETE FROM product_models WHERE kind = ? AND type = ?", (kind, product_type)
+        )
+        self._commit({"op": "deleteType", "kind": kind, "type": product_type})
+        return True
+    
+    def _delete_model(self, kind, product_type, model):
+        """删除型号"""
+        cursor = self.conn.execute(
+            "DELETE FROM product_models WHERE kind = ? AND type = ? AND model = ?",
+            (kind, product_type, model)
+        )
+        if cursor.rowcount == 0:
+            return False
+        self._commit({"op": "deleteModel", "kind": kind, "type": product_type, "model": model})
+        return True
+    
+    def _set_price(self, kind, product_type, model, price):
+        """修改型号价格"""
+        price = parse_price(price)
+        cursor = self.conn.execute(
+            "UPDATE product_models SET price = ? WHERE kind = ? AND type = ? AND model = ?",
+            (price, kind, product_type, model)
+        )
+        if cursor.rowcount == 0:
+            return False
+        self._commit({"op": "setPrice", "kind": kind, "type": product_type,
+                      "model": model, "price": price})
+        return True
+    
+    def _get_price(self, kind, product_type, model):
+        """获取型号价格"""
+        row = self.conn.execute(
+            "SELECT price FROM product_models WHERE kind = ? AND type = ? AND model = ?",
+            (kind, product_type, model)
+        ).fetchone()
+        return row[0] if row is not None else 0.0
+    
+    def _has_model(self, kind, product_type, model):
+        """检查型号是否存在"""
+        row = self.conn.execute(
+            "SELECT 1 FROM product_models WHERE kind = ? AND type = ? AND model = ?",
+            (kind, product_type, model)
+        ).fetchone()
+        return row is not None
+    
+    def _get_prices(self, kind, product_types, models):
+        """批量获取型号价格，相同的 (种类, 型号) 只查询一次"""
+        keys = list(zip(product_types, models))
+        prices = {key: self._get_price(kind, *key) for key in set(keys)}
+        return array("d", [prices[key] for key in keys])
+    
+    def _get_models(self, kind, product_type, limit=None):
+        """获取指定种类的型号列表，limit 为最多返回的型号数"""
+        # SQLite 中 LIMIT -1 表示不限制数量
+        rows = self.conn.execute(
+            "SELECT model FROM product_models WHERE kind = ? AND type = ? ORDER BY id LIMIT ?",
+            (kind, product_type, -1 if limit is None else limit)
+        )
+        return [model for (model,) in rows]
+    
+    def add_sphere_type(self, sphere_type):
+        return self._add_type("sphere", sphere_type)
+    
+    def add_sphere_model(self, sphere_type, model, price):
+        return self._add_model("sphere", sphere_type, model, price)
+    
+    def delete_sphere_type(self, sphere_type):
+        return self._delete_type("sphere", sphere_type)
+    
+    def update_sphere_price(self, sphere_type, model, price):
+        return self._set_price("sphere", sphere_type, model, price)
+    
+    def delete_sphere_model(self, sphere_type, model):
+        return self._delete_model("sphere", sphere_type, model)
+    
+    def add_flange_type(self, flange_type):
+        return self._add_type("flange", flange_type)
+    
+    def add_flange_model(self, flange_type, model, price):
+        return self._add_model("flange", flange_type, model, price)
+    
+    def delete_flange_type(self, flange_type):
+        return self._delete_type("flange", flange_type)
+    
+    def update_flange_price(self, flange_type, model, price):
+        return self._set_price("flange", flange_type, model, price)
+    
+    def delete_flange_model(self, flange_type, model):
+        return self._delete_model("flange", flange_type, model)
+    
+    def get_sphere_price(self, sphere_type, model):
+        return self._get_price("sphere", sphere_type, model)
+    
+    def get_flange_price(self, flange_type, model):
+        return self._get_price("flange", flange_type, model)
+    
+    def has_sphere_model(self, sphere_type, model):
+        return self._has_model("sphere", sphere_type, model)
+    
+    def has_flange_model(self, flange_type, model):
+        return self._has_model("flange", flange_type, model)
+    
+    def get_sphere_prices(self, sphere_types, models):
+        return self._get_prices("sphere", sphere_types, models)
+    
+    def get_flange_prices(self, flange_types, models):
+        return self._get_prices("flange", flange_types, models)
+    
+    def get_sphere_models_by_type(self, sphere_type, limit=None):
+        return self._get_models("sphere", sphere_type, limit)
+    
+    def get_flange_models_by_type(self, flange_type, limit=None):
+        return self._get_models("flange", flange_type, limit)
+    
+    def rebuild_index(self):
+        """索引由SQLite维护，无需重建"""
+    
+    def save_data(self):
+        """提交未保存的修改"""
+        try:
+            self.conn.commit()
+            return True
+        except Exception as e:
+            print(f"保存数据失败: {e}")
+            return False
+    
+    def flush(self, timeout=None):
+        """SQLite在提交时写入磁盘，提交未保存的修改"""
+        return self.save_data()
+    
+    def load_data(self):
+        """数据按需从数据库读取，无需预先加载"""
+        return True
+    
+    def compact(self):
+        """SQLite不使用变更日志，无需压缩"""
+        return False
+    
+    def _replace_all(self, spheres, flanges):
+        """
+        用导入的目录整体替换数据库中的产品数据
+        
+        Args:
+            spheres (ProductCatalog): 球体目录
+            flanges (ProductCatalog): 法兰目录
+        """
+        try:
+            self.conn.execute("DELETE FROM product_types")
+            self.conn.execute("DELETE FROM product_models")
+            for kind, catalog in (("sphere", spheres), ("flange", flanges)):
+                self.conn.executemany(
+                    "INSERT INTO product_types (kind, type) VALUES (?, ?)",
+                    ((kind, product_type) for product_type in catalog.types)
+                )
+                self.conn.executemany(
+                    "INSERT INTO product_models (kind, type, model, price) VALUES (?, ?, ?, ?)",
+                    ((kind, product_type, model, price)
+                     for product_type in catalog.types
+                     for model, price in catalog.columns[product_type].items())
+                )
+        except Exception:
+            self.conn.rollback()
+            raise
+    
+    def close(self):
+        """提交修改并关闭数据库连接"""
+        self.conn.commit()
+        self.conn.close()
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import ProductDataModel  # noqa: E402
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """切换到临时目录，模型读写的 data/ 目录不影响仓库"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def product_model(workdir):
+    """包含两个球体型号和两个法兰型号的产品数据模型"""
+    product_model = ProductDataModel()
+    with product_model.batch():
+        product_model.add_sphere_type("S")
+        product_model.add_sphere_model("S", "A", 10)
+        product_model.add_sphere_model("S", "B", 20.5)
+        product_model.add_flange_type("F")
+        product_model.add_flange_model("F", "X", 1.25)
+        product_model.add_flange_model("F", "Y", 3)
+    return product_model
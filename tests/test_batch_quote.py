@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+pytest.importorskip("reportlab")
+
+from batch_quote import output_names  # noqa: E402
+
+
+def test_output_names_are_unique():
+    names = ["a/b", "a:b", "A_b", "x", "a_b_2", ""]
+    assert output_names(names) == ["a_b", "a_b_2", "A_b_3", "x", "a_b_2_2", "_"]
+
+
+def test_output_names_keep_distinct_names():
+    assert output_names(["报价单1", "报价单2"]) == ["报价单1", "报价单2"]
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import binary_snapshot
+from catalog import ProductCatalog
+
+
+def make_catalogs():
+    spheres = ProductCatalog()
+    spheres.add_type("不锈钢")
+    spheres.add_model("不锈钢", "DN50", 120.5)
+    spheres.add_model("不锈钢", "DN80", 180)
+    spheres.add_type("空种类")
+    flanges = ProductCatalog()
+    flanges.add_type("碳钢")
+    flanges.add_model("碳钢", "PN16", 35.25)
+    return spheres, flanges
+
+
+def write(tmp_path):
+    json_path = str(tmp_path / "product_data.json")
+    bin_path = str(tmp_path / "product_data.bin")
+    with open(json_path, "w", encoding="utf-8") as f:
+        f.write("{}")
+    binary_snapshot.write_snapshot(bin_path, binary_snapshot.encode_catalogs(*make_catalogs()), json_path)
+    return bin_path, json_path
+
+
+def test_round_trip(tmp_path):
+    bin_path, json_path = write(tmp_path)
+    spheres, flanges = binary_snapshot.read_snapshot(bin_path, json_path)
+    
+    expected_spheres, expected_flanges = make_catalogs()
+    assert spheres.to_dict() == expected_spheres.to_dict()
+    assert flanges.to_dict() == expected_flanges.to_dict()
+    assert list(spheres.types) == ["不锈钢", "空种类"]
+    assert spheres.get_price("不锈钢", "DN80") == 180.0
+
+
+def test_crc_mismatch_is_rejected(tmp_path, capsys):
+    bin_path, json_path = write(tmp_path)
+    with open(bin_path, "r+b") as f:
+        f.seek(-1, os.SEEK_END)
+        last = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([last[0] ^ 0xFF]))
+    
+    assert binary_snapshot.read_snapshot(bin_path, json_path) is None
+    assert "校验失败" in capsys.readouterr().out
+
+
+def test_stale_snapshot_is_ignored(tmp_path):
+    bin_path, json_path = write(tmp_path)
+    stat = os.stat(json_path)
+    os.utime(json_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    
+    assert binary_snapshot.read_snapshot(bin_path, json_path) is None
+
+
+def test_missing_snapshot(tmp_path):
+    assert binary_snapshot.read_snapshot(str(tmp_path / "missing.bin"), str(tmp_path / "x.json")) is None
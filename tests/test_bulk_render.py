@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+
+import pytest
+
+pytest.importorskip("reportlab")
+
+import bulk_render  # noqa: E402
+import quotation_pdf  # noqa: E402
+from bulk_render import renderer_fingerprint, run_render  # noqa: E402
+
+
+def write_quotation(path, total):
+    item = {"sphereType": "S", "sphereModel": "A", "flangeType": "F", "flangeModel": "X",
+            "flangeQuantity": 1, "jointQuantity": 1, "spherePrice": total, "flangePrice": 0,
+            "jointPrice": total, "totalPrice": total}
+    path.write_text(json.dumps({"quotationItems": [item], "totalPrice": total}), encoding="utf-8")
+    return str(path)
+
+
+def render(files, output_dir, force=False):
+    results = list(run_render(files, str(output_dir), jobs=1, force=force))
+    assert not [result["error"] for result in results if result["error"]]
+    return {os.path.basename(result["source"]): result["skipped"] for result in results}
+
+
+def test_unchanged_files_are_skipped(tmp_path):
+    files = [write_quotation(tmp_path / "a.json", 10), write_quotation(tmp_path / "b.json", 20)]
+    output_dir = tmp_path / "pdf"
+    
+    assert render(files, output_dir) == {"a.json": False, "b.json": False}
+    assert (output_dir / "a.pdf").read_bytes().startswith(b"%PDF")
+    assert render(files, output_dir) == {"a.json": True, "b.json": True}
+    
+    # 只重新生成修改过或输出已丢失的报价单
+    write_quotation(tmp_path / "a.json", 11)
+    (output_dir / "b.pdf").unlink()
+    assert render(files, output_dir) == {"a.json": False, "b.json": False}
+    assert render(files, output_dir, force=True) == {"a.json": False, "b.json": False}
+
+
+def test_renderer_change_rerenders_everything(tmp_path, monkeypatch):
+    files = [write_quotation(tmp_path / "a.json", 10)]
+    output_dir = tmp_path / "pdf"
+    render(files, output_dir)
+    fingerprint = renderer_fingerprint()
+    
+    monkeypatch.setattr(bulk_render, "TABLE_HEADERS", ["序号", "型号"])
+    assert renderer_fingerprint() != fingerprint
+    assert render(files, output_dir) == {"a.json": False}
+    monkeypatch.undo()
+    
+    # 更换中文字体后同样需要重新生成
+    font_file = tmp_path / "font.ttf"
+    font_file.write_bytes(b"font")
+    monkeypatch.setattr(quotation_pdf, "cjk_font_file", lambda: str(font_file))
+    assert renderer_fingerprint() != fingerprint
+    changed = renderer_fingerprint()
+    font_file.write_bytes(b"other font")
+    assert renderer_fingerprint() != changed
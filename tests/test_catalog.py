@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+from array import array
+
+import pytest
+
+from catalog import COMPACT_MIN_DELETED, ModelColumns, ModelListView, parse_price
+
+
+def test_add_keeps_columns_aligned():
+    columns = ModelColumns()
+    assert columns.add("DN50", 12.5)
+    assert columns.add("DN80", "20")
+    assert not columns.add("DN50", 99)
+    
+    assert len(columns) == 2
+    assert columns.price("DN50") == 12.5
+    assert columns.price("DN80") == 20.0
+    assert list(columns.items()) == [("DN50", 12.5), ("DN80", 20.0)]
+
+
+def test_add_invalid_price_does_not_mutate():
+    columns = ModelColumns()
+    columns.add("DN50", 1)
+    with pytest.raises(ValueError):
+        columns.add("DN80", "abc")
+    
+    assert len(columns.names) == len(columns.prices) == 1
+    assert "DN80" not in columns.rows
+    assert columns.add("DN80", 2)
+    assert columns.price("DN80") == 2.0
+
+
+@pytest.mark.parametrize("price", ["abc", None, float("nan"), float("inf"), "-inf", -0.01])
+def test_invalid_prices_rejected(price):
+    with pytest.raises(ValueError):
+        parse_price(price)
+    
+    columns = ModelColumns()
+    columns.add("DN50", 1)
+    with pytest.raises(ValueError):
+        columns.add("DN80", price)
+    with pytest.raises(ValueError):
+        columns.set_price("DN50", price)
+    assert list(columns.items()) == [("DN50", 1.0)]
+
+
+def test_remove_marks_row_deleted():
+    columns = ModelColumns()
+    for model, price in (("A", 1), ("B", 2), ("C", 3)):
+        columns.add(model, price)
+    
+    assert columns.remove("B")
+    assert not columns.remove("B")
+    assert columns.deleted == 1
+    assert columns.price("B") is None
+    assert columns.models() == ["A", "C"]
+    assert list(columns.items()) == [("A", 1.0), ("C", 3.0)]
+
+
+def test_compact_preserves_prices():
+    columns = ModelColumns()
+    for i in range(10):
+        columns.add(f"M{i}", i * 1.5)
+    for i in range(0, 10, 2):
+        columns.remove(f"M{i}")
+    
+    columns.compact()
+    assert columns.deleted == 0
+    assert columns.names == ["M1", "M3", "M5", "M7", "M9"]
+    assert columns.rows == {name: row for row, name in enumerate(columns.names)}
+    for name in columns.names:
+        assert columns.price(name) == int(name[1:]) * 1.5
+
+
+def test_remove_compacts_automatically():
+    columns = ModelColumns()
+    for i in range(COMPACT_MIN_DELETED * 2):
+        columns.add(f"M{i}", i)
+    for i in range(COMPACT_MIN_DELETED):
+        columns.remove(f"M{i}")
+    
+    assert columns.deleted == 0
+    assert len(columns.names) == len(columns.prices) == COMPACT_MIN_DELETED
+    assert columns.price(f"M{COMPACT_MIN_DELETED}") == COMPACT_MIN_DELETED
+
+
+def test_from_columns_rejects_misaligned_prices():
+    with pytest.raises(ValueError):
+        ModelColumns.from_columns(["A", "B"], array("d", [1.0]))
+    with pytest.raises(ValueError):
+        ModelColumns.from_columns(["A", "A"], array("d", [1.0, 2.0]))
+
+
+def test_list_view_reads_without_compacting():
+    columns = ModelColumns()
+    for i in range(6):
+        columns.add(f"M{i}", i)
+    view = ModelListView(columns)
+    assert view[1] == {"model": "M1", "price": 1.0}
+    
+    columns.remove("M0")
+    columns.remove("M3")
+    names = columns.names
+    assert len(view) == 4
+    assert view[0] == {"model": "M1", "price": 1.0}
+    assert view[-1] == {"model": "M5", "price": 5.0}
+    assert [record["model"] for record in view[1:3]] == ["M2", "M4"]
+    assert [record["model"] for record in view] == ["M1", "M2", "M4", "M5"]
+    assert columns.names is names and columns.deleted == 2
+    with pytest.raises(IndexError):
+        view[4]
+    
+    # 行布局变化后重新映射
+    columns.add("M6", 6)
+    columns.compact()
+    assert view[3] == {"model": "M5", "price": 5.0}
+    assert view[-1] == {"model": "M6", "price": 6.0}
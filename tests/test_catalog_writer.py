@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+
+import models
+from catalog_writer import CatalogWriter
+from models import ProductDataModel
+
+
+class Recorder:
+    """记录写入调用的快照和变更日志写入函数"""
+    
+    def __init__(self):
+        self.calls = []
+        self.journal = 0
+        self.fail_snapshot = False
+    
+    def write_snapshot(self, snapshot):
+        if self.fail_snapshot:
+            raise OSError("磁盘已满")
+        self.calls.append(("snapshot", snapshot))
+        self.journal = 0
+    
+    def append_records(self, records):
+        self.calls.append(("records", list(records)))
+        self.journal += len(records) * 10
+        return self.journal
+
+
+def test_writes_snapshot_before_later_records():
+    recorder = Recorder()
+    writer = CatalogWriter(recorder.write_snapshot, recorder.append_records)
+    writer.submit_records([1])
+    assert writer.flush(5)
+    writer.submit_snapshot("S")
+    writer.submit_records([2, 3])
+    assert writer.flush(5)
+    
+    assert recorder.calls[0] == ("records", [1])
+    assert ("snapshot", "S") in recorder.calls
+    assert recorder.calls[-1] == ("records", [2, 3])
+    assert writer.journal_size == recorder.journal
+
+
+def test_snapshot_submitted_during_append_resets_journal_size():
+    recorder = Recorder()
+    appending = threading.Event()
+    release = threading.Event()
+    
+    def slow_append(records):
+        appending.set()
+        release.wait(5)
+        return recorder.append_records(records)
+    
+    writer = CatalogWriter(recorder.write_snapshot, slow_append)
+    writer.submit_records([1, 2, 3])
+    assert appending.wait(5)
+    # 写入线程正在追加变更记录时提交快照，追加得到的日志大小不能覆盖清零后的大小
+    writer.submit_snapshot("S")
+    release.set()
+    assert writer.flush(5)
+    assert writer.journal_size == 0
+
+
+def test_failed_write_is_reported_until_next_snapshot():
+    recorder = Recorder()
+    recorder.fail_snapshot = True
+    writer = CatalogWriter(recorder.write_snapshot, recorder.append_records)
+    writer.submit_snapshot("S1")
+    assert not writer.flush(5)
+    assert writer.failed
+    
+    recorder.fail_snapshot = False
+    writer.submit_snapshot("S2")
+    assert writer.flush(5)
+    assert recorder.calls == [("snapshot", "S2")]
+
+
+def test_large_journal_is_compacted(product_model, monkeypatch):
+    monkeypatch.setattr(models, "JOURNAL_COMPACT_SIZE", 200)
+    assert product_model.flush()
+    
+    for i in range(20):
+        product_model.update_sphere_price("S", "A", 10 + i)
+        assert product_model.flush()
+        # 提交时检查上一次写入后的日志大小，超过限制后合并到快照文件，日志不会持续增长
+        assert os.path.getsize(models.JOURNAL_FILE) < 400 if os.path.exists(models.JOURNAL_FILE) else True
+    
+    spheres = ProductDataModel._read_catalog(models.DATA_FILE)[0]
+    assert spheres.get_price("S", "A") > 20
+    reloaded = ProductDataModel()
+    assert reloaded.get_sphere_price("S", "A") == 29
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+from models import ProductDataModel
+
+
+def write_csv(path, text):
+    # 与Excel导出的CSV文件一样带BOM
+    path.write_bytes(("\ufeff" + text).encode("utf-8"))
+    return str(path)
+
+
+def test_import_rows_and_report_errors(product_model, tmp_path):
+    path = write_csv(tmp_path / "prices.csv", "\n".join([
+        "类别,种类,型号,价格",
+        "球体,S,C,7.5",
+        "法兰,G,Z,2",
+        "球体,S,A,99",          # 已存在的型号被跳过
+        "",
+        "球体,S,D,abc",
+        "球体,S,E,-1",
+        "球体,S,F,nan",
+        "阀门,S,G,1",
+        "球体,,H,1",
+        "球体,S",
+    ]) + "\n")
+    progress = []
+    
+    result = product_model.import_csv(path, progress_callback=lambda done, total: progress.append((done, total)))
+    
+    assert result["added"] == 2
+    assert result["duplicates"] == 1
+    assert result["invalid"] == 6
+    assert result["errors"][0] == "第6行: 价格不是有效的数字"
+    assert result["errors"][1] == "第7行: 价格必须是非负数"
+    assert progress[-1][0] == progress[-1][1]
+    assert product_model.get_sphere_price("S", "C") == 7.5
+    assert product_model.get_sphere_price("S", "A") == 10
+    assert product_model.flange_types == ["F", "G"]
+    
+    # 导入结果已保存
+    assert product_model.flush()
+    assert ProductDataModel().get_flange_price("G", "Z") == 2
+
+
+def test_default_kind_and_english_header(product_model, tmp_path):
+    path = write_csv(tmp_path / "flanges.csv", "Model,Type,Price\nW,F,4\n")
+    assert product_model.import_csv(path, kind="flange")["added"] == 1
+    assert product_model.get_flange_price("F", "W") == 4
+    
+    # 没有类别列也没有指定默认类别，或缺少必需的列时不导入
+    assert product_model.import_csv(path) is None
+    assert product_model.import_csv(write_csv(tmp_path / "bad.csv", "model,price\nW,1\n"), kind="flange") is None
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+import io
+import json
+
+import pytest
+
+from json_stream import JSONDocumentStream, JSONStreamError, JSONStreamReader
+
+
+def read_array(text, chunk_size):
+    reader = JSONStreamReader(io.StringIO(text), chunk_size=chunk_size)
+    return [reader.read_value() for _ in reader.iter_array()]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64])
+def test_values_split_across_chunks(chunk_size):
+    values = [1.25, -3, "球体 DN100", {"model": "A", "price": 10.5}, [1, [2, 3]], True, None, 12345678]
+    assert read_array(json.dumps(values, ensure_ascii=False), chunk_size) == values
+
+
+def test_number_at_chunk_boundary_is_not_truncated():
+    # 第一块以 "1." 结尾，必须继续读取才能得到完整的数字
+    assert read_array("[1.5, 22.75]", 4) == [1.5, 22.75]
+    assert read_array("[123456]", 4) == [123456]
+
+
+def test_document_stream_nested_elements():
+    document = {
+        "sphereTypes": ["S1", "S2"],
+        "sphereModels": {
+            "S1": [{"model": "A", "price": 1}, {"model": "B", "price": 2}],
+            "S2": [],
+        },
+        "flangeModels": {"F1": [{"model": "C", "price": 3, "extra": {"nested": [1, 2]}}]},
+        "version": "1.0",
+    }
+    f = io.StringIO(json.dumps(document))
+    stream = JSONDocumentStream(f, {"sphereModels": 2, "flangeModels": 2, "sphereTypes": 1})
+    stream.reader._chunk_size = 5
+    
+    assert list(stream) == [
+        ("sphereTypes", None, "S1"),
+        ("sphereTypes", None, "S2"),
+        ("sphereModels", "S1", {"model": "A", "price": 1}),
+        ("sphereModels", "S1", {"model": "B", "price": 2}),
+        ("flangeModels", "F1", {"model": "C", "price": 3, "extra": {"nested": [1, 2]}}),
+        ("version", None, "1.0"),
+    ]
+    assert stream.keys == set(document)
+
+
+@pytest.mark.parametrize("text", ['[1, 2', '[1 2]', '{"a": 1} x', '[1,]', '{1: 2}'])
+def test_malformed_input_raises(text):
+    with pytest.raises(JSONStreamError):
+        list(JSONDocumentStream(io.StringIO(text), {"a": 1}))
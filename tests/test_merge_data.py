@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+from models import ProductDataModel
+
+
+def write_catalog(path, sphere_types, sphere_models, flange_types, flange_models):
+    path.write_text(json.dumps({"sphereTypes": sphere_types, "sphereModels": sphere_models,
+                                "flangeTypes": flange_types, "flangeModels": flange_models}), encoding="utf-8")
+    return str(path)
+
+
+def test_merge_applies_only_differences(product_model, tmp_path):
+    path = write_catalog(
+        tmp_path / "catalog.json",
+        ["S", "T"], {"S": [{"model": "A", "price": 12}, {"model": "C", "price": 5}],
+                     "T": [{"model": "Z", "price": 1}]},
+        ["F"], {"F": [{"model": "X", "price": 1.25}, {"model": "Y", "price": 3}]})
+    records = []
+    product_model.add_listener(records.append)
+    
+    changes = product_model.merge_data(path)
+    
+    assert changes["sphere"] == {
+        "addedTypes": ["T"],
+        "removedTypes": [],
+        "added": [{"type": "S", "model": "C", "price": 5.0}, {"type": "T", "model": "Z", "price": 1.0}],
+        "removed": [{"type": "S", "model": "B"}],
+        "repriced": [{"type": "S", "model": "A", "oldPrice": 10.0, "newPrice": 12.0}],
+    }
+    assert changes["flange"] == {"addedTypes": [], "removedTypes": [], "added": [], "removed": [], "repriced": []}
+    # 未变化的法兰型号不产生变更记录
+    assert all(record["kind"] == "sphere" for record in records)
+    assert len(records) == 5
+    
+    assert product_model.flush()
+    reloaded = ProductDataModel()
+    assert reloaded.sphere_types == ["S", "T"]
+    assert reloaded.get_sphere_models_by_type("S") == ["A", "C"]
+    assert reloaded.get_sphere_price("S", "A") == 12
+
+
+def test_merge_removes_missing_types(product_model, tmp_path):
+    path = write_catalog(tmp_path / "catalog.json", ["S"], {"S": [{"model": "A", "price": 10},
+                                                                  {"model": "B", "price": 20.5}]}, [], {})
+    changes = product_model.merge_data(path)
+    assert changes["flange"]["removedTypes"] == ["F"]
+    assert changes["flange"]["removed"] == [{"type": "F", "model": "X"}, {"type": "F", "model": "Y"}]
+    assert changes["sphere"]["repriced"] == []
+    assert product_model.flange_types == []
+
+
+def test_invalid_file_leaves_catalog_unchanged(product_model, tmp_path):
+    path = tmp_path / "catalog.json"
+    path.write_text('{"sphereTypes": ["S"], "sphereModels": {"S": [{"model": "A", "price": -1}]}}')
+    assert product_model.merge_data(str(path)) is None
+    # 缺少法兰数据的文件不视为完整目录
+    path.write_text('{"sphereTypes": ["S"], "sphereModels": {"S": []}}')
+    assert product_model.merge_data(str(path)) is None
+    
+    assert product_model.get_sphere_models_by_type("S") == ["A", "B"]
+    assert product_model.get_flange_models_by_type("F") == ["X", "Y"]
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from model_search import TypeModelIndex
+
+
+MODELS = ["DN50", "dn80", "PN16-DN100", "A1", "B", "XA", "KXF-1", "kxf-2", "Flange-A", "ax"]
+
+
+def brute_force(text):
+    query = text.casefold()
+    keys = sorted((model.casefold(), model) for model in MODELS)
+    prefix = [model for key, model in keys if key.startswith(query)]
+    infix = [model for key, model in keys if query in key and not key.startswith(query)]
+    return prefix + infix
+
+
+@pytest.mark.parametrize("text", ["", "a", "A", "x", "1", "n", "-", "dn", "xa", "f-", "1-d", "DN1", "zz"])
+def test_search_matches_linear_scan(text):
+    assert TypeModelIndex(MODELS).search(text) == brute_force(text)
+
+
+def test_short_query_sees_pending_changes():
+    index = TypeModelIndex(MODELS)
+    index.remove("XA")
+    index.add("QA")
+    assert index.search("a") == ["A1", "ax", "Flange-A", "QA"]
+    assert index.search("a", limit=2) == ["A1", "ax"]
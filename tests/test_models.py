@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+
+import pytest
+
+import models
+from json_stream import JSONStreamError
+from models import ProductDataModel, QuotationModel, find_quotation_files, to_cents
+
+
+@pytest.mark.parametrize("amount, cents", [
+    (0, 0),
+    (12.5, 1250),
+    (0.125, 13),
+    (1.005, 101),
+    (6.005, 601),
+    (2.675, 268),
+    ("3.14", 314),
+    (-0.005, -1),
+])
+def test_to_cents_rounds_half_up(amount, cents):
+    assert to_cents(amount) == cents
+
+
+@pytest.mark.parametrize("amount", [float("nan"), float("inf"), float("-inf"), "NaN"])
+def test_to_cents_rejects_non_finite(amount):
+    with pytest.raises(ValueError):
+        to_cents(amount)
+
+
+def test_lookup_by_type_and_model(product_model):
+    assert product_model.get_sphere_price("S", "B") == 20.5
+    assert product_model.get_flange_price("F", "X") == 1.25
+    assert product_model.has_sphere_model("S", "A")
+    assert not product_model.has_sphere_model("S", "X")
+    assert not product_model.has_sphere_model("Missing", "A")
+    assert product_model.get_sphere_price("S", "Missing") == 0.0
+    
+    # 同名型号在不同种类中互不影响
+    product_model.add_sphere_type("T")
+    product_model.add_sphere_model("T", "A", 99)
+    assert product_model.get_sphere_price("S", "A") == 10
+    assert product_model.get_sphere_price("T", "A") == 99
+    
+    assert product_model.delete_sphere_model("S", "A")
+    assert not product_model.has_sphere_model("S", "A")
+    assert product_model.get_sphere_price("T", "A") == 99
+    assert product_model.get_sphere_models_by_type("S") == ["B"]
+
+
+def test_find_quotation_files(tmp_path):
+    for name in ("b.json", "a.JSON", ".render_manifest.json", "notes.txt", "sub/c.json", "sub/deep/d.json"):
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("{}")
+    single = str(tmp_path / "notes.txt")
+    
+    found = find_quotation_files([str(tmp_path), single])
+    assert [os.path.relpath(path, tmp_path) for path in found] == ["a.JSON", "b.json", "notes.txt"]
+    
+    found = find_quotation_files([str(tmp_path)], recursive=True)
+    assert [os.path.relpath(path, tmp_path) for path in found] == [
+        "a.JSON", "b.json", os.path.join("sub", "c.json"), os.path.join("sub", "deep", "d.json")]
+
+
+def test_unit_prices_round_to_cents_before_quantity(product_model):
+    product_model.add_sphere_model("S", "Sub-cent", 6.005)
+    quotation = QuotationModel(product_model)
+    
+    # 6.005 先按 6.01 计算，再乘以数量：6.01 * 3 = 18.03，而不是 round(18.015) = 18.02
+    assert quotation.add_item("S", "Sub-cent", "F", "X", 0, 3) == 18.03
+    assert quotation.calculate_joint_price("S", "Sub-cent", "F", "X", 0) == 6.01
+    assert list(quotation.price_batch(["S"], ["Sub-cent"], ["F"], ["X"], [0], [3])[1]) == [18.03]
+
+
+def test_reprice_updates_referencing_lines(product_model):
+    quotation = QuotationModel(product_model)
+    quotation.add_item("S", "A", "F", "X", 2, 3)   # (10 + 1.25 * 2) * 3 = 37.5
+    quotation.add_item("S", "B", "F", "Y", 1, 1)   # 20.5 + 3 = 23.5
+    quotation.add_item("S", "A", "F", "Y", 4, 2)   # (10 + 3 * 4) * 2 = 44
+    quotation.delete_item(1)
+    assert quotation.total_price == 81.5
+    
+    updates = []
+    quotation.add_listener(lambda change, index: updates.append((change, index)))
+    result = quotation.reprice([("sphere", "S", "A", 12), ("flange", "F", "Y", 3),
+                                ("flange", "F", "Z", 9)])
+    
+    assert result == {"lines": 2, "old_total": 81.5, "new_total": 91.5}
+    assert updates == [("update", 0), ("update", 1)]
+    assert [item["totalPrice"] for item in quotation.quotation_items] == [43.5, 48.0]
+    assert quotation.total_price == sum(item["totalPrice"] for item in quotation.quotation_items)
+    assert quotation.reprice([("sphere", "S", "A", 12)]) is None
+
+
+def test_journal_replay_skips_bad_records(product_model):
+    product_model.flush()
+    records = [
+        {"op": "addModel", "kind": "sphere", "type": "S", "model": "Bad", "price": "abc"},
+        {"op": "addModel", "kind": "sphere", "type": "S", "model": "NaN", "price": float("nan")},
+        {"op": "setPrice", "kind": "sphere", "type": "S", "model": "A", "price": -1},
+        {"op": "addModel", "kind": "sphere", "type": "S"},
+        {"op": "unknown", "kind": "sphere"},
+        {"op": "addModel", "kind": "sphere", "type": "S", "model": "Good", "price": 5},
+    ]
+    with open(models.JOURNAL_FILE, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+        f.write('{"op": "setPrice", "kind"')  # 写入不完整的最后一条记录
+    
+    reloaded = ProductDataModel()
+    assert reloaded.get_sphere_price("S", "Good") == 5
+    assert reloaded.get_sphere_price("S", "A") == 10
+    assert not reloaded.has_sphere_model("S", "Bad")
+    assert reloaded.get_sphere_models_by_type("S") == ["A", "B", "Good"]
+
+
+@pytest.mark.parametrize("price", [float("nan"), float("inf"), -1])
+def test_invalid_prices_rejected(product_model, tmp_path, price):
+    with pytest.raises(ValueError):
+        product_model.add_sphere_model("S", "C", price)
+    with pytest.raises(ValueError):
+        product_model.update_flange_price("F", "X", price)
+    assert not product_model.has_sphere_model("S", "C")
+    assert product_model.get_flange_price("F", "X") == 1.25
+    
+    path = tmp_path / "bad.json"
+    path.write_text(json.dumps({"sphereTypes": ["S"], "sphereModels": {"S": [{"model": "A", "price": price}]}}))
+    with pytest.raises(JSONStreamError):
+        ProductDataModel._read_catalog(str(path))
+
+
+def test_models_by_type_limit(product_model):
+    product_model.add_sphere_model("S", "C", 1)
+    assert product_model.get_sphere_models_by_type("S", 2) == ["A", "B"]
+    product_model.delete_sphere_model("S", "A")
+    assert product_model.get_sphere_models_by_type("S", 2) == ["B", "C"]
+    assert product_model.get_sphere_models_by_type("S") == ["B", "C"]
+    assert product_model.get_flange_models_by_type("Missing", 2) == []
+
+
+def test_journal_replay(product_model):
+    assert product_model.flush()
+    
+    # 快照之后的修改只写入变更日志
+    product_model.update_sphere_price("S", "A", 11)
+    product_model.delete_flange_model("F", "Y")
+    product_model.add_sphere_model("S", "C", 7)
+    assert product_model.flush()
+    assert os.path.exists(models.JOURNAL_FILE)
+    
+    reloaded = ProductDataModel()
+    assert reloaded.get_sphere_price("S", "A") == 11
+    assert reloaded.get_sphere_price("S", "C") == 7
+    assert not reloaded.has_flange_model("F", "Y")
+    assert reloaded.get_flange_price("F", "X") == 1.25
+
+
+def test_price_batch(product_model):
+    quotation = QuotationModel(product_model)
+    joint_prices, totals = quotation.price_batch(["S", "S"], ["A", "B"], ["F", "F"], ["X", "Y"],
+                                                 [2, 1], [3, 10])
+    
+    assert list(joint_prices) == [12.5, 23.5]
+    assert list(totals) == [37.5, 235.0]
+    for args, total in zip((("S", "A", "F", "X", 2, 3), ("S", "B", "F", "Y", 1, 10)), totals):
+        quotation.clear_items()
+        assert quotation.add_item(*args) == total
+
+
+def test_price_batch_rejects_mismatched_lengths(product_model):
+    quotation = QuotationModel(product_model)
+    with pytest.raises(ValueError):
+        quotation.price_batch(["S", "S"], ["A"], ["F"], ["X"], [1], [1])
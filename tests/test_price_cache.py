@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+from models import JointPriceCache, QuotationModel
+
+
+def test_hits_until_type_is_modified(product_model):
+    product_model.add_sphere_type("T")
+    product_model.add_sphere_model("T", "A", 50)
+    cache = JointPriceCache(product_model)
+    
+    assert cache.lookup("S", "A", "F", "X") == (1000, 125)
+    assert cache.lookup("T", "A", "F", "X") == (5000, 125)
+    assert cache.lookup("S", "A", "F", "X") == (1000, 125)
+    assert (cache.hits, cache.misses) == (1, 2)
+    
+    # 只有被修改的种类的条目失效
+    product_model.update_sphere_price("S", "A", 11)
+    assert cache.lookup("S", "A", "F", "X") == (1100, 125)
+    assert cache.lookup("T", "A", "F", "X") == (5000, 125)
+    assert (cache.hits, cache.misses, cache.invalidations) == (2, 3, 1)
+    
+    product_model.update_flange_price("F", "X", 2)
+    assert cache.lookup("T", "A", "F", "X") == (5000, 200)
+    assert cache.invalidations == 2
+
+
+def test_reload_invalidates_every_entry(product_model):
+    cache = JointPriceCache(product_model)
+    cache.lookup("S", "A", "F", "X")
+    product_model.update_sphere_price("S", "A", 11)
+    product_model.flush()
+    
+    # 整体重新加载后所有条目失效
+    product_model.load_data()
+    assert cache.lookup("S", "A", "F", "X") == (1100, 125)
+    assert cache.invalidations == 1
+
+
+def test_least_recently_used_entry_is_evicted(product_model):
+    cache = JointPriceCache(product_model, maxsize=2)
+    cache.lookup("S", "A", "F", "X")
+    cache.lookup("S", "B", "F", "X")
+    cache.lookup("S", "A", "F", "X")
+    cache.lookup("S", "A", "F", "Y")
+    
+    cache.lookup("S", "A", "F", "X")
+    cache.lookup("S", "B", "F", "X")
+    assert (cache.hits, cache.misses) == (2, 4)
+
+
+def test_quotation_prices_follow_catalog_changes(product_model):
+    quotation = QuotationModel(product_model)
+    assert quotation.calculate_joint_price("S", "A", "F", "X", 2) == 12.5
+    product_model.update_flange_price("F", "X", 2)
+    assert quotation.calculate_joint_price("S", "A", "F", "X", 2) == 14
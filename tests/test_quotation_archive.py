@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+import json
+
+import pytest
+
+from quotation_archive import QuotationArchive
+
+
+def item(sphere_model, total):
+    return {"sphereType": "S", "sphereModel": sphere_model, "flangeType": "F", "flangeModel": "X",
+            "flangeQuantity": 1, "jointQuantity": 1, "spherePrice": total, "flangePrice": 0,
+            "jointPrice": total, "totalPrice": total}
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = QuotationArchive(str(tmp_path / "archive.db"))
+    paths = []
+    for day in range(1, 8):
+        path = tmp_path / f"q{day}.json"
+        items = [item("A" if day % 2 else "B", day * 100)]
+        path.write_text(json.dumps({"quotationItems": items, "totalPrice": day * 100,
+                                    "saveDate": f"2026-07-0{day}T10:00:00"}), encoding="utf-8")
+        paths.append(str(path))
+    results = list(archive.add_files(paths))
+    assert [result["status"] for result in results] == ["added"] * 7
+    yield archive
+    archive.close()
+
+
+def collect_pages(archive, limit, **criteria):
+    pages = []
+    after = None
+    while True:
+        page = archive.search(limit, after, **criteria)
+        if not page:
+            return pages
+        pages.append([result["total_price"] for result in page])
+        after = page[-1]["id"]
+
+
+def test_search_pages_newest_first(archive):
+    assert collect_pages(archive, 3) == [[700, 600, 500], [400, 300, 200], [100]]
+    assert archive.count() == 7
+
+
+def test_search_pages_with_criteria(archive):
+    assert collect_pages(archive, 2, sphere_model="A") == [[700, 500], [300, 100]]
+    assert collect_pages(archive, 2, date_from="2026-07-02", date_to="2026-07-04") == [[400, 300], [200]]
+    assert collect_pages(archive, 10, min_total=250, max_total=500) == [[500, 400, 300]]
+    assert archive.count(sphere_model="B", min_total=300) == 2
+
+
+def test_unchanged_file_is_skipped(archive):
+    path = archive.search(1)[0]["path"]
+    assert archive.add_file(path) == "unchanged"
+    assert archive.count() == 7
+
+
+def test_unknown_criteria_rejected(archive):
+    with pytest.raises(ValueError):
+        archive.search(owner="x")
+
+
+def test_reprice_reports_without_changing_archive(archive, tmp_path):
+    before = {path.name: path.read_bytes() for path in tmp_path.glob("*.json")}
+    
+    report = archive.reprice([("sphere", "S", "A", 50), ("flange", "F", "Missing", 1)])
+    
+    assert sorted((result["old_total"], result["new_total"], result["lines"]) for result in report) == [
+        (100, 50, 1), (300, 50, 1), (500, 50, 1), (700, 50, 1)]
+    # 存档和原文件都保持不变，再次检查得到同样的报告
+    assert archive.count(min_total=100, max_total=700) == 7
+    assert [line["totalPrice"] for line in archive.get_items(report[0]["id"])] == [report[0]["old_total"]]
+    assert {path.name: path.read_bytes() for path in tmp_path.glob("*.json")} == before
+    assert archive.reprice([("sphere", "S", "A", 50)]) == report
+    
+    with pytest.raises(ValueError):
+        archive.reprice([("joint", "S", "A", 1)])
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+import io
+
+import pytest
+
+pytest.importorskip("jinja2")
+
+from models import TABLE_HEADERS  # noqa: E402
+from quotation_html import generate_quotation, render_quotation, write_quotation  # noqa: E402
+
+
+def make_items(count, sphere_model="DN50"):
+    return [{"sphereType": "S", "sphereModel": sphere_model, "flangeType": "F", "flangeModel": "X",
+             "flangeQuantity": 2, "jointQuantity": 3, "spherePrice": 10, "flangePrice": 1.25,
+             "jointPrice": 12.5, "totalPrice": 37.5} for _ in range(count)]
+
+
+def test_html_lists_items_and_escapes_values():
+    html = render_quotation(make_items(2, '<b>"DN50"</b>&'), 75)
+    
+    assert "".join(f"<th>{header}</th>" for header in TABLE_HEADERS) in html
+    assert html.count("<tr><td>") == 2
+    assert "S - &lt;b&gt;&#34;DN50&#34;&lt;/b&gt;&amp;" in html
+    assert "<b>" not in html
+    assert "<td>总计</td><td>75.00</td>" in html
+
+
+def test_text_format_is_not_escaped():
+    text = render_quotation(make_items(1, "A&B"), 37.5, "text")
+    assert "1. 球体: S - A&B  法兰: F - X  法兰数量: 2  接头数量: 3  单价: 12.50元  小计: 37.50元" in text
+    assert "总计: 37.50元" in text
+
+
+def test_limit_shows_first_items_and_count():
+    html = render_quotation(make_items(10), 375, limit=3)
+    assert html.count("<tr><td>") == 3
+    assert "共 10 项，仅显示前 3 项" in html
+    assert "仅显示" not in render_quotation(make_items(3), 112.5, limit=3)
+
+
+def test_streamed_output_matches_rendered_output():
+    items = make_items(600)
+    rendered = render_quotation(items, 22500)
+    assert "".join(generate_quotation(items, 22500)) == rendered
+    
+    output = io.BytesIO()
+    write_quotation(output, items, 22500)
+    assert output.getvalue().decode("utf-8") == rendered
+
+
+def test_unknown_format_rejected():
+    with pytest.raises(ValueError):
+        render_quotation([], 0, "pdf")
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import re
+
+import pytest
+
+pytest.importorskip("reportlab")
+pypdf = pytest.importorskip("pypdf")
+
+import quotation_pdf  # noqa: E402
+from quotation_pdf import create_quotation_pdf, get_quotation_template  # noqa: E402
+
+
+def make_items(count):
+    return [{"sphereType": "S", "sphereModel": f"M{index:04d}", "flangeType": "F", "flangeModel": "X",
+             "flangeQuantity": 1, "jointQuantity": 2, "spherePrice": 1, "flangePrice": 0.5,
+             "jointPrice": 1.5, "totalPrice": 3} for index in range(count)]
+
+
+def render(items, progress_callback=None):
+    output = io.BytesIO()
+    create_quotation_pdf(output, items, sum(item["totalPrice"] for item in items), progress_callback)
+    return output.getvalue()
+
+
+def models_per_page(data):
+    reader = pypdf.PdfReader(io.BytesIO(data))
+    return [re.findall(r"M\d{4}", page.extract_text()) for page in reader.pages]
+
+
+def test_rows_are_split_into_page_sized_tables():
+    items = make_items(150)
+    progress = []
+    pages = models_per_page(render(items, lambda done, total: progress.append((done, total))))
+    
+    # 每个项目恰好出现一次，按顺序分布在多页中，每页的行数不超过一整页
+    assert [model for page in pages for model in page] == [item["sphereModel"] for item in items]
+    assert len(pages) >= 4
+    assert max(len(page) for page in pages) < 50
+    assert all(pages[:-1])
+    assert progress[-1] == (150, 150)
+    assert [done for done, _ in progress] == sorted(done for done, _ in progress)
+
+
+def test_empty_and_single_page_quotations():
+    assert models_per_page(render([])) == [[]]
+    assert models_per_page(render(make_items(3))) == [["M0000", "M0001", "M0002"]]
+
+
+def test_progress_callback_can_abort():
+    def abort(done, total):
+        raise RuntimeError("cancelled")
+    
+    with pytest.raises(RuntimeError):
+        render(make_items(100), abort)
+
+
+def test_template_is_shared_and_font_subset_is_embedded():
+    assert get_quotation_template() is get_quotation_template()
+    font_file = quotation_pdf.cjk_font_file()
+    if font_file is None:
+        pytest.skip("没有可用的中文TrueType字体")
+    
+    data = render(make_items(5))
+    assert b"/FontFile2" in data
+    # 只嵌入用到的字符，PDF远小于字体文件
+    assert len(data) < os.path.getsize(font_file) / 4
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("reportlab")
+pytest.importorskip("jinja2")
+
+import quote_server  # noqa: E402
+from quote_server import MAX_HEADER_COUNT, QuotationServer  # noqa: E402
+
+
+class StubProductModel:
+    generation = 0
+    
+    def add_listener(self, listener):
+        pass
+
+
+HEALTH = b"GET /health HTTP/1.1\r\nHost: localhost\r\n"
+
+
+def exchange(data):
+    async def run():
+        server = QuotationServer(StubProductModel(), pdf_workers=1)
+        port = await server.start("127.0.0.1", 0)
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(data)
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+            return response
+        finally:
+            await server.close()
+    return asyncio.run(run())
+
+
+def status_line(response):
+    return response.split(b"\r\n", 1)[0]
+
+
+def test_empty_lines_between_keep_alive_requests():
+    response = exchange(HEALTH + b"\r\n" + b"\r\n\r\n" + HEALTH + b"Connection: close\r\n\r\n")
+    assert response.count(b"HTTP/1.1 200 OK") == 2
+
+
+def test_too_many_headers():
+    response = exchange(HEALTH + b"X-Test: 1\r\n" * (MAX_HEADER_COUNT + 1) + b"\r\n")
+    assert status_line(response) == b"HTTP/1.1 431 Request Header Fields Too Large"
+
+
+def test_header_line_too_long():
+    response = exchange(HEALTH + b"X-Test: " + b"a" * 100000 + b"\r\n\r\n")
+    assert status_line(response) == b"HTTP/1.1 431 Request Header Fields Too Large"
+
+
+def test_request_line_too_long():
+    response = exchange(b"GET /" + b"a" * 100000 + b" HTTP/1.1\r\n\r\n")
+    assert status_line(response) == b"HTTP/1.1 400 Bad Request"
+
+
+@pytest.mark.parametrize("partial", [
+    HEALTH + b"X-Test: 1\r\n",                                        # 请求头没有结束
+    b"POST /price/joint HTTP/1.1\r\nContent-Length: 100\r\n\r\n{",   # 请求体没有发送完
+])
+def test_slow_request_times_out(monkeypatch, partial):
+    monkeypatch.setattr(quote_server, "REQUEST_TIMEOUT", 0.2)
+    response = exchange(partial)
+    assert status_line(response) == b"HTTP/1.1 408 Request Timeout"
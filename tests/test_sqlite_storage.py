@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+
+import models
+from sqlite_storage import MODEL_PAGE_SIZE, SQLITE_FILE, SQLiteProductDataModel
+
+
+@pytest.fixture
+def sqlite_model(workdir):
+    product_model = SQLiteProductDataModel()
+    yield product_model
+    product_model.conn.close()
+
+
+def user_version(product_model):
+    return product_model.conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def test_edits_persist(sqlite_model):
+    records = []
+    sqlite_model.add_listener(records.append)
+    with sqlite_model.batch():
+        assert sqlite_model.add_sphere_type("S")
+        assert sqlite_model.add_sphere_model("S", "A", 10)
+        assert sqlite_model.add_sphere_model("S", "B", "20.5")
+        assert not sqlite_model.add_sphere_model("S", "A", 1)
+        assert not sqlite_model.add_sphere_model("Missing", "A", 1)
+    assert sqlite_model.update_sphere_price("S", "A", 12)
+    assert sqlite_model.delete_sphere_model("S", "B")
+    assert [record["op"] for record in records] == ["addType", "addModel", "addModel", "setPrice", "deleteModel"]
+    sqlite_model.close()
+    
+    reopened = SQLiteProductDataModel()
+    assert reopened.sphere_types == ["S"]
+    assert reopened.get_sphere_price("S", "A") == 12
+    assert not reopened.has_sphere_model("S", "B")
+    assert list(reopened.sphere_models["S"]) == [{"model": "A", "price": 12.0}]
+    reopened.close()
+
+
+@pytest.mark.parametrize("price", ["abc", float("nan"), float("inf"), -1])
+def test_invalid_prices_rejected(sqlite_model, price):
+    sqlite_model.add_flange_type("F")
+    sqlite_model.add_flange_model("F", "X", 1)
+    with pytest.raises(ValueError):
+        sqlite_model.add_flange_model("F", "Y", price)
+    with pytest.raises(ValueError):
+        sqlite_model.update_flange_price("F", "X", price)
+    assert sqlite_model.get_flange_models_by_type("F") == ["X"]
+    assert sqlite_model.get_flange_price("F", "X") == 1
+
+
+def test_migrates_json_data_once(product_model):
+    product_model.update_sphere_price("S", "A", 11)
+    assert product_model.flush()
+    
+    migrated = SQLiteProductDataModel()
+    assert user_version(migrated) == 1
+    assert migrated.get_sphere_price("S", "A") == 11
+    assert migrated.get_flange_models_by_type("F") == ["X", "Y"]
+    
+    # 已迁移的数据库不会再次从JSON数据覆盖
+    migrated.delete_sphere_type("S")
+    migrated.close()
+    reopened = SQLiteProductDataModel()
+    assert reopened.sphere_types == []
+    assert reopened.flange_types == ["F"]
+    reopened.close()
+
+
+def test_failed_migration_is_retried(workdir):
+    os.makedirs("data")
+    with open(models.DATA_FILE, "w", encoding="utf-8") as f:
+        f.write('{"sphereTypes": ["S"], "sphereModels": {"S": [{"model": "A", "price": -1}]}}')
+    
+    failed = SQLiteProductDataModel()
+    assert user_version(failed) == 0
+    assert failed.sphere_types == []
+    failed.close()
+    
+    with open(models.DATA_FILE, "w", encoding="utf-8") as f:
+        f.write('{"sphereTypes": ["S"], "sphereModels": {"S": [{"model": "A", "price": 5}]}}')
+    retried = SQLiteProductDataModel()
+    assert user_version(retried) == 1
+    assert retried.get_sphere_price("S", "A") == 5
+    retried.close()
+    assert os.path.exists(SQLITE_FILE)
+
+
+def test_model_list_reads_pages(sqlite_model):
+    count = MODEL_PAGE_SIZE * 2 + 10
+    sqlite_model.add_sphere_type("S")
+    sqlite_model.add_sphere_models_bulk("S", ((f"M{i}", i) for i in range(count)))
+    
+    statements = []
+    sqlite_model.conn.set_trace_callback(statements.append)
+    view = sqlite_model.sphere_models["S"]
+    assert len(view) == count
+    assert view[MODEL_PAGE_SIZE + 1] == {"model": f"M{MODEL_PAGE_SIZE + 1}", "price": MODEL_PAGE_SIZE + 1}
+    assert view[MODEL_PAGE_SIZE + 2]["model"] == f"M{MODEL_PAGE_SIZE + 2}"
+    assert view[-1]["model"] == f"M{count - 1}"
+    assert [record["model"] for record in view[2:5]] == ["M2", "M3", "M4"]
+    with pytest.raises(IndexError):
+        view[count]
+    # 只统计数量并读取用到的页，不读取整个种类
+    assert sum("COUNT(*)" in statement for statement in statements) == 1
+    assert sum("LIMIT" in statement for statement in statements) == 3
+    assert all("COUNT(*)" in statement or "LIMIT" in statement for statement in statements
+               if "FROM product_models" in statement)
+    
+    # 数据库修改后重新读取
+    sqlite_model.conn.set_trace_callback(None)
+    sqlite_model.delete_sphere_model("S", "M0")
+    assert len(view) == count - 1
+    assert view[0]["model"] == "M1"
+
+
+def test_models_by_type_limit(sqlite_model):
+    sqlite_model.add_flange_type("F")
+    sqlite_model.add_flange_models_bulk("F", [("X", 1), ("Y", 2), ("Z", 3)])
+    assert sqlite_model.get_flange_models_by_type("F", 2) == ["X", "Y"]
+    assert sqlite_model.get_flange_models_by_type("F") == ["X", "Y", "Z"]